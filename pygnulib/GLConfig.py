@@ -90,7 +90,14 @@ class GLConfig(object):
                  single_configure: bool | None = None,
                  verbose: int | None = None,
                  dryrun: bool | None = None,
-                 errors: bool | None = None) -> None:
+                 dryrun_diff: bool | None = None,
+                 errors: bool | None = None,
+                 cache_modules: bool | None = None,
+                 cache_patches: bool | None = None,
+                 cache_subst: bool | None = None,
+                 cache_manifest: bool | None = None,
+                 explain: list[str] | None = None,
+                 jobs: int | None = None) -> None:
         '''Create new GLConfig instance.'''
         self.table = dict()
         self.table['tempdir'] = tempfile.mkdtemp()
@@ -238,10 +245,38 @@ class GLConfig(object):
         self.resetDryRun()
         if dryrun != None:
             self.setDryRun(dryrun)
+        # dryrun_diff
+        self.resetDryRunDiff()
+        if dryrun_diff != None:
+            self.setDryRunDiff(dryrun_diff)
         # errors
         self.resetErrors()
         if errors != None:
             self.setErrors(errors)
+        # cache_modules
+        self.resetCacheModules()
+        if cache_modules != None:
+            self.setCacheModules(cache_modules)
+        # cache_patches
+        self.resetCachePatches()
+        if cache_patches != None:
+            self.setCachePatches(cache_patches)
+        # cache_subst
+        self.resetCacheSubst()
+        if cache_subst != None:
+            self.setCacheSubst(cache_subst)
+        # cache_manifest
+        self.resetCacheManifest()
+        if cache_manifest != None:
+            self.setCacheManifest(cache_manifest)
+        # explain
+        self.resetExplain()
+        if explain != None:
+            self.setExplain(explain)
+        # jobs
+        self.resetJobs()
+        if jobs != None:
+            self.setJobs(jobs)
 
     # Define special methods.
     def __repr__(self) -> str:
@@ -317,12 +352,16 @@ class GLConfig(object):
                 return 2.64
             elif key == 'verbosity':
                 return 0
+            elif key == 'jobs':
+                return 1
             elif key in ['localpath', 'modules', 'avoids', 'tests',
-                         'incl_test_categories', 'excl_test_categories']:
+                         'incl_test_categories', 'excl_test_categories',
+                         'explain']:
                 return list()
             elif key in ['libtool', 'gnu_make', 'automake_subdir',
                          'automake_subdir_tests', 'conddeps',
-                         'libtests', 'dryrun']:
+                         'libtests', 'dryrun', 'dryrun_diff', 'cache_modules',
+                         'cache_patches', 'cache_subst', 'cache_manifest']:
                 return False
             elif key in ['copymode', 'lcopymode']:
                 return classes.CopyAction.Copy
@@ -1186,6 +1225,25 @@ class GLConfig(object):
         '''Reset status of dryrun mode.'''
         self.table['dryrun'] = False
 
+    # Define dryrun_diff methods.
+    def checkDryRunDiff(self) -> bool:
+        '''Check whether dryrun mode prints the changes as a unified diff.'''
+        return self.table['dryrun_diff']
+
+    def setDryRunDiff(self, value: bool) -> None:
+        '''Enable / disable printing the changes of dryrun mode as a unified
+        diff.'''
+        if type(value) is bool:
+            self.table['dryrun_diff'] = value
+        else:  # if type(value) is not bool
+            raise TypeError('value must be a bool, not %s'
+                            % type(value).__name__)
+
+    def resetDryRunDiff(self) -> None:
+        '''Reset status of printing the changes of dryrun mode as a unified
+        diff.'''
+        self.table['dryrun_diff'] = False
+
     # Define errors methods.
     def checkErrors(self) -> bool:
         '''Check if GLError will be raised in non-critical situations.'''
@@ -1202,3 +1260,113 @@ class GLConfig(object):
     def resetErrors(self) -> None:
         '''Reset status of raising GLError in non-critical situations.'''
         self.table['errors'] = False
+
+    # Define cache_modules methods.
+    def checkCacheModules(self) -> bool:
+        '''Check whether the persistent module index is used.'''
+        return self.table['cache_modules']
+
+    def setCacheModules(self, value: bool) -> None:
+        '''Enable / disable the persistent module index.'''
+        if type(value) is bool:
+            self.table['cache_modules'] = value
+        else:  # if type(value) is not bool
+            raise TypeError('value must be a bool, not %s'
+                            % type(value).__name__)
+
+    def resetCacheModules(self) -> None:
+        '''Reset status of the persistent module index.'''
+        self.table['cache_modules'] = False
+
+    # Define cache_patches methods.
+    def checkCachePatches(self) -> bool:
+        '''Check whether the persistent cache of patched files is used.'''
+        return self.table['cache_patches']
+
+    def setCachePatches(self, value: bool) -> None:
+        '''Enable / disable the persistent cache of patched files.'''
+        if type(value) is bool:
+            self.table['cache_patches'] = value
+        else:  # if type(value) is not bool
+            raise TypeError('value must be a bool, not %s'
+                            % type(value).__name__)
+
+    def resetCachePatches(self) -> None:
+        '''Reset status of the persistent cache of patched files.'''
+        self.table['cache_patches'] = False
+
+    # Define cache_subst methods.
+    def checkCacheSubst(self) -> bool:
+        '''Check whether the persistent cache of AC_SUBST traces is used.'''
+        return self.table['cache_subst']
+
+    def setCacheSubst(self, value: bool) -> None:
+        '''Enable / disable the persistent cache of AC_SUBST traces.'''
+        if type(value) is bool:
+            self.table['cache_subst'] = value
+        else:  # if type(value) is not bool
+            raise TypeError('value must be a bool, not %s'
+                            % type(value).__name__)
+
+    def resetCacheSubst(self) -> None:
+        '''Reset status of the persistent cache of AC_SUBST traces.'''
+        self.table['cache_subst'] = False
+
+    # Define cache_manifest methods.
+    def checkCacheManifest(self) -> bool:
+        '''Check whether the manifest of the installed files is used.'''
+        return self.table['cache_manifest']
+
+    def setCacheManifest(self, value: bool) -> None:
+        '''Enable / disable the manifest of the installed files.'''
+        if type(value) is bool:
+            self.table['cache_manifest'] = value
+        else:  # if type(value) is not bool
+            raise TypeError('value must be a bool, not %s'
+                            % type(value).__name__)
+
+    def resetCacheManifest(self) -> None:
+        '''Reset status of the manifest of the installed files.'''
+        self.table['cache_manifest'] = False
+
+    # Define explain methods.
+    def getExplain(self) -> list[str]:
+        '''Return the list of the modules whose dependency chains are shown.'''
+        return list(self.table['explain'])
+
+    def setExplain(self, modules: list[str] | tuple[str]) -> None:
+        '''Specify the modules whose dependency chains are shown after the
+        transitive closure.'''
+        if type(modules) is list or type(modules) is tuple:
+            for module in modules:
+                if type(module) is not str:
+                    raise TypeError('each module must be a string')
+            self.table['explain'] = list(modules)
+        else:  # if type of modules is not list or tuple
+            raise TypeError('modules must be a list or a tuple, not %s'
+                            % type(modules).__name__)
+
+    def resetExplain(self) -> None:
+        '''Reset the list of the modules whose dependency chains are shown.'''
+        self.table['explain'] = list()
+
+    # Define jobs methods.
+    def getJobs(self) -> int:
+        '''Return the number of files that are installed in parallel.'''
+        return self.table['jobs']
+
+    def setJobs(self, jobs: int) -> None:
+        '''Specify the number of files that are installed in parallel, where
+        jobs >= 1.'''
+        if type(jobs) is int:
+            if jobs >= 1:
+                self.table['jobs'] = jobs
+            else:  # if jobs < 1
+                raise ValueError('jobs must be at least 1, not %d' % jobs)
+        else:  # if type(jobs) is not int
+            raise TypeError('jobs must be an int, not %s'
+                            % type(jobs).__name__)
+
+    def resetJobs(self) -> None:
+        '''Reset the number of files that are installed in parallel.'''
+        self.table['jobs'] = 1
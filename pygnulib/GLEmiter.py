@@ -21,7 +21,8 @@ from __future__ import annotations
 import os
 import re
 import codecs
-import subprocess as sp
+import weakref
+from collections.abc import Callable
 from . import constants
 from .GLInfo import GLInfo
 from .GLConfig import GLConfig
@@ -29,6 +30,7 @@ from .GLModuleSystem import GLModule
 from .GLModuleSystem import GLModuleTable
 from .GLMakefileTable import GLMakefileTable
 from .GLFileSystem import GLFileAssistant
+from .GLSubstCache import trace_substitutions
 
 
 #===============================================================================
@@ -57,15 +59,37 @@ _CONVERT_TO_GNU_MAKE = [
     (re.compile(r'%reldir%/'), r''),
     (re.compile(r'%reldir%'), r'.')
 ]
+# The same substitutions, applied in a single pass.
+_convert_to_gnu_make_in_one_pass = constants.compile_substitutions(_CONVERT_TO_GNU_MAKE)
 
 
 def _convert_to_gnu_make(snippet: str) -> str:
     '''Convert a Automake snippet to GNU Make syntax.'''
     if type(snippet) is not str:
         raise TypeError(f'snippet must be a str, not {type(snippet).__name__}')
-    for regexp in _CONVERT_TO_GNU_MAKE:
-        snippet = re.sub(regexp[0], regexp[1], snippet)
-    return snippet
+    return _convert_to_gnu_make_in_one_pass(snippet)
+
+
+def _substitute_autoconf_snippet(include_guard_prefix: str, auxdir: str, disable_libtool: bool,
+                                 disable_gettext: bool, replace_auxdir: bool) -> Callable[[str], str]:
+    '''Return the function that applies the edits of GLEmiter.autoconfSnippet
+    to an indented autoconf snippet, in a single pass.'''
+    rules = [(re.escape('${gl_include_guard_prefix}'), include_guard_prefix.replace('\\', r'\\'))]
+    if disable_libtool:
+        rules += [(re.escape('$gl_cond_libtool'), 'false'),
+                  (re.escape('gl_libdeps'), 'gltests_libdeps'),
+                  (re.escape('gl_ltlibdeps'), 'gltests_ltlibdeps')]
+    if disable_gettext:
+        rules += [(re.escape('AM_GNU_GETTEXT([external])'),
+                   'dnl you must add AM_GNU_GETTEXT([external]) or similar to configure.ac.')]
+    else:
+        # Don't indent AM_GNU_GETTEXT_VERSION line, as that confuses
+        # autopoint through at least GNU gettext version 0.18.2.
+        rules += [(re.compile(r'^ *AM_GNU_GETTEXT_VERSION', re.M), r'AM_GNU_GETTEXT_VERSION')]
+    if replace_auxdir:
+        rules += [(re.compile(r'AC_CONFIG_FILES\(\[(.*)\:build-aux/(.*)\]\)', re.M),
+                   r'AC_CONFIG_FILES([\1:%s/\2])' % auxdir)]
+    return constants.compile_substitutions(rules)
 
 
 def _eliminate_NMD_from_line(line: str, automake_subdir: bool) -> str | None:
@@ -111,6 +135,12 @@ def _eliminate_NMD(snippet: str, automake_subdir: bool) -> str:
 class GLEmiter(object):
     '''This class is used to emit the contents of necessary files.'''
 
+    # The compiled substitutions of autoconfSnippet and the edited Automake
+    # snippets of lib_Makefile_am, one set per GLConfig instance. They are
+    # shared among all GLEmiter instances for the same configuration, so that
+    # GLMegaTestDir computes them only once for all its test directories.
+    registries = weakref.WeakKeyDictionary()
+
     def __init__(self, config: GLConfig) -> None:
         '''Create GLEmiter instance.'''
         self.info = GLInfo()
@@ -118,6 +148,16 @@ class GLEmiter(object):
             raise TypeError('config must be a GLConfig, not %s'
                             % type(config).__name__)
         self.config = config
+        localpath = list(self.config['localpath'])
+        registry = GLEmiter.registries.get(self.config)
+        if registry == None or registry['localpath'] != localpath:
+            # The snippets depend on the local directories.
+            registry = dict()
+            registry['localpath'] = localpath
+            registry['autoconf_substitutions'] = dict()
+            registry['lib_module_snippets'] = dict()
+            GLEmiter.registries[self.config] = registry
+        self.registry = registry
 
     def __repr__(self) -> str:
         '''x.__repr__() <==> repr(x)'''
@@ -223,34 +263,24 @@ class GLEmiter(object):
             flag = True
         if flag:
             snippet = module.getAutoconfSnippet()
-            snippet = snippet.replace('${gl_include_guard_prefix}',
-                                      include_guard_prefix)
             lines = [ f'{indentation}{line}'
                       for line in snippet.split('\n')
                       if line.strip() ]
             snippet = lines_to_multiline(lines)
-            if disable_libtool:
-                snippet = snippet.replace('$gl_cond_libtool', 'false')
-                snippet = snippet.replace('gl_libdeps', 'gltests_libdeps')
-                snippet = snippet.replace('gl_ltlibdeps', 'gltests_ltlibdeps')
-            if disable_gettext:
-                snippet = snippet.replace('AM_GNU_GETTEXT([external])',
-                                          'dnl you must add AM_GNU_GETTEXT([external]) or similar to configure.ac.')
-            else:
-                # Don't indent AM_GNU_GETTEXT_VERSION line, as that confuses
-                # autopoint through at least GNU gettext version 0.18.2.
-                snippet = re.compile(r'^ *AM_GNU_GETTEXT_VERSION', re.M).sub(r'AM_GNU_GETTEXT_VERSION', snippet)
-            emit += snippet
+            # Replace ${gl_include_guard_prefix}, disable libtool and gettext
+            # and replace the 'build-aux' directory in AC_CONFIG_FILES.
+            key = tuple([include_guard_prefix, auxdir, disable_libtool, disable_gettext, replace_auxdir])
+            substitutions = self.registry['autoconf_substitutions']
+            if key not in substitutions:
+                substitutions[key] = _substitute_autoconf_snippet(include_guard_prefix, auxdir, disable_libtool,
+                                                                  disable_gettext, replace_auxdir)
+            substitute = substitutions[key]
+            emit += substitute(snippet)
             if str(module) == 'alloca' and libtool and not disable_libtool:
                 emit += 'changequote(,)dnl\n'
                 emit += "LTALLOCA=`echo \"$ALLOCA\" | sed -e 's/\\.[^.]* /.lo /g;s/\\.[^.]*$/.lo/'`\n"
                 emit += 'changequote([, ])dnl\n'
                 emit += 'AC_SUBST([LTALLOCA])'
-            if replace_auxdir:
-                regex = r'AC_CONFIG_FILES\(\[(.*)\:build-aux/(.*)\]\)'
-                repl = r'AC_CONFIG_FILES([\1:%s/\2])' % auxdir
-                pattern = re.compile(regex, re.M)
-                emit = pattern.sub(repl, emit)
         lines = [ line
                   for line in emit.split('\n')
                   if line.strip() ]
@@ -312,7 +342,7 @@ class GLEmiter(object):
         auxdir = self.config['auxdir']
         conddeps = self.config['conddeps']
         macro_prefix = self.config['macro_prefix']
-        emit = ''
+        emit = []
         if not conddeps:
             # Ignore the conditions, and enable all modules unconditionally.
             for module in modules:
@@ -323,8 +353,8 @@ class GLEmiter(object):
                 elif verifier == 2:
                     solution = module.isTests()
                 if solution:
-                    emit += self.autoconfSnippet(module, toplevel,
-                                                 disable_libtool, disable_gettext, replace_auxdir, '  ')
+                    emit.append(self.autoconfSnippet(module, toplevel,
+                                                     disable_libtool, disable_gettext, replace_auxdir, '  '))
         else:  # if conddeps
             # Emit the autoconf code for the unconditional modules.
             for module in modules:
@@ -336,8 +366,8 @@ class GLEmiter(object):
                     solution = module.isTests()
                 if solution:
                     if not moduletable.isConditional(module):
-                        emit += self.autoconfSnippet(module, toplevel,
-                                                     disable_libtool, disable_gettext, replace_auxdir, '  ')
+                        emit.append(self.autoconfSnippet(module, toplevel,
+                                                         disable_libtool, disable_gettext, replace_auxdir, '  '))
             # Initialize the shell variables indicating that the modules are enabled.
             for module in modules:
                 if verifier == 0:
@@ -349,7 +379,7 @@ class GLEmiter(object):
                 if solution:
                     if moduletable.isConditional(module):
                         shellvar = module.getShellVar()
-                        emit += '  %s=false\n' % module.getShellVar()
+                        emit.append('  %s=false\n' % module.getShellVar())
             # Emit the autoconf code for the conditional modules, each in a separate
             # function. This makes it possible to support cycles among conditional
             # modules.
@@ -364,12 +394,12 @@ class GLEmiter(object):
                     if moduletable.isConditional(module):
                         shellfunc = module.getShellFunc()
                         shellvar = module.getShellVar()
-                        emit += '  %s ()\n' % shellfunc
-                        emit += '  {\n'
-                        emit += '    if $%s; then :; else\n' % shellvar
-                        emit += self.autoconfSnippet(module, toplevel,
-                                                     disable_libtool, disable_gettext, replace_auxdir, '      ')
-                        emit += '      %s=true\n' % shellvar
+                        emit.append('  %s ()\n' % shellfunc)
+                        emit.append('  {\n')
+                        emit.append('    if $%s; then :; else\n' % shellvar)
+                        emit.append(self.autoconfSnippet(module, toplevel,
+                                                         disable_libtool, disable_gettext, replace_auxdir, '      '))
+                        emit.append('      %s=true\n' % shellvar)
                         depmodules = module.getDependenciesWithoutConditions()
                         # Intersect dependencies with the modules list.
                         depmodules = sorted(set(depmodules).intersection(referenceable_modules))
@@ -378,18 +408,18 @@ class GLEmiter(object):
                                 shellfunc = depmodule.getShellFunc()
                                 condition = moduletable.getCondition(module, depmodule)
                                 if condition != None and condition != True:
-                                    emit += '      if %s; then\n' % condition
-                                    emit += '        %s\n' % shellfunc
-                                    emit += '      fi\n'
+                                    emit.append('      if %s; then\n' % condition)
+                                    emit.append('        %s\n' % shellfunc)
+                                    emit.append('      fi\n')
                                 else:  # if condition == None or condition == True
-                                    emit += '      %s\n' % shellfunc
+                                    emit.append('      %s\n' % shellfunc)
                             # if not moduletable.isConditional(depmodule)
                             else:
                                 # The autoconf code for $dep has already been emitted above and
                                 # therefore is already executed when this code is run.
                                 pass
-                        emit += '    fi\n'
-                        emit += '  }\n'
+                        emit.append('    fi\n')
+                        emit.append('  }\n')
             # Emit the dependencies from the unconditional to the conditional modules.
             for module in modules:
                 if verifier == 0:
@@ -408,18 +438,18 @@ class GLEmiter(object):
                                 shellfunc = depmodule.getShellFunc()
                                 condition = moduletable.getCondition(module, depmodule)
                                 if condition != None and condition != True:
-                                    emit += '  if %s; then\n' % condition
-                                    emit += '    %s\n' % shellfunc
-                                    emit += '  fi\n'
+                                    emit.append('  if %s; then\n' % condition)
+                                    emit.append('    %s\n' % shellfunc)
+                                    emit.append('  fi\n')
                                 else:  # if condition == None or condition == True
-                                    emit += '  %s\n' % shellfunc
+                                    emit.append('  %s\n' % shellfunc)
                             # if not moduletable.isConditional(depmodule)
                             else:
                                 # The autoconf code for $dep has already been emitted above and
                                 # therefore is already executed when this code is run.
                                 pass
             # Define the Automake conditionals.
-            emit += '  m4_pattern_allow([^%s_GNULIB_ENABLED_])\n' % macro_prefix
+            emit.append('  m4_pattern_allow([^%s_GNULIB_ENABLED_])\n' % macro_prefix)
             for module in modules:
                 if verifier == 0:
                     solution = True
@@ -431,9 +461,9 @@ class GLEmiter(object):
                     if moduletable.isConditional(module):
                         condname = module.getConditionalName()
                         shellvar = module.getShellVar()
-                        emit += '  AM_CONDITIONAL([%s], [$%s])\n' % (condname, shellvar)
+                        emit.append('  AM_CONDITIONAL([%s], [$%s])\n' % (condname, shellvar))
         lines = [ line
-                  for line in emit.split('\n')
+                  for line in ''.join(emit).split('\n')
                   if line.strip() ]
         emit = lines_to_multiline(lines)
         return emit
@@ -541,7 +571,7 @@ USE_MSGCTXT = no\n"""
             raise TypeError('gentests must be a bool, not %s'
                             % type(gentests).__name__)
         module_indicator_prefix = self.config.getModuleIndicatorPrefix()
-        emit = ''
+        emit = []
         # Overriding AC_LIBOBJ and AC_REPLACE_FUNCS has the effect of storing
         # platform-dependent object files in ${macro_prefix_arg}_LIBOBJS instead
         # of LIBOBJS. The purpose is to allow several gnulib instantiations under
@@ -550,31 +580,31 @@ USE_MSGCTXT = no\n"""
         # Furthermore it avoids an automake error like this when a Makefile.am
         # that uses pieces of gnulib also uses $(LIBOBJ):
         #   automatically discovered file `error.c' should not be explicitly mentioned.
-        emit += "  m4_pushdef([AC_LIBOBJ], m4_defn([%s_LIBOBJ]))\n" % macro_prefix_arg
-        emit += "  m4_pushdef([AC_REPLACE_FUNCS], m4_defn([%s_REPLACE_FUNCS]))\n" % macro_prefix_arg
+        emit.append("  m4_pushdef([AC_LIBOBJ], m4_defn([%s_LIBOBJ]))\n" % macro_prefix_arg)
+        emit.append("  m4_pushdef([AC_REPLACE_FUNCS], m4_defn([%s_REPLACE_FUNCS]))\n" % macro_prefix_arg)
         # Overriding AC_LIBSOURCES has the same purpose of avoiding the automake
         # error when a Makefile.am that uses pieces of gnulib also uses $(LIBOBJ):
         #   automatically discovered file `error.c' should not be explicitly mentioned
         # We let automake know about the files to be distributed through the
         # EXTRA_lib_SOURCES variable.
-        emit += "  m4_pushdef([AC_LIBSOURCES], m4_defn([%s_LIBSOURCES]))\n" % macro_prefix_arg
+        emit.append("  m4_pushdef([AC_LIBSOURCES], m4_defn([%s_LIBSOURCES]))\n" % macro_prefix_arg)
         # Create data variables for checking the presence of files that are
         # mentioned as AC_LIBSOURCES arguments. These are m4 variables, not shell
         # variables, because we want the check to happen when the configure file is
         # created, not when it is run. ${macro_prefix_arg}_LIBSOURCES_LIST is the
         # list of files to check for. ${macro_prefix_arg}_LIBSOURCES_DIR is the
         # subdirectory in which to expect them.
-        emit += "  m4_pushdef([%s_LIBSOURCES_LIST], [])\n" % macro_prefix_arg
-        emit += "  m4_pushdef([%s_LIBSOURCES_DIR], [])\n" % macro_prefix_arg
+        emit.append("  m4_pushdef([%s_LIBSOURCES_LIST], [])\n" % macro_prefix_arg)
+        emit.append("  m4_pushdef([%s_LIBSOURCES_DIR], [])\n" % macro_prefix_arg)
         # Scope for m4 macros.
-        emit += "  m4_pushdef([GL_MACRO_PREFIX], [%s])\n" % macro_prefix_arg
+        emit.append("  m4_pushdef([GL_MACRO_PREFIX], [%s])\n" % macro_prefix_arg)
         # Scope the GNULIB_<modulename> variables.
-        emit += "  m4_pushdef([GL_MODULE_INDICATOR_PREFIX], [%s])\n" % module_indicator_prefix
-        emit += "  gl_COMMON\n"
+        emit.append("  m4_pushdef([GL_MODULE_INDICATOR_PREFIX], [%s])\n" % module_indicator_prefix)
+        emit.append("  gl_COMMON\n")
         if gentests:
-            emit += '  AC_REQUIRE([gl_CC_ALLOW_WARNINGS])\n'
-            emit += '  AC_REQUIRE([gl_CXX_ALLOW_WARNINGS])\n'
-        return emit
+            emit.append('  AC_REQUIRE([gl_CC_ALLOW_WARNINGS])\n')
+            emit.append('  AC_REQUIRE([gl_CXX_ALLOW_WARNINGS])\n')
+        return ''.join(emit)
 
     def initmacro_end(self, macro_prefix_arg: str, gentests: bool) -> str:
         '''Emit the last few statements of the gl_INIT macro.
@@ -697,11 +727,80 @@ AC_DEFUN([%V1%_LIBSOURCES], [
         emit = emit.replace('%V2%', sourcebase_arg)
         return emit
 
+    def _lib_module_snippets(self, module: GLModule, libname: str, libext: str,
+                             automake_subdir: bool, gnu_make: bool, for_test: bool) -> tuple[str, str] | None:
+        '''Return the edited conditional and unconditional Automake snippets of
+        a module, as they appear in the library Makefile, or None if both are
+        empty. The snippets are computed once per configuration for the same
+        module and arguments, so that GLTestDir and GLMegaTestDir, which emit
+        many Makefiles for the same modules, reuse them.
+        GLConfig: auxdir, include_guard_prefix, module_indicator_prefix.'''
+        include_guard_prefix = self.config['include_guard_prefix']
+        module_indicator_prefix = self.config.getModuleIndicatorPrefix()
+        key = tuple([module.path, module.patched, libname, libext, automake_subdir,
+                     gnu_make, for_test, self.config['auxdir'], include_guard_prefix,
+                     module_indicator_prefix])
+        snippets = self.registry['lib_module_snippets']
+        if key in snippets:
+            return snippets[key]
+        if libext == 'la':
+            perhapsLT = 'LT'
+            eliminate_LDFLAGS = False
+        else:  # if libext == 'a'
+            perhapsLT = ''
+            eliminate_LDFLAGS = True
+        # Get conditional snippet, edit it and save to amsnippet1.
+        amsnippet1 = module.getAutomakeSnippet_Conditional()
+        amsnippet1 = amsnippet1.replace('lib_LIBRARIES', 'lib%_LIBRARIES')
+        amsnippet1 = amsnippet1.replace('lib_LTLIBRARIES', 'lib%_LTLIBRARIES')
+        if eliminate_LDFLAGS:
+            pattern = re.compile(r'^(lib_LDFLAGS[\t ]*\+=.*$\n)', re.M)
+            amsnippet1 = pattern.sub(r'', amsnippet1)
+        # Replace NMD, so as to remove redundant "$(MKDIR_P) '.'" invocations.
+        # The logic is similar to how we define gl_source_base_prefix.
+        amsnippet1 = _eliminate_NMD(amsnippet1, automake_subdir)
+        pattern = re.compile(r'lib_([A-Z][A-Z]*)', re.M)
+        amsnippet1 = pattern.sub(r'%s_%s_\1' % (libname, libext),
+                                 amsnippet1)
+        amsnippet1 = amsnippet1.replace('$(GNULIB_', '$(' + module_indicator_prefix + '_GNULIB_')
+        amsnippet1 = amsnippet1.replace('lib%_LIBRARIES', 'lib_LIBRARIES')
+        amsnippet1 = amsnippet1.replace('lib%_LTLIBRARIES', 'lib_LTLIBRARIES')
+        if for_test:
+            # When creating a package for testing: Attempt to provoke failures,
+            # especially link errors, already during "make" rather than during
+            # "make check", because "make check" is not possible in a cross-compiling
+            # situation. Turn check_PROGRAMS into noinst_PROGRAMS.
+            amsnippet1 = amsnippet1.replace('check_PROGRAMS', 'noinst_PROGRAMS')
+        amsnippet1 = amsnippet1.replace('${gl_include_guard_prefix}',
+                                        include_guard_prefix)
+        if str(module) == 'alloca':
+            amsnippet1 += '%s_%s_LIBADD += @%sALLOCA@\n' % (libname, libext, perhapsLT)
+            amsnippet1 += '%s_%s_DEPENDENCIES += @%sALLOCA@\n' % (libname, libext, perhapsLT)
+        amsnippet1 = constants.combine_lines_matching(re.compile(r'%s_%s_SOURCES' % (libname, libext)),
+                                                      amsnippet1)
+
+        # Get unconditional snippet, edit it and save to amsnippet2.
+        amsnippet2 = module.getAutomakeSnippet_Unconditional()
+        pattern = re.compile(r'lib_([A-Z][A-Z]*)', re.M)
+        amsnippet2 = pattern.sub(r'%s_%s_\1' % (libname, libext),
+                                 amsnippet2)
+        amsnippet2 = amsnippet2.replace('$(GNULIB_',
+                                        '$(' + module_indicator_prefix + '_GNULIB_')
+        if (amsnippet1 + amsnippet2).strip() != '':
+            if gnu_make:
+                amsnippet1 = _convert_to_gnu_make(amsnippet1)
+                amsnippet2 = _convert_to_gnu_make(amsnippet2)
+            result = tuple([amsnippet1, amsnippet2])
+        else:  # if the snippets are empty
+            result = None
+        snippets[key] = result
+        return result
+
     def lib_Makefile_am(self, destfile: str, modules: list[GLModule], moduletable: GLModuleTable,
                         makefiletable: GLMakefileTable, actioncmd: str, for_test: bool) -> str:
         '''Emit the contents of the library Makefile. Returns it as a string.
         GLConfig: localpath, sourcebase, libname, pobase, auxdir, makefile_name, libtool,
-        macro_prefix, podomain, conddeps, witness_c_macro.
+        macro_prefix, podomain, conddeps, witness_c_macro, gnu_make, m4base, cache_subst.
 
         destfile is a filename relative to destdir of Makefile being generated.
         modules is a list of GLModule instances.
@@ -741,11 +840,9 @@ AC_DEFUN([%V1%_LIBSOURCES], [
         podomain = self.config['podomain']
         conddeps = self.config['conddeps']
         witness_c_macro = self.config['witness_c_macro']
-        include_guard_prefix = self.config['include_guard_prefix']
-        module_indicator_prefix = self.config.getModuleIndicatorPrefix()
         ac_version = self.config['ac_version']
         destfile = os.path.normpath(destfile)
-        emit = ''
+        emit = []
 
         # When using GNU make, or when creating an includable Makefile.am snippet,
         # augment variables with += instead of assigning them.
@@ -756,92 +853,46 @@ AC_DEFUN([%V1%_LIBSOURCES], [
         if libtool:
             libext = 'la'
             perhapsLT = 'LT'
-            eliminate_LDFLAGS = False
         else:  # if not libtool
             libext = 'a'
             perhapsLT = ''
-            eliminate_LDFLAGS = True
-        if for_test:
-            # When creating a package for testing: Attempt to provoke failures,
-            # especially link errors, already during "make" rather than during
-            # "make check", because "make check" is not possible in a cross-compiling
-            # situation. Turn check_PROGRAMS into noinst_PROGRAMS.
-            edit_check_PROGRAMS = True
-        else:  # if not for_test
-            edit_check_PROGRAMS = False
-        emit += "## DO NOT EDIT! GENERATED AUTOMATICALLY!\n"
+        emit.append("## DO NOT EDIT! GENERATED AUTOMATICALLY!\n")
         if not gnu_make:
-            emit += "## Process this file with automake to produce Makefile.in.\n"
-        emit += self.copyright_notice()
+            emit.append("## Process this file with automake to produce Makefile.in.\n")
+        emit.append(self.copyright_notice())
         if actioncmd:
-            emit += "# Reproduce by:\n%s\n" % actioncmd
-        emit += '\n'
+            emit.append("# Reproduce by:\n%s\n" % actioncmd)
+        emit.append('\n')
         uses_subdirs = False
 
         # Compute allsnippets variable.
-        allsnippets = ''
+        allsnippets = []
         for module in modules:
             if module.isNonTests():
-                # Get conditional snippet, edit it and save to amsnippet1.
-                amsnippet1 = module.getAutomakeSnippet_Conditional()
-                amsnippet1 = amsnippet1.replace('lib_LIBRARIES', 'lib%_LIBRARIES')
-                amsnippet1 = amsnippet1.replace('lib_LTLIBRARIES', 'lib%_LTLIBRARIES')
-                if eliminate_LDFLAGS:
-                    pattern = re.compile(r'^(lib_LDFLAGS[\t ]*\+=.*$\n)', re.M)
-                    amsnippet1 = pattern.sub(r'', amsnippet1)
-                # Replace NMD, so as to remove redundant "$(MKDIR_P) '.'" invocations.
-                # The logic is similar to how we define gl_source_base_prefix.
-                amsnippet1 = _eliminate_NMD(amsnippet1, automake_subdir)
-                pattern = re.compile(r'lib_([A-Z][A-Z]*)', re.M)
-                amsnippet1 = pattern.sub(r'%s_%s_\1' % (libname, libext),
-                                         amsnippet1)
-                amsnippet1 = amsnippet1.replace('$(GNULIB_', '$(' + module_indicator_prefix + '_GNULIB_')
-                amsnippet1 = amsnippet1.replace('lib%_LIBRARIES', 'lib_LIBRARIES')
-                amsnippet1 = amsnippet1.replace('lib%_LTLIBRARIES', 'lib_LTLIBRARIES')
-                if edit_check_PROGRAMS:
-                    amsnippet1 = amsnippet1.replace('check_PROGRAMS', 'noinst_PROGRAMS')
-                amsnippet1 = amsnippet1.replace('${gl_include_guard_prefix}',
-                                                include_guard_prefix)
-                if str(module) == 'alloca':
-                    amsnippet1 += '%s_%s_LIBADD += @%sALLOCA@\n' % (libname, libext, perhapsLT)
-                    amsnippet1 += '%s_%s_DEPENDENCIES += @%sALLOCA@\n' % (libname, libext, perhapsLT)
-                amsnippet1 = constants.combine_lines_matching(re.compile(r'%s_%s_SOURCES' % (libname, libext)),
-                                                              amsnippet1)
-
-                # Get unconditional snippet, edit it and save to amsnippet2.
-                amsnippet2 = module.getAutomakeSnippet_Unconditional()
-                pattern = re.compile(r'lib_([A-Z][A-Z]*)', re.M)
-                amsnippet2 = pattern.sub(r'%s_%s_\1' % (libname, libext),
-                                         amsnippet2)
-                amsnippet2 = amsnippet2.replace('$(GNULIB_',
-                                                '$(' + module_indicator_prefix + '_GNULIB_')
+                snippets = self._lib_module_snippets(module, libname, libext,
+                                                     automake_subdir, gnu_make, for_test)
                 # Skip the contents if it's entirely empty.
-                if (amsnippet1 + amsnippet2).strip() != '':
-                    allsnippets += '## begin gnulib module %s\n' % str(module)
+                if snippets != None:
+                    amsnippet1, amsnippet2 = snippets
+                    allsnippets.append('## begin gnulib module %s\n' % str(module))
                     if gnu_make:
-                        allsnippets += 'ifeq (,$(OMIT_GNULIB_MODULE_%s))\n' % str(module)
-                    allsnippets += '\n'
+                        allsnippets.append('ifeq (,$(OMIT_GNULIB_MODULE_%s))\n' % str(module))
+                    allsnippets.append('\n')
                     if conddeps:
                         if moduletable.isConditional(module):
                             name = module.getConditionalName()
                             if gnu_make:
-                                allsnippets += 'ifneq (,$(%s_CONDITION))\n' % name
+                                allsnippets.append('ifneq (,$(%s_CONDITION))\n' % name)
                             else:
-                                allsnippets += 'if %s\n' % name
-                    if gnu_make:
-                        allsnippets += _convert_to_gnu_make(amsnippet1)
-                    else:
-                        allsnippets += amsnippet1
+                                allsnippets.append('if %s\n' % name)
+                    allsnippets.append(amsnippet1)
                     if conddeps:
                         if moduletable.isConditional(module):
-                            allsnippets += 'endif\n'
-                    if gnu_make:
-                        allsnippets += _convert_to_gnu_make(amsnippet2)
-                    else:
-                        allsnippets += amsnippet2
+                            allsnippets.append('endif\n')
+                    allsnippets.append(amsnippet2)
                     if gnu_make:
-                        allsnippets += 'endif\n'
-                    allsnippets += '## end   gnulib module %s\n\n' % str(module)
+                        allsnippets.append('endif\n')
+                    allsnippets.append('## end   gnulib module %s\n\n' % str(module))
 
                     # Test whether there are some source files in subdirectories.
                     for file in module.getFiles():
@@ -851,46 +902,44 @@ AC_DEFUN([%V1%_LIBSOURCES], [
                             uses_subdirs = True
                             break
 
+        allsnippets = ''.join(allsnippets)
+
         if not makefile_name:
             subdir_options = ''
             # If there are source files in subdirectories, prevent collision of the
             # object files (example: hash.c and libxml/hash.c).
             if uses_subdirs:
                 subdir_options = ' subdir-objects'
-            emit += 'AUTOMAKE_OPTIONS = 1.14 gnits%s\n' % subdir_options
-        emit += '\n'
+            emit.append('AUTOMAKE_OPTIONS = 1.14 gnits%s\n' % subdir_options)
+        emit.append('\n')
         if not makefile_name:
-            emit += 'SUBDIRS =\n'
-            emit += 'noinst_HEADERS =\n'
-            emit += 'noinst_LIBRARIES =\n'
-            emit += 'noinst_LTLIBRARIES =\n'
-            emit += 'pkgdata_DATA =\n'
-            emit += 'EXTRA_DIST =\n'
-            emit += 'BUILT_SOURCES =\n'
-            emit += 'SUFFIXES =\n'
-        emit += 'MOSTLYCLEANFILES %s core *.stackdump\n' % assign
+            emit.append('SUBDIRS =\n')
+            emit.append('noinst_HEADERS =\n')
+            emit.append('noinst_LIBRARIES =\n')
+            emit.append('noinst_LTLIBRARIES =\n')
+            emit.append('pkgdata_DATA =\n')
+            emit.append('EXTRA_DIST =\n')
+            emit.append('BUILT_SOURCES =\n')
+            emit.append('SUFFIXES =\n')
+        emit.append('MOSTLYCLEANFILES %s core *.stackdump\n' % assign)
         if not makefile_name:
-            emit += 'MOSTLYCLEANDIRS =\n'
-            emit += 'CLEANFILES =\n'
-            emit += 'DISTCLEANFILES =\n'
-            emit += 'MAINTAINERCLEANFILES =\n'
+            emit.append('MOSTLYCLEANDIRS =\n')
+            emit.append('CLEANFILES =\n')
+            emit.append('DISTCLEANFILES =\n')
+            emit.append('MAINTAINERCLEANFILES =\n')
 
         if gnu_make:
-            emit += '# Start of GNU Make output.\n'
-            result = sp.run([UTILS['autoconf'], '-t', 'AC_SUBST:$1 = @$1@',
-                            joinpath(self.config['destdir'], 'configure.ac')],
-                            capture_output=True)
-            if result.returncode == 0:
-                # sort -u
-                emit += lines_to_multiline(sorted(list(set(x.strip()
-                                                           for x in result.stdout.decode(encoding='utf-8').splitlines()))))
+            emit.append('# Start of GNU Make output.\n')
+            lines, stderr = trace_substitutions(joinpath(self.config['destdir'], 'configure.ac'),
+                                                self.config['m4base'], self.config['cache_subst'])
+            if lines != None:
+                emit.append(lines_to_multiline(lines))
             else:
-                emit += '== gnulib-tool GNU Make output failed as follows ==\n'
-                emit += ['# stderr: ' + x + '\n' for x in
-                         result.stderr.decode(encoding='utf-8').splitlines()]
-            emit += '# End of GNU Make output.\n'
+                emit.append('== gnulib-tool GNU Make output failed as follows ==\n')
+                emit.append(''.join('# stderr: ' + x + '\n' for x in stderr.splitlines()))
+            emit.append('# End of GNU Make output.\n')
         else:
-            emit += '# No GNU Make output.\n'
+            emit.append('# No GNU Make output.\n')
 
         # Execute edits that apply to the Makefile.am being generated.
         for current_edit in range(0, makefiletable.count()):
@@ -902,7 +951,7 @@ AC_DEFUN([%V1%_LIBSOURCES], [
                         # The added subdirectory ${val} needs to be mentioned after '.'.
                         # Since we don't have '.' among SUBDIRS so far, add it now.
                         val = f'. {val}'
-                    emit += '%s += %s\n' % (dictionary['var'], val)
+                    emit.append('%s += %s\n' % (dictionary['var'], val))
                     del dictionary['var']
 
         # Define two parts of cppflags variable.
@@ -914,14 +963,14 @@ AC_DEFUN([%V1%_LIBSOURCES], [
             cppflags_part2 = ' -DGNULIB_STRICT_CHECKING=1'
         cppflags = '%s%s' % (cppflags_part1, cppflags_part2)
         if not makefile_name:
-            emit += '\n'
-            emit += 'AM_CPPFLAGS =%s\n' % cppflags
-            emit += 'AM_CFLAGS =\n'
+            emit.append('\n')
+            emit.append('AM_CPPFLAGS =%s\n' % cppflags)
+            emit.append('AM_CFLAGS =\n')
         else:  # if makefile_name
             if cppflags:
-                emit += '\n'
-                emit += 'AM_CPPFLAGS +=%s\n' % cppflags
-        emit += '\n'
+                emit.append('\n')
+                emit.append('AM_CPPFLAGS +=%s\n' % cppflags)
+        emit.append('\n')
 
         # Test if one of the snippets or the user's Makefile.am already specifies an
         # installation location for the library. Don't confuse automake by saying
@@ -943,20 +992,20 @@ AC_DEFUN([%V1%_LIBSOURCES], [
                         lib_gets_installed = True
         if not lib_gets_installed:
             # By default, the generated library should not be installed.
-            emit += 'noinst_%sLIBRARIES += %s.%s\n' % (perhapsLT, libname, libext)
+            emit.append('noinst_%sLIBRARIES += %s.%s\n' % (perhapsLT, libname, libext))
 
-        emit += '\n'
-        emit += '%s_%s_SOURCES =\n' % (libname, libext)
+        emit.append('\n')
+        emit.append('%s_%s_SOURCES =\n' % (libname, libext))
         if not for_test:
-            emit += '%s_%s_CFLAGS = $(AM_CFLAGS) $(GL_CFLAG_GNULIB_WARNINGS)\n' % (libname, libext)
+            emit.append('%s_%s_CFLAGS = $(AM_CFLAGS) $(GL_CFLAG_GNULIB_WARNINGS)\n' % (libname, libext))
         # Here we use $(LIBOBJS), not @LIBOBJS@. The value is the same. However,
         # automake during its analysis looks for $(LIBOBJS), not for @LIBOBJS@.
-        emit += '%s_%s_LIBADD = $(%s_%sLIBOBJS)\n' % (libname, libext, macro_prefix, perhapsLT)
-        emit += '%s_%s_DEPENDENCIES = $(%s_%sLIBOBJS)\n' % (libname, libext, macro_prefix, perhapsLT)
-        emit += 'EXTRA_%s_%s_SOURCES =\n' % (libname, libext)
+        emit.append('%s_%s_LIBADD = $(%s_%sLIBOBJS)\n' % (libname, libext, macro_prefix, perhapsLT))
+        emit.append('%s_%s_DEPENDENCIES = $(%s_%sLIBOBJS)\n' % (libname, libext, macro_prefix, perhapsLT))
+        emit.append('EXTRA_%s_%s_SOURCES =\n' % (libname, libext))
         if libtool:
-            emit += '%s_%s_LDFLAGS = $(AM_LDFLAGS)\n' % (libname, libext)
-            emit += '%s_%s_LDFLAGS += -no-undefined\n' % (libname, libext)
+            emit.append('%s_%s_LDFLAGS = $(AM_LDFLAGS)\n' % (libname, libext))
+            emit.append('%s_%s_LDFLAGS += -no-undefined\n' % (libname, libext))
             # Synthesize an ${libname}_${libext}_LDFLAGS augmentation by combining
             # the link dependencies of all modules.
             links = [ module.getLink()
@@ -971,30 +1020,30 @@ AC_DEFUN([%V1%_LIBSOURCES], [
                       for line in lines ]
             lines = sorted(set(lines))
             for line in lines:
-                emit += '%s_%s_LDFLAGS += %s\n' % (libname, libext, line)
-        emit += '\n'
+                emit.append('%s_%s_LDFLAGS += %s\n' % (libname, libext, line))
+        emit.append('\n')
         if pobase:
-            emit += 'AM_CPPFLAGS += -DDEFAULT_TEXT_DOMAIN=\\"%s-gnulib\\"\n' % podomain
-            emit += '\n'
+            emit.append('AM_CPPFLAGS += -DDEFAULT_TEXT_DOMAIN=\\"%s-gnulib\\"\n' % podomain)
+            emit.append('\n')
         allsnippets = allsnippets.replace('$(top_srcdir)/build-aux/',
                                           '$(top_srcdir)/%s/' % auxdir)
-        emit += allsnippets
-        emit += '\n'
-        emit += 'mostlyclean-local: mostlyclean-generic\n'
-        emit += '\t@for dir in \'\' $(MOSTLYCLEANDIRS); do \\\n'
-        emit += '\t  if test -n "$$dir" && test -d $$dir; then \\\n'
-        emit += '\t    echo "rmdir $$dir"; rmdir $$dir; \\\n'
-        emit += '\t  fi; \\\n'
-        emit += '\tdone; \\\n'
-        emit += '\t:\n'
+        emit.append(allsnippets)
+        emit.append('\n')
+        emit.append('mostlyclean-local: mostlyclean-generic\n')
+        emit.append('\t@for dir in \'\' $(MOSTLYCLEANDIRS); do \\\n')
+        emit.append('\t  if test -n "$$dir" && test -d $$dir; then \\\n')
+        emit.append('\t    echo "rmdir $$dir"; rmdir $$dir; \\\n')
+        emit.append('\t  fi; \\\n')
+        emit.append('\tdone; \\\n')
+        emit.append('\t:\n')
         # Emit rules to erase .Po and .Plo files for AC_LIBOBJ invocations.
         # Extend the 'distclean' rule.
-        emit += 'distclean-local: distclean-gnulib-libobjs\n'
-        emit += 'distclean-gnulib-libobjs:\n'
-        emit += '\t-rm -f @%s_LIBOBJDEPS@\n' % (macro_prefix)
+        emit.append('distclean-local: distclean-gnulib-libobjs\n')
+        emit.append('distclean-gnulib-libobjs:\n')
+        emit.append('\t-rm -f @%s_LIBOBJDEPS@\n' % (macro_prefix))
         # Extend the 'maintainer-clean' rule.
-        emit += 'maintainer-clean-local: distclean-gnulib-libobjs\n'
-        return emit
+        emit.append('maintainer-clean-local: distclean-gnulib-libobjs\n')
+        return ''.join(emit)
 
     def tests_Makefile_am(self, destfile: str, modules: list[GLModule], moduletable: GLModuleTable,
                           makefiletable: GLMakefileTable, witness_macro: str, for_test: bool) -> str:
@@ -1045,7 +1094,7 @@ AC_DEFUN([%V1%_LIBSOURCES], [
         ac_version = self.config['ac_version']
         libtests = self.config['libtests']
         single_configure = self.config['single_configure']
-        emit = ''
+        emit = []
 
         if libtool:
             libext = 'la'
@@ -1068,13 +1117,13 @@ AC_DEFUN([%V1%_LIBSOURCES], [
         testsbase_inverse = relinverse(testsbase)
 
         # Begin the generation.
-        emit += "## DO NOT EDIT! GENERATED AUTOMATICALLY!\n"
-        emit += "## Process this file with automake to produce Makefile.in.\n"
-        emit += '%s\n' % self.copyright_notice()
+        emit.append("## DO NOT EDIT! GENERATED AUTOMATICALLY!\n")
+        emit.append("## Process this file with automake to produce Makefile.in.\n")
+        emit.append('%s\n' % self.copyright_notice())
 
         uses_subdirs = False
-        main_snippets = ''
-        longrun_snippets = ''
+        main_snippets = []
+        longrun_snippets = []
         for module in modules:
             if for_test and not single_configure:
                 if module.repeatModuleInTests():
@@ -1145,9 +1194,9 @@ AC_DEFUN([%V1%_LIBSOURCES], [
                     snippet += '## end   gnulib module %s\n\n' % str(module)
                     # Mention long-running tests at the end.
                     if 'longrunning-test' in module.getStatuses():
-                        longrun_snippets += snippet
+                        longrun_snippets.append(snippet)
                     else:
-                        main_snippets += snippet
+                        main_snippets.append(snippet)
 
                     # Test whether there are some source files in subdirectories.
                     for file in module.getFiles():
@@ -1163,37 +1212,37 @@ AC_DEFUN([%V1%_LIBSOURCES], [
         subdir_options = ''
         if uses_subdirs:
             subdir_options = ' subdir-objects'
-        emit += 'AUTOMAKE_OPTIONS = 1.14 foreign%s\n\n' % subdir_options
+        emit.append('AUTOMAKE_OPTIONS = 1.14 foreign%s\n\n' % subdir_options)
         if for_test and not single_configure:
-            emit += 'ACLOCAL_AMFLAGS = -I %s/%s\n\n' % (testsbase_inverse, m4base)
+            emit.append('ACLOCAL_AMFLAGS = -I %s/%s\n\n' % (testsbase_inverse, m4base))
 
         # Nothing is being added to SUBDIRS; nevertheless the existence of this
         # variable is needed to avoid an error from automake:
         #   "AM_GNU_GETTEXT used but SUBDIRS not defined"
-        emit += 'SUBDIRS = .\n'
-        emit += 'TESTS =\n'
-        emit += 'XFAIL_TESTS =\n'
-        emit += 'TESTS_ENVIRONMENT =\n'
-        emit += 'noinst_PROGRAMS =\n'
+        emit.append('SUBDIRS = .\n')
+        emit.append('TESTS =\n')
+        emit.append('XFAIL_TESTS =\n')
+        emit.append('TESTS_ENVIRONMENT =\n')
+        emit.append('noinst_PROGRAMS =\n')
         if not for_test:
-            emit += 'check_PROGRAMS =\n'
-        emit += 'EXTRA_PROGRAMS =\n'
-        emit += 'noinst_HEADERS =\n'
-        emit += 'noinst_LIBRARIES =\n'
+            emit.append('check_PROGRAMS =\n')
+        emit.append('EXTRA_PROGRAMS =\n')
+        emit.append('noinst_HEADERS =\n')
+        emit.append('noinst_LIBRARIES =\n')
         if libtests:
             if for_test:
-                emit += 'noinst_LIBRARIES += libtests.a\n'
+                emit.append('noinst_LIBRARIES += libtests.a\n')
             else:  # if not for_test
-                emit += 'check_LIBRARIES = libtests.a\n'
-        emit += 'pkgdata_DATA =\n'
-        emit += 'EXTRA_DIST =\n'
-        emit += 'BUILT_SOURCES =\n'
-        emit += 'SUFFIXES =\n'
-        emit += 'MOSTLYCLEANFILES = core *.stackdump\n'
-        emit += 'MOSTLYCLEANDIRS =\n'
-        emit += 'CLEANFILES =\n'
-        emit += 'DISTCLEANFILES =\n'
-        emit += 'MAINTAINERCLEANFILES =\n'
+                emit.append('check_LIBRARIES = libtests.a\n')
+        emit.append('pkgdata_DATA =\n')
+        emit.append('EXTRA_DIST =\n')
+        emit.append('BUILT_SOURCES =\n')
+        emit.append('SUFFIXES =\n')
+        emit.append('MOSTLYCLEANFILES = core *.stackdump\n')
+        emit.append('MOSTLYCLEANDIRS =\n')
+        emit.append('CLEANFILES =\n')
+        emit.append('DISTCLEANFILES =\n')
+        emit.append('MAINTAINERCLEANFILES =\n')
 
         # Execute edits that apply to the Makefile.am being generated.
         for current_edit in range(0, makefiletable.count()):
@@ -1205,10 +1254,10 @@ AC_DEFUN([%V1%_LIBSOURCES], [
                         # The added subdirectory ${val} needs to be mentioned after '.'.
                         # But we have '.' among SUBDIRS already, so do nothing.
                         pass
-                    emit += '%s += %s\n' % (dictionary['var'], val)
+                    emit.append('%s += %s\n' % (dictionary['var'], val))
                     del dictionary['var']
 
-        emit += '\n'
+        emit.append('\n')
 
         # Insert a '-Wno-error' option in the compilation commands emitted by
         # Automake, between $(AM_CPPFLAGS) and before the reference to @CFLAGS@.
@@ -1230,21 +1279,21 @@ AC_DEFUN([%V1%_LIBSOURCES], [
         if not for_test:
             # Enable or disable warnings as suitable for the Gnulib coding style.
             cflags_for_gnulib_code = ' $(GL_CFLAG_GNULIB_WARNINGS)'
-        emit += 'CFLAGS = @GL_CFLAG_ALLOW_WARNINGS@%s @CFLAGS@\n' % (cflags_for_gnulib_code)
-        emit += 'CXXFLAGS = @GL_CXXFLAG_ALLOW_WARNINGS@ @CXXFLAGS@\n'
-        emit += '\n'
+        emit.append('CFLAGS = @GL_CFLAG_ALLOW_WARNINGS@%s @CFLAGS@\n' % (cflags_for_gnulib_code))
+        emit.append('CXXFLAGS = @GL_CXXFLAG_ALLOW_WARNINGS@ @CXXFLAGS@\n')
+        emit.append('\n')
 
-        emit += 'AM_CPPFLAGS = \\\n'
+        emit.append('AM_CPPFLAGS = \\\n')
         if for_test:
-            emit += '  -DGNULIB_STRICT_CHECKING=1 \\\n'
+            emit.append('  -DGNULIB_STRICT_CHECKING=1 \\\n')
         if witness_c_macro:
-            emit += '  -D%s=1 \\\n' % witness_c_macro
+            emit.append('  -D%s=1 \\\n' % witness_c_macro)
         if witness_macro:
-            emit += '  -D@%s@=1 \\\n' % witness_macro
-        emit += '  -I. -I$(srcdir) \\\n'
-        emit += '  -I%s -I$(srcdir)/%s \\\n' % (testsbase_inverse, testsbase_inverse)
-        emit += '  -I%s/%s -I$(srcdir)/%s/%s\n' % (testsbase_inverse, sourcebase, testsbase_inverse, sourcebase)
-        emit += '\n'
+            emit.append('  -D@%s@=1 \\\n' % witness_macro)
+        emit.append('  -I. -I$(srcdir) \\\n')
+        emit.append('  -I%s -I$(srcdir)/%s \\\n' % (testsbase_inverse, testsbase_inverse))
+        emit.append('  -I%s/%s -I$(srcdir)/%s/%s\n' % (testsbase_inverse, sourcebase, testsbase_inverse, sourcebase))
+        emit.append('\n')
 
         if libtests:
             # All test programs need to be linked with libtests.a.
@@ -1256,54 +1305,54 @@ AC_DEFUN([%V1%_LIBSOURCES], [
             # voluntarily omitted).
             # The LIBTESTS_LIBDEPS can be passed to the linker once or twice, it
             # does not matter.
-            emit += ("LDADD = libtests.a %s/%s/%s.%s libtests.a %s/%s/%s.%s libtests.a $(LIBTESTS_LIBDEPS)\n"
-                     % (testsbase_inverse, sourcebase, libname, libext,
-                        testsbase_inverse, sourcebase, libname, libext))
+            emit.append("LDADD = libtests.a %s/%s/%s.%s libtests.a %s/%s/%s.%s libtests.a $(LIBTESTS_LIBDEPS)\n"
+                        % (testsbase_inverse, sourcebase, libname, libext,
+                           testsbase_inverse, sourcebase, libname, libext))
         else:
-            emit += ("LDADD = %s/%s/%s.%s\n"
-                     % (testsbase_inverse, sourcebase, libname, libext))
-        emit += '\n'
+            emit.append("LDADD = %s/%s/%s.%s\n"
+                        % (testsbase_inverse, sourcebase, libname, libext))
+        emit.append('\n')
         if libtests:
-            emit += 'libtests_a_SOURCES =\n'
+            emit.append('libtests_a_SOURCES =\n')
             # Here we use $(LIBOBJS), not @LIBOBJS@. The value is the same. However,
             # automake during its analysis looks for $(LIBOBJS), not for @LIBOBJS@.
-            emit += 'libtests_a_LIBADD = $(%stests_LIBOBJS)\n' % macro_prefix
-            emit += 'libtests_a_DEPENDENCIES = $(%stests_LIBOBJS)\n' % macro_prefix
-            emit += 'EXTRA_libtests_a_SOURCES =\n'
+            emit.append('libtests_a_LIBADD = $(%stests_LIBOBJS)\n' % macro_prefix)
+            emit.append('libtests_a_DEPENDENCIES = $(%stests_LIBOBJS)\n' % macro_prefix)
+            emit.append('EXTRA_libtests_a_SOURCES =\n')
             # The circular dependency in LDADD requires this.
-            emit += 'AM_LIBTOOLFLAGS = --preserve-dup-deps\n\n'
+            emit.append('AM_LIBTOOLFLAGS = --preserve-dup-deps\n\n')
         # Many test scripts use ${EXEEXT} or ${srcdir}.
         # EXEEXT is defined by AC_PROG_CC through autoconf.
         # srcdir is defined by autoconf and automake.
-        emit += "TESTS_ENVIRONMENT += EXEEXT='@EXEEXT@' srcdir='$(srcdir)'\n\n"
-        all_snippets = main_snippets + longrun_snippets
+        emit.append("TESTS_ENVIRONMENT += EXEEXT='@EXEEXT@' srcdir='$(srcdir)'\n\n")
+        all_snippets = ''.join(main_snippets + longrun_snippets)
         all_snippets = all_snippets.replace('$(top_srcdir)/build-aux/',
                                             '$(top_srcdir)/%s/' % auxdir)
-        emit += all_snippets
+        emit.append(all_snippets)
         # Arrange to print a message before compiling the files in this directory.
-        emit += 'all: all-notice\n'
-        emit += 'all-notice:\n'
-        emit += '\t@echo \'## ---------------------------------------------------- ##\'\n'
-        emit += '\t@echo \'## ------------------- Gnulib tests ------------------- ##\'\n'
-        emit += '\t@echo \'## You can ignore compiler warnings in this directory.  ##\'\n'
-        emit += '\t@echo \'## ---------------------------------------------------- ##\'\n'
-        emit += '\n'
+        emit.append('all: all-notice\n')
+        emit.append('all-notice:\n')
+        emit.append('\t@echo \'## ---------------------------------------------------- ##\'\n')
+        emit.append('\t@echo \'## ------------------- Gnulib tests ------------------- ##\'\n')
+        emit.append('\t@echo \'## You can ignore compiler warnings in this directory.  ##\'\n')
+        emit.append('\t@echo \'## ---------------------------------------------------- ##\'\n')
+        emit.append('\n')
         # Arrange to print a message before executing the tests in this directory.
-        emit += 'check-am: check-notice\n'
-        emit += 'check-notice:\n'
-        emit += '\t@echo \'## ---------------------------------------------------------------------- ##\'\n'
-        emit += '\t@echo \'## ---------------------------- Gnulib tests ---------------------------- ##\'\n'
-        emit += '\t@echo \'## Please report test failures in this directory to <bug-gnulib@gnu.org>. ##\'\n'
-        emit += '\t@echo \'## ---------------------------------------------------------------------- ##\'\n'
-        emit += '\n'
-        emit += '# Clean up after Solaris cc.\n'
-        emit += 'clean-local:\n'
-        emit += '\trm -rf SunWS_cache\n\n'
-        emit += 'mostlyclean-local: mostlyclean-generic\n'
-        emit += '\t@for dir in \'\' $(MOSTLYCLEANDIRS); do \\\n'
-        emit += '\t  if test -n "$$dir" && test -d $$dir; then \\\n'
-        emit += '\t    echo "rmdir $$dir"; rmdir $$dir; \\\n'
-        emit += '\t  fi; \\\n'
-        emit += '\tdone; \\\n'
-        emit += '\t:\n'
-        return emit
+        emit.append('check-am: check-notice\n')
+        emit.append('check-notice:\n')
+        emit.append('\t@echo \'## ---------------------------------------------------------------------- ##\'\n')
+        emit.append('\t@echo \'## ---------------------------- Gnulib tests ---------------------------- ##\'\n')
+        emit.append('\t@echo \'## Please report test failures in this directory to <bug-gnulib@gnu.org>. ##\'\n')
+        emit.append('\t@echo \'## ---------------------------------------------------------------------- ##\'\n')
+        emit.append('\n')
+        emit.append('# Clean up after Solaris cc.\n')
+        emit.append('clean-local:\n')
+        emit.append('\trm -rf SunWS_cache\n\n')
+        emit.append('mostlyclean-local: mostlyclean-generic\n')
+        emit.append('\t@for dir in \'\' $(MOSTLYCLEANDIRS); do \\\n')
+        emit.append('\t  if test -n "$$dir" && test -d $$dir; then \\\n')
+        emit.append('\t    echo "rmdir $$dir"; rmdir $$dir; \\\n')
+        emit.append('\t  fi; \\\n')
+        emit.append('\tdone; \\\n')
+        emit.append('\t:\n')
+        return ''.join(emit)
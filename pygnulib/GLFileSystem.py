@@ -20,13 +20,22 @@ from __future__ import annotations
 #===============================================================================
 import os
 import re
+import sys
+import copy
 import codecs
+import shutil
 import filecmp
+import weakref
+import tempfile
+import threading
 import subprocess as sp
 from enum import Enum
 from . import constants
 from .GLError import GLError
 from .GLConfig import GLConfig
+from .GLManifest import GLManifest
+from .GLPatch import apply_unified_diff
+from .GLPatchCache import get_patch_cache
 
 
 #===============================================================================
@@ -46,8 +55,11 @@ joinpath = constants.joinpath
 copyfile = constants.copyfile
 movefile = constants.movefile
 hardlink = constants.hardlink
+reflink = constants.reflink
 ensure_writable = constants.ensure_writable
 link_if_changed = constants.link_if_changed
+unified_diff = constants.unified_diff
+map_in_order = constants.map_in_order
 isdir = os.path.isdir
 isfile = os.path.isfile
 islink = os.path.islink
@@ -60,6 +72,7 @@ class CopyAction(Enum):
     Copy = 0
     Symlink = 1
     Hardlink = 2
+    Reflink = 3
 
 
 #===============================================================================
@@ -71,6 +84,15 @@ class GLFileSystem(object):
     Its main method lookup(file) is used to find file in these directories or
     combine it using Linux 'patch' utility.'''
 
+    # The directories, relative to the gnulib directory and to the local
+    # directories, whose listings are used to answer the lookups of files.
+    listed_dirs = ['modules', 'lib', 'm4', 'build-aux']
+
+    # The directory listings, one set per GLConfig instance. They are shared
+    # among all GLFileSystem instances for the same configuration, so that
+    # each directory is scanned only once.
+    registries = weakref.WeakKeyDictionary()
+
     def __init__(self, config: GLConfig) -> None:
         '''Create new GLFileSystem instance. The only argument is localpath,
         which can be an empty list.'''
@@ -78,6 +100,14 @@ class GLFileSystem(object):
             raise TypeError('config must be a GLConfig, not %s'
                             % type(config).__name__)
         self.config = config
+        # The temporary files that were combined from .diff files so far, by
+        # name, and the lock that serializes their creation when files are
+        # installed in parallel.
+        self.combined = dict()
+        self.lock = threading.Lock()
+        # The number of calls to os.stat() that the directory listings saved.
+        # It is updated under the lock as well.
+        self.stats_saved = 0
 
     def __repr__(self) -> str:
         '''x.__repr__ <==> repr(x)'''
@@ -85,10 +115,13 @@ class GLFileSystem(object):
         return result
 
     def lookup(self, name: str) -> tuple[str, bool]:
-        '''Lookup a file in gnulib and localpath directories or combine it using
-        'patch' utility. If file was found, method returns string, else it raises
+        '''Lookup a file in gnulib and localpath directories or combine it by
+        applying the .diff files found in the localpath directories. The diffs
+        are applied in-process; only diffs that need more than that are left to
+        the 'patch' utility. If file was found, method returns string, else it raises
         GLError telling that file was not found. Function also returns flag which
-        indicates whether file is a temporary file.
+        indicates whether file is a temporary file. A file is combined only once
+        per GLFileSystem instance, even when it is looked up from several threads.
         GLConfig: localpath.'''
         if type(name) is not str:
             raise TypeError('name must be a string, not %s'
@@ -101,37 +134,23 @@ class GLFileSystem(object):
         lookedupFile = None
         lookedupPatches = []
         for localdir in localpath:
-            file_in_localdir = joinpath(localdir, name)
-            if isfile(file_in_localdir):
-                lookedupFile = file_in_localdir
+            if self.isFile(localdir, name):
+                lookedupFile = joinpath(localdir, name)
                 break
-            diff_in_localdir = joinpath(localdir, '%s.diff' % name)
-            if isfile(diff_in_localdir):
-                lookedupPatches.append(diff_in_localdir)
+            if self.isFile(localdir, '%s.diff' % name):
+                lookedupPatches.append(joinpath(localdir, '%s.diff' % name))
         # Treat the gnulib dir like a lowest-priority --local-dir, except that
         # here we don't look for .diff files.
         if lookedupFile == None:
-            file_in_localdir = joinpath(DIRS['root'], name)
-            if isfile(file_in_localdir):
-                lookedupFile = file_in_localdir
+            if self.isFile(DIRS['root'], name):
+                lookedupFile = joinpath(DIRS['root'], name)
         if lookedupFile != None:
             if len(lookedupPatches) > 0:
-                # Apply the patches, from lowest-priority to highest-priority.
-                tempFile = joinpath(self.config['tempdir'], name)
-                try:  # Try to create directories
-                    os.makedirs(os.path.dirname(tempFile))
-                except OSError as error:
-                    pass  # Skip errors if directory exists
-                if isfile(tempFile):
-                    os.remove(tempFile)
-                copyfile(lookedupFile, tempFile)
-                ensure_writable(tempFile)
-                for diff_in_localdir in reversed(lookedupPatches):
-                    command = 'patch -s "%s" < "%s" >&2' % (tempFile, diff_in_localdir)
-                    try:  # Try to apply patch
-                        sp.check_call(command, shell=True)
-                    except sp.CalledProcessError as error:
-                        raise GLError(2, name)
+                with self.lock:
+                    tempFile = self.combined.get(name)
+                    if tempFile == None or not isfile(tempFile):
+                        tempFile = self._combine(name, lookedupFile, lookedupPatches)
+                        self.combined[name] = tempFile
                 result = (tempFile, True)
             else:
                 result = (lookedupFile, False)
@@ -139,11 +158,135 @@ class GLFileSystem(object):
             raise GLError(1, name)
         return result
 
+    def _combine(self, name: str, lookedupFile: str, lookedupPatches: list[str]) -> str:
+        '''Apply the .diff files lookedupPatches to lookedupFile and return the
+        name of the temporary file with the result.
+        GLConfig: tempdir, cache_patches.'''
+        # Apply the patches, from lowest-priority to highest-priority.
+        tempFile = joinpath(self.config['tempdir'], name)
+        try:  # Try to create directories
+            os.makedirs(os.path.dirname(tempFile))
+        except OSError as error:
+            pass  # Skip errors if directory exists
+        if isfile(tempFile):
+            os.remove(tempFile)
+        cache = None
+        cachedFile = None
+        if self.config['cache_patches']:
+            cache = get_patch_cache()
+            key = cache.key(lookedupFile, list(reversed(lookedupPatches)))
+            cachedFile = cache.get(key)
+        if cachedFile != None:
+            copyfile(cachedFile, tempFile)
+            ensure_writable(tempFile)
+        else:  # if cachedFile == None
+            copyfile(lookedupFile, tempFile)
+            ensure_writable(tempFile)
+            with open(lookedupFile, 'rb') as file:
+                data = file.read()
+            for diff_in_localdir in reversed(lookedupPatches):
+                with open(diff_in_localdir, 'rb') as file:
+                    diff = file.read()
+                patched = apply_unified_diff(data, diff)
+                if patched == None:
+                    # Let the 'patch' program deal with the diffs
+                    # that don't apply without fuzz.
+                    with open(tempFile, 'wb') as file:
+                        file.write(data)
+                    try:  # Try to apply patch
+                        with open(diff_in_localdir, 'rb') as file:
+                            sp.check_call(['patch', '-s', tempFile],
+                                          stdin=file, stdout=sys.stderr)
+                    except (OSError, sp.CalledProcessError) as error:
+                        raise GLError(2, name)
+                    with open(tempFile, 'rb') as file:
+                        patched = file.read()
+                data = patched
+            with open(tempFile, 'wb') as file:
+                file.write(data)
+            if cache != None:
+                cache.put(key, tempFile)
+        return tempFile
+
+    def isFile(self, directory: str, name: str) -> bool:
+        '''Check whether directory/name is a regular file or a symbolic link to
+        a regular file, like isfile(joinpath(directory, name)). If name lies in
+        one of the listed_dirs, the answer is taken from the listing of that
+        directory, which is scanned only once per configuration.
+        GLConfig: localpath.'''
+        name = os.path.normpath(name)
+        components = name.split('/')
+        if (len(components) > 1 and components[0] in GLFileSystem.listed_dirs
+                and '..' not in components):
+            directories = self._getListing(directory, components[0])
+            # Find the innermost directory of name that was scanned.
+            for count in range(len(components) - 1, 0, -1):
+                parent = '/'.join(components[:count])
+                if parent in directories:
+                    files = directories[parent]
+                    if files == None:
+                        break  # Unreadable directory or symbolic link; use stat.
+                    with self.lock:
+                        self.stats_saved += 1
+                    if count == len(components) - 1:
+                        return components[-1] in files
+                    # The next component is not a subdirectory.
+                    return False
+            else:  # if components[0] was not scanned
+                # The directory does not exist.
+                with self.lock:
+                    self.stats_saved += 1
+                return False
+        return isfile(joinpath(directory, name))
+
+    def _getListing(self, directory: str, subdir: str) -> dict[str, set[str] | None]:
+        '''Return the listing of directory/subdir and of all its subdirectories,
+        as a dictionary that maps the name of each directory, relative to
+        directory, to the set of names of the files in it. Directories that
+        could not be scanned or that are symbolic links map to None.'''
+        localpath = list(self.config['localpath'])
+        registry = GLFileSystem.registries.get(self.config)
+        if registry == None or registry['localpath'] != localpath:
+            registry = dict()
+            registry['localpath'] = localpath
+            registry['listings'] = dict()
+            GLFileSystem.registries[self.config] = registry
+        key = tuple([directory, subdir])
+        listings = registry['listings']
+        if key not in listings:
+            directories = dict()
+            self._scanDirectory(directory, subdir, directories)
+            listings[key] = directories
+        return listings[key]
+
+    def _scanDirectory(self, directory: str, subdir: str, directories: dict[str, set[str] | None]) -> None:
+        '''Add the listing of directory/subdir and of all its subdirectories to
+        the given dictionary.'''
+        files = set()
+        subdirs = list()
+        try:
+            with os.scandir(joinpath(directory, subdir)) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                    elif entry.is_symlink() and entry.is_dir():
+                        directories['%s/%s' % (subdir, entry.name)] = None
+                    elif entry.is_file():
+                        files.add(entry.name)
+        except (FileNotFoundError, NotADirectoryError):
+            return
+        except OSError:
+            directories[subdir] = None
+            return
+        directories[subdir] = files
+        for name in subdirs:
+            self._scanDirectory(directory, '%s/%s' % (subdir, name), directories)
+
     def shouldLink(self, original: str, lookedup: str) -> bool:
         '''GLFileSystem.shouldLink(original, lookedup)
 
         Determines whether the original file should be copied, symlinked,
-          or hardlinked.
+          hardlinked, or cloned through copy-on-write.
         Returns a CopyAction.'''
         copymode = self.config['copymode']
         lcopymode = self.config['lcopymode']
@@ -158,6 +301,112 @@ class GLFileSystem(object):
         return copymode
 
 
+#===============================================================================
+# Define GLEmitTarget class
+#===============================================================================
+class GLEmitTarget(object):
+    '''GLEmitTarget receives the new contents of a generated file through the
+    write method and compares them with the existing file while they arrive.
+    The temporary file is created only once the contents are known to differ;
+    the close method then moves it over the file, keeping a backup. If the
+    contents are the same, nothing is written and the file keeps its
+    modification time. In dry-run mode, nothing is written at all.'''
+
+    def __init__(self, path: str, backuppath: str, tmpfile: str, dryrun: bool) -> None:
+        '''Create GLEmitTarget instance.
+
+        path is the file that is generated, backuppath is where the old file is
+          kept if it is replaced, and tmpfile is the temporary file, in the same
+          directory as path, that receives the new contents.
+        dryrun tells whether the contents are only compared.'''
+        self.path = path
+        self.backuppath = backuppath
+        self.tmpfile = tmpfile
+        self.dryrun = dryrun
+        self.exists = isfile(path)
+        self.existing = None
+        if self.exists:
+            try:  # Try to read the file while the contents arrive
+                self.existing = open(path, 'rb')
+            except OSError:
+                pass
+        self.matched = 0
+        self.changed = self.existing == None
+        self.file = None
+        if self.changed:
+            self._diverge()
+
+    def __repr__(self) -> str:
+        '''x.__repr__() <==> repr(x)'''
+        result = '<pygnulib.GLEmitTarget %s>' % hex(id(self))
+        return result
+
+    def __enter__(self) -> GLEmitTarget:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type != None:
+            self.discard()
+
+    def _diverge(self) -> None:
+        '''Note that the contents differ from the existing file. Unless in
+        dry-run mode, create the temporary file, starting with the part of the
+        contents that matched.'''
+        self.changed = True
+        if not self.dryrun:
+            self.file = open(self.tmpfile, 'wb')
+            if self.matched:
+                self.existing.seek(0)
+                self.file.write(self.existing.read(self.matched))
+        if self.existing != None:
+            self.existing.close()
+            self.existing = None
+
+    def write(self, data: str | bytes) -> None:
+        '''Append data to the contents of the file.'''
+        if type(data) is str:
+            data = data.encode('utf-8')
+        if not self.changed:
+            if self.existing.read(len(data)) == data:
+                self.matched += len(data)
+                return
+            self._diverge()
+        if self.file != None:
+            self.file.write(data)
+
+    def close(self) -> int:
+        '''Finish the contents of the file. Return 0 if they are the same as
+        those of the existing file, 1 if the file was updated, and 2 if the
+        file was created.'''
+        if not self.changed:
+            if self.existing.read(1) == b'':
+                self.existing.close()
+                self.existing = None
+                return 0
+            self._diverge()
+        if self.file != None:
+            self.file.close()
+            self.file = None
+            if self.exists:
+                if isfile(self.backuppath):
+                    os.remove(self.backuppath)
+                movefile(self.path, self.backuppath)
+            movefile(self.tmpfile, self.path)
+        if self.exists:
+            return 1
+        return 2
+
+    def discard(self) -> None:
+        '''Abandon the contents, leaving the existing file as it is.'''
+        if self.existing != None:
+            self.existing.close()
+            self.existing = None
+        if self.file != None:
+            self.file.close()
+            self.file = None
+            os.remove(self.tmpfile)
+
+
 #===============================================================================
 # Define GLFileAssistant class
 #===============================================================================
@@ -188,6 +437,8 @@ class GLFileAssistant(object):
         self.original = None
         self.rewritten = None
         self.added = list()
+        self.messages = None
+        self.manifest = None
         self.config = config
         self.transformers = transformers
         self.filesystem = GLFileSystem(self.config)
@@ -198,7 +449,8 @@ class GLFileAssistant(object):
         return result
 
     def tmpfilename(self, path: str) -> str:
-        '''Return the name of a temporary file (file is relative to destdir).'''
+        '''Return the name of a temporary file (file is relative to destdir).
+        Unless in dry-run mode, the directory of the file is known to exist.'''
         if type(path) is not str:
             raise TypeError('path must be a string, not %s'
                             % (type(path).__name__))
@@ -206,9 +458,6 @@ class GLFileAssistant(object):
             # Put the new contents of $file in a file in the same directory (needed
             # to guarantee that an 'mv' to "$destdir/$file" works).
             result = joinpath(self.config['destdir'], '%s.tmp' % path)
-            dirname = os.path.dirname(result)
-            if dirname and not isdir(dirname):
-                os.makedirs(dirname)
         else:  # if self.config['dryrun']
             # Put the new contents of $file in a file in a temporary directory
             # (because the directory of "$file" might not exist).
@@ -233,6 +482,14 @@ class GLFileAssistant(object):
                             % type(rewritten).__name__)
         self.rewritten = rewritten
 
+    def setManifest(self, manifest: GLManifest | None) -> None:
+        '''Set the manifest of the files installed by the last run, which is
+        used to skip the files that did not change, or None.'''
+        if type(manifest) is not GLManifest and manifest != None:
+            raise TypeError('manifest must be a GLManifest or None, not %s'
+                            % type(manifest).__name__)
+        self.manifest = manifest
+
     def addFile(self, file: str) -> None:
         '''Add file to the list of added files.'''
         if file not in self.added:
@@ -247,10 +504,55 @@ class GLFileAssistant(object):
         '''Return list of the added files.'''
         return list(self.added)
 
+    def _print(self, message: str) -> None:
+        '''Print the message, or keep it for later if the file is handled in a
+        pool of threads.'''
+        if self.messages != None:
+            self.messages.append(message)
+        else:  # if self.messages == None
+            print(message)
+
+    def printDiff(self, rewritten: str, data: str | bytes | None) -> None:
+        '''With --dry-run=diff, print the unified diff that changes the file
+        rewritten in the destination directory into the contents data, where
+        None stands for a removed file. Nothing is written.
+        GLConfig: destdir, dryrun_diff.'''
+        if not self.config['dryrun_diff']:
+            return
+        if type(data) is str:
+            data = data.encode('utf-8')
+        try:
+            with open(joinpath(self.config['destdir'], rewritten), 'rb') as file:
+                old = file.read()
+        except OSError:
+            old = None
+        diff = unified_diff(rewritten, old, data)
+        if diff:
+            self._print(diff.rstrip('\n'))
+
     def add(self, lookedup: str, tmpflag: bool, tmpfile: str) -> None:
         '''This method copies a file from gnulib into the destination directory.
         The destination is known to exist. If tmpflag is True, then lookedup file
         is a temporary one.'''
+        with open(tmpfile, 'rb') as file:
+            data = file.read()
+        self._add(lookedup, tmpflag, data)
+
+    def update(self, lookedup: str, tmpflag: bool, tmpfile: str, already_present: bool) -> None:
+        '''This method copies a file from gnulib into the destination directory.
+        The destination is known to exist. If tmpflag is True, then lookedup file
+        is a temporary one.'''
+        with open(tmpfile, 'rb') as file:
+            data = file.read()
+        self._update(lookedup, tmpflag, data, already_present)
+
+    def _add(self, lookedup: str, tmpflag: bool, data: bytes, staged: str | None = None,
+             unmodified: bool | None = None) -> None:
+        '''Install the contents data of the rewritten file in the destination
+        directory, where it does not exist yet. If tmpflag is True, then lookedup
+        file is a temporary one. staged is the temporary file returned by
+        _stage for these contents, if any. unmodified tells whether data are
+        the contents of lookedup, if that is known.'''
         original = self.original
         rewritten = self.rewritten
         destdir = self.config['destdir']
@@ -259,26 +561,21 @@ class GLFileAssistant(object):
         if rewritten == None:
             raise TypeError('rewritten must be set before applying the method')
         if not self.config['dryrun']:
-            print('Copying file %s' % rewritten)
-            if self.filesystem.shouldLink(original, lookedup) == CopyAction.Symlink \
-                    and not tmpflag and filecmp.cmp(lookedup, tmpfile):
-                link_if_changed(lookedup, joinpath(destdir, rewritten))
-            else:  # if any of these conditions is not met
-                if self.filesystem.shouldLink(original, lookedup) == CopyAction.Hardlink \
-                   and not tmpflag and filecmp.cmp(lookedup, tmpfile):
-                    hardlink(lookedup, joinpath(destdir, rewritten))
-                else:  # Move instead of linking.
-                    try:  # Try to move file
-                        movefile(tmpfile, joinpath(destdir, rewritten))
-                    except Exception as error:
-                        raise GLError(17, original)
+            self._print('Copying file %s' % rewritten)
+            self._install(lookedup, tmpflag, data, joinpath(destdir, rewritten), staged, unmodified)
         else:  # if self.config['dryrun']
-            print('Copy file %s' % rewritten)
+            self._print('Copy file %s' % rewritten)
+            self.printDiff(rewritten, data)
 
-    def update(self, lookedup: str, tmpflag: bool, tmpfile: str, already_present: bool) -> None:
-        '''This method copies a file from gnulib into the destination directory.
-        The destination is known to exist. If tmpflag is True, then lookedup file
-        is a temporary one.'''
+    def _update(self, lookedup: str, tmpflag: bool, data: bytes, already_present: bool,
+                staged: str | None = None, changed: bool | None = None,
+                unmodified: bool | None = None) -> None:
+        '''Replace the rewritten file in the destination directory with the
+        contents data, if they differ, keeping a backup of the old file. If
+        tmpflag is True, then lookedup file is a temporary one. staged is the
+        temporary file returned by _stage for these contents, if any. changed
+        tells whether data differ from the rewritten file, and unmodified
+        whether data are the contents of lookedup, if that is known.'''
         original = self.original
         rewritten = self.rewritten
         destdir = self.config['destdir']
@@ -296,43 +593,145 @@ class GLFileAssistant(object):
         backupname = '%s~' % basename
         basepath = joinpath(destdir, basename)
         backuppath = joinpath(destdir, backupname)
-        if not filecmp.cmp(basepath, tmpfile):
+        if changed == None:
+            changed = not self._hasContents(basepath, data)
+        if changed:
             if not self.config['dryrun']:
                 if already_present:
-                    print('Updating file %s (backup in %s)' % (basename, backupname))
+                    self._print('Updating file %s (backup in %s)' % (basename, backupname))
                 else:  # if not already_present
                     message = 'Replacing file '
                     message += '%s (non-gnulib code backed up in ' % basename
                     message += '%s) !!' % backupname
-                    print(message)
+                    self._print(message)
                 if isfile(backuppath):
                     os.remove(backuppath)
                 try:  # Try to replace the given file
                     movefile(basepath, backuppath)
                 except Exception as error:
                     raise GLError(17, original)
-                if self.filesystem.shouldLink(original, lookedup) == CopyAction.Symlink \
-                        and not tmpflag and filecmp.cmp(lookedup, tmpfile):
-                    link_if_changed(lookedup, basepath)
-                else:  # if any of these conditions is not met
-                    if self.filesystem.shouldLink(original, lookedup) == CopyAction.Hardlink \
-                       and not tmpflag and filecmp.cmp(lookedup, tmpfile):
-                        hardlink(lookedup, basepath)
-                    else:  # Move instead of linking.
-                        try:  # Try to move file
-                            if os.path.exists(basepath):
-                                os.remove(basepath)
-                            copyfile(tmpfile, joinpath(destdir, rewritten))
-                        except Exception as error:
-                            raise GLError(17, original)
+                self._install(lookedup, tmpflag, data, basepath, staged, unmodified)
             else:  # if self.config['dryrun']
                 if already_present:
-                    print('Update file %s (backup in %s)' % (rewritten, backupname))
+                    self._print('Update file %s (backup in %s)' % (rewritten, backupname))
                 else:  # if not already_present
-                    print('Replace file %s (backup in %s)' % (rewritten, backupname))
+                    self._print('Replace file %s (backup in %s)' % (rewritten, backupname))
+                self.printDiff(rewritten, data)
+        elif staged != None:
+            os.remove(staged)
+
+    def _install(self, lookedup: str, tmpflag: bool, data: bytes, path: str,
+                 staged: str | None = None, unmodified: bool | None = None) -> None:
+        '''Create the file at path with the contents data. If the contents are
+        those of lookedup, a symbolic or hard link or a copy-on-write clone is
+        created instead when the configuration asks for it. Otherwise the data
+        is written to a temporary file in the same directory, which is then
+        renamed to path. If staged is not None, it is that temporary file,
+        already written by _stage. unmodified tells whether data are the
+        contents of lookedup; if it is None, lookedup is read to find out.'''
+        original = self.original
+        if staged != None:
+            try:  # Try to rename the temporary file
+                os.replace(staged, path)
+            except Exception as error:
+                os.remove(staged)
+                raise GLError(17, original)
+            return
+        action = self.filesystem.shouldLink(original, lookedup)
+        if action == CopyAction.Copy:
+            # Only a link or a clone needs to know whether the contents are
+            # those of lookedup.
+            unmodified = False
+        elif unmodified == None:
+            unmodified = not tmpflag and self._hasContents(lookedup, data)
+        if action in [CopyAction.Symlink, CopyAction.Hardlink] and unmodified:
+            if action == CopyAction.Symlink:
+                link_if_changed(lookedup, path)
+            else:  # if action == CopyAction.Hardlink
+                hardlink(lookedup, path)
+        else:  # Write the file instead of linking.
+            try:  # Try to write the file
+                self._writeFile(path, data, lookedup,
+                                action == CopyAction.Reflink and unmodified)
+            except Exception as error:
+                raise GLError(17, original)
+
+    def _stage(self, lookedup: str, data: bytes, path: str, unmodified: bool) -> str | None:
+        '''Write the temporary file that _install would rename to path, and
+        return its name; or return None if _install would create a link
+        instead. unmodified tells whether data are the contents of lookedup.'''
+        original = self.original
+        action = self.filesystem.shouldLink(original, lookedup)
+        unmodified = action != CopyAction.Copy and unmodified
+        if action in [CopyAction.Symlink, CopyAction.Hardlink] and unmodified:
+            return None
+        try:  # Try to write the file
+            return self._stageFile(path, data, lookedup,
+                                   action == CopyAction.Reflink and unmodified)
+        except Exception as error:
+            raise GLError(17, original)
+
+    def _hasContents(self, path: str, data: bytes) -> bool:
+        '''Check whether the file at path has the contents data.'''
+        try:
+            if os.path.getsize(path) != len(data):
+                return False
+            with open(path, 'rb') as file:
+                return file.read() == data
+        except OSError:
+            return False
+
+    def _writeFile(self, path: str, data: bytes, template: str, clone: bool = False) -> None:
+        '''Atomically replace the file at path with the contents data. The file
+        gets the permissions of the file template, and is writable. If clone is
+        True, the contents of template are data, and the file is made a
+        copy-on-write clone of template where the file system supports it.
+        The directory of path is known to exist.'''
+        tmpfile = self._stageFile(path, data, template, clone)
+        try:
+            os.replace(tmpfile, path)
+        except BaseException:
+            os.remove(tmpfile)
+            raise
+
+    def _stageFile(self, path: str, data: bytes, template: str, clone: bool = False) -> str:
+        '''Write the file that _writeFile renames to path, in the directory of
+        path, and return its name.'''
+        dirname = os.path.dirname(path)
+        fd, tmpfile = tempfile.mkstemp(dir=dirname or '.',
+                                       prefix='.%s.' % os.path.basename(path),
+                                       suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                if not clone:
+                    file.write(data)
+            if clone:
+                reflink(template, tmpfile)
+            else:  # if not clone
+                try:
+                    shutil.copymode(template, tmpfile)
+                except PermissionError:
+                    pass
+            ensure_writable(tmpfile)
+        except BaseException:
+            os.remove(tmpfile)
+            raise
+        return tmpfile
 
     def add_or_update(self, already_present: bool) -> None:
-        '''This method handles a file that ought to be present afterwards.'''
+        '''This method handles a file that ought to be present afterwards.
+        The file is read once and transformed in memory; the destination is
+        written only if its contents differ. If a manifest is set, files that
+        did not change since the last run are skipped without reading them.'''
+        plan = self._prepare(already_present)
+        if plan != None:
+            self._apply(plan, already_present)
+
+    def _prepare(self, already_present: bool) -> dict[str, object] | None:
+        '''Do the part of add_or_update that leaves the destination directory
+        alone: look up, read and transform the file, and compare the result
+        with the installed file. Return what _apply needs, or None if the
+        manifest shows that there is nothing to do.'''
         original = self.original
         rewritten = self.rewritten
         if original == None:
@@ -346,19 +745,13 @@ class GLFileAssistant(object):
         if original.startswith('tests=lib/'):
             xoriginal = substart('tests=lib/', 'lib/', original)
         lookedup, tmpflag = self.filesystem.lookup(xoriginal)
-        tmpfile = self.tmpfilename(rewritten)
         sed_transform_lib_file = self.transformers.get('lib')
         sed_transform_build_aux_file = self.transformers.get('aux')
         sed_transform_main_lib_file = self.transformers.get('main')
         sed_transform_testsrelated_lib_file = self.transformers.get('tests')
-        try:  # Try to copy lookedup file to tmpfile
-            copyfile(lookedup, tmpfile)
-            ensure_writable(tmpfile)
-        except Exception as error:
-            raise GLError(15, lookedup)
+        transformer = None
         # Don't process binary files with sed.
         if not (original.endswith(".class") or original.endswith(".mo")):
-            transformer = None
             if original.startswith('lib/'):
                 if sed_transform_main_lib_file:
                     transformer = sed_transform_main_lib_file
@@ -368,25 +761,146 @@ class GLFileAssistant(object):
             elif original.startswith('tests=lib/'):
                 if sed_transform_testsrelated_lib_file:
                     transformer = sed_transform_testsrelated_lib_file
-            if transformer != None:
-                # Read the file that we looked up.
-                with open(lookedup, 'r', newline='\n', encoding='utf-8') as file:
-                    src_data = file.read()
-                # Write the transformed data to the temporary file.
-                with open(tmpfile, 'w', newline='\n', encoding='utf-8') as file:
-                    file.write(re.sub(transformer[0], transformer[1], src_data))
         path = joinpath(self.config['destdir'], rewritten)
-        if isfile(path):
+        manifest = self.manifest
+        if tmpflag:
+            # The lookedup file is recreated in every run.
+            manifest = None
+        transform = None
+        if manifest != None:
+            transform = GLManifest.transformKey(transformer)
+            if manifest.isUnchanged(rewritten, lookedup, transform, path):
+                # Neither the lookedup file nor the installed file changed.
+                return None
+        try:  # Try to read the lookedup file
+            with open(lookedup, 'rb') as file:
+                source_data = file.read()
+        except Exception as error:
+            raise GLError(15, lookedup)
+        data = source_data
+        if transformer != None:
+            src_data = data.decode('utf-8')
+            data = re.sub(transformer[0], transformer[1], src_data).encode('utf-8')
+        exists = isfile(path)
+        changed = True
+        if exists:
+            if manifest != None and manifest.hasContents(rewritten, path, data):
+                changed = False
+            else:  # if manifest == None or not manifest.hasContents(rewritten, path, data)
+                changed = not self._hasContents(path, data)
+        plan = dict()
+        plan['lookedup'] = lookedup
+        plan['tmpflag'] = tmpflag
+        plan['path'] = path
+        plan['source_data'] = source_data
+        plan['data'] = data
+        plan['manifest'] = manifest
+        plan['transform'] = transform
+        plan['exists'] = exists
+        plan['changed'] = changed
+        # Whether data are the contents of lookedup, which can then be linked.
+        plan['unmodified'] = not tmpflag and data == source_data
+        plan['staged'] = None
+        return plan
+
+    def _apply(self, plan: dict[str, object], already_present: bool) -> None:
+        '''Do the part of add_or_update that modifies the destination
+        directory, for the result of _prepare.'''
+        rewritten = self.rewritten
+        lookedup = plan['lookedup']
+        tmpflag = plan['tmpflag']
+        data = plan['data']
+        if plan['exists']:
             # The file already exists.
-            self.update(lookedup, tmpflag, tmpfile, already_present)
-        else:  # if not isfile(path)
+            if plan['changed']:
+                self._update(lookedup, tmpflag, data, already_present, plan['staged'],
+                             True, plan['unmodified'])
+        else:  # if not plan['exists']
             # Install the file.
             # Don't protest if the file should be there but isn't: it happens
             # frequently that developers don't put autogenerated files under version control.
-            self.add(lookedup, tmpflag, tmpfile)
+            self._add(lookedup, tmpflag, data, plan['staged'], plan['unmodified'])
             self.addFile(rewritten)
-        if isfile(tmpfile):
-            os.remove(tmpfile)
+        manifest = plan['manifest']
+        if manifest != None and not self.config['dryrun']:
+            manifest.record(rewritten, lookedup, plan['source_data'], plan['transform'],
+                            plan['path'], data)
+
+    def _discard(self, plan: dict[str, object] | None) -> None:
+        '''Remove the temporary file of a result of _prepare that is not
+        applied.'''
+        if plan != None and plan['staged'] != None and isfile(plan['staged']):
+            os.remove(plan['staged'])
+
+    def add_or_update_files(self, pairs: list[tuple[str, str]], already_present: bool) -> None:
+        '''Handle the files given as (rewritten, original) pairs, like
+        add_or_update. If more than one job is requested, the files are read,
+        transformed, compared and written to temporary files in a pool of
+        threads, but the destination directory is modified in the order of
+        pairs: the messages, the files that are installed and the error that
+        stops the loop are the same as with a single job.
+        GLConfig: jobs, dryrun.'''
+        jobs = self.config['jobs']
+        if jobs <= 1 or len(pairs) <= 1:
+            for pair in pairs:
+                self.setOriginal(pair[1])
+                self.setRewritten(pair[0])
+                self.add_or_update(already_present)
+        else:  # if jobs > 1
+            results = map_in_order(lambda pair: self._prepare_pair(pair, already_present),
+                                   pairs, jobs, lambda result: result[0]._discard(result[1]))
+            try:
+                for assistant, plan in results:
+                    for message in assistant.messages:
+                        print(message)
+                    if plan != None:
+                        self.setOriginal(assistant.original)
+                        self.setRewritten(assistant.rewritten)
+                        try:  # Try to modify the destination directory
+                            self._apply(plan, already_present)
+                        except BaseException:
+                            self._discard(plan)
+                            raise
+            finally:
+                results.close()
+
+    def _prepare_pair(self, pair: tuple[str, str], already_present: bool) -> tuple[GLFileAssistant, dict[str, object] | None]:
+        '''Prepare one (rewritten, original) pair with a copy of this assistant,
+        which keeps the messages for the caller, and write the temporary file
+        that _apply will rename. Return the copy together with the result of
+        _prepare.'''
+        assistant = copy.copy(self)
+        assistant.added = list()
+        assistant.messages = list()
+        assistant.setOriginal(pair[1])
+        assistant.setRewritten(pair[0])
+        plan = assistant._prepare(already_present)
+        if plan != None and plan['changed'] and not self.config['dryrun']:
+            plan['staged'] = assistant._stage(plan['lookedup'], plan['data'],
+                                              plan['path'], plan['unmodified'])
+        return tuple([assistant, plan])
+
+    def super_update_data(self, basename: str, data: str | bytes) -> tuple[str, str, int]:
+        '''Like super_update, with the new contents of destdir/basename given
+        as data. The data are compared with the file while they are written,
+        and a temporary file is only created if they differ. In dry-run mode,
+        nothing is written.'''
+        backupname = '%s~' % basename
+        with self.emitTarget(basename) as target:
+            target.write(data)
+            result_flag = target.close()
+        result = tuple([basename, backupname, result_flag])
+        return result
+
+    def emitTarget(self, basename: str) -> GLEmitTarget:
+        '''Return a GLEmitTarget for the generated file destdir/basename, with
+        the backup destdir/basename~.
+        GLConfig: destdir, dryrun.'''
+        destdir = self.config['destdir']
+        return GLEmitTarget(joinpath(destdir, basename),
+                            joinpath(destdir, '%s~' % basename),
+                            joinpath(destdir, '%s.tmp' % basename),
+                            self.config['dryrun'])
 
     def super_update(self, basename: str, tmpfile: str) -> tuple[str, str, int]:
         '''Move tmpfile to destdir/basename path, making a backup of it.
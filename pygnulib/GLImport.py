@@ -21,6 +21,7 @@ from __future__ import annotations
 import os
 import re
 import codecs
+import hashlib
 import subprocess as sp
 from . import constants
 from .GLError import GLError
@@ -29,6 +30,7 @@ from .GLModuleSystem import GLModuleTable
 from .GLModuleSystem import GLModuleSystem
 from .GLFileSystem import GLFileSystem
 from .GLFileSystem import GLFileAssistant
+from .GLManifest import GLManifest
 from .GLMakefileTable import GLMakefileTable
 from .GLEmiter import GLEmiter
 
@@ -504,6 +506,102 @@ class GLImport(object):
             else:
                 return constants.relconcat(destdir, dir)
 
+    def _checkout_state(self) -> list[str]:
+        '''Return lines that describe the state of the gnulib checkout: the
+        commit of HEAD and the size and modification time of the git index,
+        or, if gnulib is not a git checkout, the sizes and modification times
+        of the gnulib-tool sources and of the modules/ directory.'''
+        gitdir = joinpath(DIRS['root'], '.git')
+        try:
+            if isfile(gitdir):
+                # A worktree: .git contains 'gitdir: <path>'.
+                with open(gitdir, 'r', encoding='utf-8') as file:
+                    gitdir = joinpath(DIRS['root'], file.read().strip()[len('gitdir: '):])
+            commondir = gitdir
+            if isfile(joinpath(gitdir, 'commondir')):
+                with open(joinpath(gitdir, 'commondir'), 'r', encoding='utf-8') as file:
+                    commondir = joinpath(gitdir, file.read().strip())
+            with open(joinpath(gitdir, 'HEAD'), 'r', encoding='utf-8') as file:
+                head = file.read().strip()
+            if head.startswith('ref: '):
+                ref = head[len('ref: '):]
+                head = None
+                for directory in [gitdir, commondir]:
+                    if isfile(joinpath(directory, ref)):
+                        with open(joinpath(directory, ref), 'r', encoding='utf-8') as file:
+                            head = file.read().strip()
+                        break
+                if head == None:
+                    with open(joinpath(commondir, 'packed-refs'), 'r', encoding='utf-8') as file:
+                        for line in file:
+                            if line.rstrip('\n').endswith(' %s' % ref):
+                                head = line.split()[0]
+                                break
+                if head == None:
+                    raise OSError(ref)
+            return ['HEAD=%s' % head,
+                    'index=%r' % GLManifest.statKey(joinpath(gitdir, 'index'))]
+        except OSError:
+            pass
+        # Not a git checkout.
+        directory = os.path.dirname(os.path.abspath(__file__))
+        result = [ '%s=%r' % (name, GLManifest.statKey(joinpath(directory, name)))
+                   for name in sorted(os.listdir(directory))
+                   if name.endswith('.py') ]
+        result += ['modules=%r' % GLManifest.statKey(DIRS['modules'])]
+        return result
+
+    def fingerprint(self) -> str:
+        '''Return the fingerprint of the inputs of this import that the manifest
+        does not record file by file: the settings, after merging them with
+        gnulib-cache.m4, the state of the gnulib checkout, the contents of the
+        local directories and the relevant parts of configure.ac.
+        GLConfig: localpath, configure_ac, gnu_make.'''
+        lines = list()
+        # The settings. The settings that do not affect the result of the
+        # import are left out.
+        ignored = ['tempdir', 'files', 'libtests', 'verbosity', 'dryrun', 'dryrun_diff', 'errors',
+                   'cache_modules', 'cache_patches', 'cache_subst', 'cache_manifest',
+                   'explain', 'jobs']
+        for key in sorted(self.config.keys()):
+            if key not in ignored:
+                lines += ['%s=%r' % (key, self.config[key])]
+        # The state of the gnulib checkout.
+        lines += self._checkout_state()
+        # The contents of the local directories.
+        for localdir in self.config['localpath']:
+            lines += ['localdir=%s' % os.path.abspath(localdir)]
+            for root, dirs, files in os.walk(localdir):
+                dirs.sort()
+                for name in sorted(files):
+                    path = joinpath(root, name)
+                    lines += ['%s=%r' % (path, GLManifest.statKey(path))]
+        # The values of AC_CONFIG_AUX_DIR and AC_PREREQ are among the settings
+        # above. With --gnu-make, lib_Makefile_am traces configure.ac.
+        if self.config['gnu_make']:
+            with open(self.config['configure_ac'], 'rb') as file:
+                lines += ['configure_ac=%s' % hashlib.sha256(file.read()).hexdigest()]
+        data = '\n'.join(lines).encode('utf-8', 'surrogateescape')
+        return hashlib.sha256(data).hexdigest()
+
+    def check_up_to_date(self) -> bool:
+        '''Return True and report it if this is an --update and neither its
+        inputs nor its outputs changed since the last successful run, so that
+        there is nothing to do. An --update that fetches PO files or explains
+        why modules are included is never skipped.
+        GLConfig: destdir, m4base, pobase, explain, cache_manifest.'''
+        if (self.mode != MODES['update'] or not self.config['cache_manifest']
+                or self.config['pobase'] or self.config['explain']):
+            return False
+        destdir = self.config['destdir']
+        m4base = self.config['m4base']
+        manifest = GLManifest(GLManifest.filename(destdir, m4base))
+        if not manifest.isUpToDate(self.fingerprint(), destdir):
+            return False
+        print('%s is up to date.' % joinpath(destdir, m4base, 'gnulib-cache.m4'))
+        sp.call(['rm', '-rf', self.config['tempdir']], shell=False)
+        return True
+
     def gnulib_cache(self) -> str:
         '''Emit the contents of generated $m4base/gnulib-cache.m4 file.
         GLConfig: destdir, localpath, tests, sourcebase, m4base, pobase, docbase,
@@ -604,7 +702,7 @@ class GLImport(object):
             raise TypeError(f'filetable should be a dict, not {type(filetable).__name__}')
         if type(gentests) is not bool:
             raise TypeError(f'gentests should be a bool, not {type(gentests).__name__}')
-        emit = ''
+        emit = []
         assistant = self.assistant
         moduletable = self.moduletable
         destdir = self.config['destdir']
@@ -628,9 +726,9 @@ class GLImport(object):
         libtests = self.config['libtests']
         modules = [ str(module)
                     for module in moduletable['base'] ]
-        emit += '# DO NOT EDIT! GENERATED AUTOMATICALLY!\n'
-        emit += self.emitter.copyright_notice()
-        emit += '''#
+        emit.append('# DO NOT EDIT! GENERATED AUTOMATICALLY!\n')
+        emit.append(self.emitter.copyright_notice())
+        emit.append('''#
 # This file represents the compiled summary of the specification in
 # gnulib-cache.m4. It lists the computed macro invocations that need
 # to be invoked from configure.ac.
@@ -646,22 +744,22 @@ AC_DEFUN([%s_EARLY],
   m4_pattern_forbid([^gl_[A-Z]])dnl the gnulib macro namespace
   m4_pattern_allow([^gl_ES$])dnl a valid locale name
   m4_pattern_allow([^gl_LIBOBJS$])dnl a variable
-  m4_pattern_allow([^gl_LTLIBOBJS$])dnl a variable\n''' % (configure_ac, macro_prefix)
-        emit += self.emitter.preEarlyMacros(True, '  ', moduletable['final'])
+  m4_pattern_allow([^gl_LTLIBOBJS$])dnl a variable\n''' % (configure_ac, macro_prefix))
+        emit.append(self.emitter.preEarlyMacros(True, '  ', moduletable['final']))
         for module in moduletable['final']:
-            emit += '  # Code from module %s:\n' % str(module)
+            emit.append('  # Code from module %s:\n' % str(module))
             snippet = module.getAutoconfEarlySnippet()
             lines = [ line
                       for line in snippet.split(constants.NL)
                       if line != '' ]
             if lines:
-                emit += '  %s\n' % '\n  '.join(lines)
-        emit += '])\n'
-        emit += '''
+                emit.append('  %s\n' % '\n  '.join(lines))
+        emit.append('])\n')
+        emit.append('''
 # This macro should be invoked from %s, in the section
 # "Check for header files, types and library functions".
 AC_DEFUN([%s_INIT],
-[\n''' % (configure_ac, macro_prefix)
+[\n''' % (configure_ac, macro_prefix))
 
         # This AC_CONFIG_LIBOBJ_DIR invocation silences an error from the automake
         # front end:
@@ -672,77 +770,77 @@ AC_DEFUN([%s_INIT],
         # does not help to avoid this error.
         newfile_set = {x[1] for x in filetable['new']}
         if 'lib/alloca.c' in newfile_set:
-            emit += '  AC_CONFIG_LIBOBJ_DIR([%s])\n' % sourcebase
+            emit.append('  AC_CONFIG_LIBOBJ_DIR([%s])\n' % sourcebase)
         elif 'tests=lib/alloca.c' in newfile_set:
             # alloca.c will be present in $testsbase.
-            emit += '  AC_CONFIG_LIBOBJ_DIR([%s])\n' % testsbase
+            emit.append('  AC_CONFIG_LIBOBJ_DIR([%s])\n' % testsbase)
 
         if libtool:
-            emit += '  AM_CONDITIONAL([GL_COND_LIBTOOL], [true])\n'
-            emit += '  gl_cond_libtool=true\n'
+            emit.append('  AM_CONDITIONAL([GL_COND_LIBTOOL], [true])\n')
+            emit.append('  gl_cond_libtool=true\n')
         else:  # if not libtool
-            emit += '  AM_CONDITIONAL([GL_COND_LIBTOOL], [false])\n'
-            emit += '  gl_cond_libtool=false\n'
-            emit += '  gl_libdeps=\n'
-            emit += '  gl_ltlibdeps=\n'
+            emit.append('  AM_CONDITIONAL([GL_COND_LIBTOOL], [false])\n')
+            emit.append('  gl_cond_libtool=false\n')
+            emit.append('  gl_libdeps=\n')
+            emit.append('  gl_ltlibdeps=\n')
         replace_auxdir = False
         if auxdir != 'build-aux':
             replace_auxdir = True
-        emit += '  gl_m4_base=\'%s\'\n' % m4base
-        emit += self.emitter.initmacro_start(macro_prefix, False)
-        emit += self.emitter.shellvars_init(False, sourcebase)
+        emit.append('  gl_m4_base=\'%s\'\n' % m4base)
+        emit.append(self.emitter.initmacro_start(macro_prefix, False))
+        emit.append(self.emitter.shellvars_init(False, sourcebase))
         if witness_c_macro:
-            emit += '  m4_pushdef([gl_MODULE_INDICATOR_CONDITION], [%s])\n' % witness_c_macro
+            emit.append('  m4_pushdef([gl_MODULE_INDICATOR_CONDITION], [%s])\n' % witness_c_macro)
         # Emit main autoconf snippets.
-        emit += self.emitter.autoconfSnippets(moduletable['main'], moduletable['main'],
-                                              moduletable, 0, True, False, True, replace_auxdir)
+        emit.append(self.emitter.autoconfSnippets(moduletable['main'], moduletable['main'],
+                                                  moduletable, 0, True, False, True, replace_auxdir))
         if witness_c_macro:
-            emit += '  m4_popdef([gl_MODULE_INDICATOR_CONDITION])\n'
-        emit += '  # End of code from modules\n'
-        emit += self.emitter.initmacro_end(macro_prefix, False)
-        emit += '  gltests_libdeps=\n'
-        emit += '  gltests_ltlibdeps=\n'
-        emit += self.emitter.initmacro_start('%stests' % macro_prefix, gentests)
-        emit += self.emitter.shellvars_init(True, testsbase)
+            emit.append('  m4_popdef([gl_MODULE_INDICATOR_CONDITION])\n')
+        emit.append('  # End of code from modules\n')
+        emit.append(self.emitter.initmacro_end(macro_prefix, False))
+        emit.append('  gltests_libdeps=\n')
+        emit.append('  gltests_ltlibdeps=\n')
+        emit.append(self.emitter.initmacro_start('%stests' % macro_prefix, gentests))
+        emit.append(self.emitter.shellvars_init(True, testsbase))
         # Define a tests witness macro that depends on the package.
         # PACKAGE is defined by AM_INIT_AUTOMAKE, PACKAGE_TARNAME is defined by
         # AC_INIT.
         # See <https://lists.gnu.org/r/automake/2009-05/msg00145.html>.
-        emit += 'changequote(,)dnl\n'
-        emit += '  %stests_WITNESS=' % macro_prefix
-        emit += 'IN_`echo "${PACKAGE-$PACKAGE_TARNAME}" | LC_ALL=C tr abcdefghijklmnopqrstuvwxyz ABCDEFGHIJKLMNOPQRSTUVWXYZ | LC_ALL=C sed -e \'s/[^A-Z0-9_]/_/g\'`_GNULIB_TESTS\n'
-        emit += 'changequote([, ])dnl\n'
-        emit += '  AC_SUBST([%stests_WITNESS])\n' % macro_prefix
-        emit += '  gl_module_indicator_condition=$%stests_WITNESS\n' % macro_prefix
-        emit += '  m4_pushdef([gl_MODULE_INDICATOR_CONDITION], '
-        emit += '[$gl_module_indicator_condition])\n'
+        emit.append('changequote(,)dnl\n')
+        emit.append('  %stests_WITNESS=' % macro_prefix)
+        emit.append('IN_`echo "${PACKAGE-$PACKAGE_TARNAME}" | LC_ALL=C tr abcdefghijklmnopqrstuvwxyz ABCDEFGHIJKLMNOPQRSTUVWXYZ | LC_ALL=C sed -e \'s/[^A-Z0-9_]/_/g\'`_GNULIB_TESTS\n')
+        emit.append('changequote([, ])dnl\n')
+        emit.append('  AC_SUBST([%stests_WITNESS])\n' % macro_prefix)
+        emit.append('  gl_module_indicator_condition=$%stests_WITNESS\n' % macro_prefix)
+        emit.append('  m4_pushdef([gl_MODULE_INDICATOR_CONDITION], ')
+        emit.append('[$gl_module_indicator_condition])\n')
         # Emit tests autoconf snippets.
-        emit += self.emitter.autoconfSnippets(moduletable['tests'], moduletable['main'] + moduletable['tests'],
-                                              moduletable, 0, True, True, True, replace_auxdir)
-        emit += '  m4_popdef([gl_MODULE_INDICATOR_CONDITION])\n'
-        emit += self.emitter.initmacro_end('%stests' % macro_prefix, gentests)
-        emit += '  AC_REQUIRE([gl_CC_GNULIB_WARNINGS])\n'
+        emit.append(self.emitter.autoconfSnippets(moduletable['tests'], moduletable['main'] + moduletable['tests'],
+                                                  moduletable, 0, True, True, True, replace_auxdir))
+        emit.append('  m4_popdef([gl_MODULE_INDICATOR_CONDITION])\n')
+        emit.append(self.emitter.initmacro_end('%stests' % macro_prefix, gentests))
+        emit.append('  AC_REQUIRE([gl_CC_GNULIB_WARNINGS])\n')
         # _LIBDEPS and _LTLIBDEPS variables are not needed if this library is
         # created using libtool, because libtool already handles the dependencies.
         if not libtool:
             libname_upper = libname.upper().replace('-', '_')
-            emit += '  %s_LIBDEPS="$gl_libdeps"\n' % libname_upper
-            emit += '  AC_SUBST([%s_LIBDEPS])\n' % libname_upper
-            emit += '  %s_LTLIBDEPS="$gl_ltlibdeps"\n' % libname_upper
-            emit += '  AC_SUBST([%s_LTLIBDEPS])\n' % libname_upper
+            emit.append('  %s_LIBDEPS="$gl_libdeps"\n' % libname_upper)
+            emit.append('  AC_SUBST([%s_LIBDEPS])\n' % libname_upper)
+            emit.append('  %s_LTLIBDEPS="$gl_ltlibdeps"\n' % libname_upper)
+            emit.append('  AC_SUBST([%s_LTLIBDEPS])\n' % libname_upper)
         if libtests:
-            emit += '  LIBTESTS_LIBDEPS="$gltests_libdeps"\n'
-            emit += '  AC_SUBST([LIBTESTS_LIBDEPS])\n'
-        emit += '])\n'
-        emit += self.emitter.initmacro_done(macro_prefix, sourcebase)
-        emit += self.emitter.initmacro_done('%stests' % macro_prefix, testsbase)
-        emit += '''
+            emit.append('  LIBTESTS_LIBDEPS="$gltests_libdeps"\n')
+            emit.append('  AC_SUBST([LIBTESTS_LIBDEPS])\n')
+        emit.append('])\n')
+        emit.append(self.emitter.initmacro_done(macro_prefix, sourcebase))
+        emit.append(self.emitter.initmacro_done('%stests' % macro_prefix, testsbase))
+        emit.append('''
 # This macro records the list of files which have been installed by
 # gnulib-tool and may be removed by future gnulib-tool invocations.
-AC_DEFUN([%s_FILE_LIST], [\n''' % macro_prefix
-        emit += '  %s\n' % '\n  '.join(filetable['all'])
-        emit += '])\n'
-        return emit
+AC_DEFUN([%s_FILE_LIST], [\n''' % macro_prefix)
+        emit.append('  %s\n' % '\n  '.join(filetable['all']))
+        emit.append('])\n')
+        return ''.join(emit)
 
     def _done_dir_(self, directory: str, files_added: list[str], files_removed: list[str]) -> None:
         '''This method is used to determine ignore argument for _update_ignorelist_
@@ -771,6 +869,7 @@ AC_DEFUN([%s_FILE_LIST], [\n''' % macro_prefix
             anchor = ''
         srcpath = joinpath(directory, ignore)
         backupname = '%s~' % srcpath
+        self.generated += [srcpath]
         if isfile(joinpath(destdir, srcpath)):
             if files_added or files_removed:
                 with codecs.open(joinpath(destdir, srcpath), 'rb', 'UTF-8') as file:
@@ -784,37 +883,39 @@ AC_DEFUN([%s_FILE_LIST], [\n''' % macro_prefix
                 filenames_to_add = set(files_added).difference(already_listed_filenames)
                 filenames_to_remove = set(files_removed)
                 if filenames_to_add or filenames_to_remove:
+                    new_lines = original_lines + [ f'{anchor}{filename}'
+                                                   for filename in sorted(filenames_to_add) ]
+                    if anchor != '':
+                        lines_to_remove = filenames_to_remove.union({ f'{anchor}{filename}'
+                                                                      for filename in filenames_to_remove })
+                    else:
+                        lines_to_remove = filenames_to_remove
+                    new_lines = [ line
+                                  for line in new_lines
+                                  if line not in lines_to_remove ]
                     if not self.config['dryrun']:
                         print('Updating %s (backup in %s)' % (srcpath, backupname))
                         copyfile2(joinpath(destdir, srcpath), joinpath(destdir, backupname))
-                        new_lines = original_lines + [ f'{anchor}{filename}'
-                                                       for filename in sorted(filenames_to_add) ]
-                        if anchor != '':
-                            lines_to_remove = filenames_to_remove.union({ f'{anchor}{filename}'
-                                                                          for filename in filenames_to_remove })
-                        else:
-                            lines_to_remove = filenames_to_remove
-                        new_lines = [ line
-                                      for line in new_lines
-                                      if line not in lines_to_remove ]
                         with codecs.open(joinpath(destdir, srcpath), 'wb', 'UTF-8') as file:
                             file.write(lines_to_multiline(new_lines))
                     else:  # if self.config['dryrun']
                         print('Update %s (backup in %s)' % (srcpath, backupname))
+                        self.assistant.printDiff(srcpath, lines_to_multiline(new_lines))
         else:  # if not isfile(joinpath(destdir, srcpath))
             if files_added:
+                files_added = sorted(set(files_added))
+                files_added = [ '%s%s' % (anchor, f)
+                                for f in files_added ]
+                if ignore == '.cvsignore':
+                    # Automake generates Makefile rules that create .dirstamp files.
+                    files_added = ['.deps', '.dirstamp'] + files_added
                 if not self.config['dryrun']:
                     print('Creating %s' % srcpath)
-                    files_added = sorted(set(files_added))
-                    files_added = [ '%s%s' % (anchor, f)
-                                    for f in files_added ]
-                    if ignore == '.cvsignore':
-                        # Automake generates Makefile rules that create .dirstamp files.
-                        files_added = ['.deps', '.dirstamp'] + files_added
                     with codecs.open(joinpath(destdir, srcpath), 'wb', 'UTF-8') as file:
                         file.write(lines_to_multiline(files_added))
                 else:  # if self.config['dryrun']
                     print('Create %s' % srcpath)
+                    self.assistant.printDiff(srcpath, lines_to_multiline(files_added))
 
     def prepare(self) -> tuple[dict[str, list[str]], dict[str, str]]:
         '''Make all preparations before the execution of the code.
@@ -860,6 +961,25 @@ AC_DEFUN([%s_FILE_LIST], [\n''' % macro_prefix
                 else:  # if str(module) not in self.config.getModules()
                     print('    %s' % module)
 
+        # Show the dependency chains of the modules given through --explain.
+        # They were explicitly asked for, so they are shown regardless of the
+        # verbosity.
+        for name in self.config.getExplain():
+            module = self.modulesystem.find(name)
+            chain = list()
+            if module:
+                chain = self.moduletable.getDependencyChain(module)
+            if chain:
+                print('Module %s is included through:' % name)
+                print('  %s' % chain[0][0])
+                for module, condition in chain[1:]:
+                    if condition:
+                        print('    -> %s [%s]' % (module, condition))
+                    else:  # if not condition
+                        print('    -> %s' % module)
+            else:  # if not chain
+                print('Module %s is not included.' % name)
+
         # Separate modules into main_modules and tests_modules.
         modules = \
             self.moduletable.transitive_closure_separately(base_modules, final_modules)
@@ -1055,19 +1175,33 @@ AC_DEFUN([%s_FILE_LIST], [\n''' % macro_prefix
                          for pair in filetable['new'] ])
         dirs = [ os.path.join(destdir, d)
                  for d in dirs ]
+        # Check each directory only once, and create the missing ones in one
+        # pass. The code below can then assume that they exist.
+        dirs = [ directory
+                 for directory in dict.fromkeys(dirs)
+                 if not isdir(directory) ]
         for directory in dirs:
-            if not isdir(directory):
+            if not self.config['dryrun']:
                 print('Creating directory %s' % directory)
-                if not self.config['dryrun']:
-                    try:  # Try to create directory
-                        os.makedirs(directory)
-                    except Exception as error:
-                        raise GLError(13, directory)
-                else:  # if self.config['dryrun']
-                    print('Create directory %s' % directory)
+            else:  # if self.config['dryrun']
+                print('Create directory %s' % directory)
+        if not self.config['dryrun']:
+            for directory in constants.plan_directories(dirs):
+                try:  # Try to create directory
+                    os.makedirs(directory, exist_ok=True)
+                except Exception as error:
+                    raise GLError(13, directory)
+
+        # The files generated by this run, other than those in filetable['new'].
+        self.generated = list()
 
         # Create GLFileAssistant instance to process files.
         self.assistant = GLFileAssistant(self.config, transformers)
+        # Skip the files that did not change since the last run.
+        manifest = None
+        if self.config['cache_manifest']:
+            manifest = GLManifest(GLManifest.filename(destdir, m4base))
+        self.assistant.setManifest(manifest)
 
         # Files which are in filetable['old'] and not in filetable['new'].
         # They will be removed and added to filetable['removed'] list.
@@ -1090,6 +1224,7 @@ AC_DEFUN([%s_FILE_LIST], [\n''' % macro_prefix
                         raise GLError(14, file)
                 else:  # if self.config['dryrun']
                     print('Remove file %s (backup in %s~)' % (path, path))
+                    self.assistant.printDiff(file, None)
                 filetable['removed'] += [file]
 
         # Files which are in filetable['new'] and not in filetable['old'].
@@ -1099,12 +1234,7 @@ AC_DEFUN([%s_FILE_LIST], [\n''' % macro_prefix
                   for f in filetable['new']
                   if f not in filetable['old'] ]
         pairs = sorted(set(pairs))
-        for pair in pairs:
-            original = pair[1]
-            rewritten = pair[0]
-            self.assistant.setOriginal(original)
-            self.assistant.setRewritten(rewritten)
-            self.assistant.add_or_update(already_present)
+        self.assistant.add_or_update_files(pairs, already_present)
 
         # Files which are in filetable['new'] and in filetable['old'].
         # They will be added/updated and added to filetable['added'] list.
@@ -1113,12 +1243,7 @@ AC_DEFUN([%s_FILE_LIST], [\n''' % macro_prefix
                   for f in filetable['new']
                   if f in filetable['old'] ]
         pairs = sorted(set(pairs))
-        for pair in pairs:
-            original = pair[1]
-            rewritten = pair[0]
-            self.assistant.setOriginal(original)
-            self.assistant.setRewritten(rewritten)
-            self.assistant.add_or_update(already_present)
+        self.assistant.add_or_update_files(pairs, already_present)
 
         # Add files which were added to the list of filetable['added'].
         filetable['added'] += self.assistant.getFiles()
@@ -1166,12 +1291,12 @@ AC_DEFUN([%s_FILE_LIST], [\n''' % macro_prefix
         if pobase:
             # Create po makefile and auxiliary files.
             for file in ['Makefile.in.in', 'remove-potcdate.sin']:
-                tmpfile = self.assistant.tmpfilename(joinpath(pobase, file))
                 path = joinpath('build-aux', 'po', file)
                 lookedup, flag = filesystem.lookup(path)
-                copyfile(lookedup, tmpfile)
+                with open(lookedup, 'rb') as data_file:
+                    data = data_file.read()
                 basename = joinpath(pobase, file)
-                filename, backup, flag = self.assistant.super_update(basename, tmpfile)
+                filename, backup, flag = self.assistant.super_update_data(basename, data)
                 if flag == 1:
                     if not self.config['dryrun']:
                         print('Updating %s (backup in %s)' % (filename, backup))
@@ -1183,16 +1308,13 @@ AC_DEFUN([%s_FILE_LIST], [\n''' % macro_prefix
                     else:  # if self.config['dryrun']:
                         print('Create %s' % filename)
                     filetable['added'] += [filename]
-                if isfile(tmpfile):
-                    os.remove(tmpfile)
+                if flag != 0:
+                    self.assistant.printDiff(filename, data)
 
             # Create po makefile parameterization, part 1.
             basename = joinpath(pobase, 'Makevars')
-            tmpfile = self.assistant.tmpfilename(basename)
             emit = self.emitter.po_Makevars()
-            with codecs.open(tmpfile, 'wb', 'UTF-8') as file:
-                file.write(emit)
-            filename, backup, flag = self.assistant.super_update(basename, tmpfile)
+            filename, backup, flag = self.assistant.super_update_data(basename, emit)
             if flag == 1:
                 if not self.config['dryrun']:
                     print('Updating %s (backup in %s)' % (filename, backup))
@@ -1204,16 +1326,13 @@ AC_DEFUN([%s_FILE_LIST], [\n''' % macro_prefix
                 else:  # if self.config['dryrun']:
                     print('Create %s' % filename)
                 filetable['added'] += [filename]
-            if isfile(tmpfile):
-                os.remove(tmpfile)
+            if flag != 0:
+                self.assistant.printDiff(filename, emit)
 
             # Create po makefile parameterization, part 2.
             basename = joinpath(pobase, 'POTFILES.in')
-            tmpfile = self.assistant.tmpfilename(basename)
-            with codecs.open(tmpfile, 'wb', 'UTF-8') as file:
-                file.write(self.emitter.po_POTFILES_in(filetable['all']))
-            basename = joinpath(pobase, 'POTFILES.in')
-            filename, backup, flag = self.assistant.super_update(basename, tmpfile)
+            emit = self.emitter.po_POTFILES_in(filetable['all'])
+            filename, backup, flag = self.assistant.super_update_data(basename, emit)
             if flag == 1:
                 if not self.config['dryrun']:
                     print('Updating %s (backup in %s)' % (filename, backup))
@@ -1225,8 +1344,8 @@ AC_DEFUN([%s_FILE_LIST], [\n''' % macro_prefix
                 else:  # if self.config['dryrun']:
                     print('Create %s' % filename)
                 filetable['added'] += [filename]
-            if isfile(tmpfile):
-                os.remove(tmpfile)
+            if flag != 0:
+                self.assistant.printDiff(filename, emit)
 
             # Fetch PO files.
             TP_URL = 'https://translationproject.org/latest/'
@@ -1243,35 +1362,28 @@ AC_DEFUN([%s_FILE_LIST], [\n''' % macro_prefix
             # Create po/LINGUAS.
             basename = joinpath(pobase, 'LINGUAS')
             if not self.config['dryrun']:
-                tmpfile = self.assistant.tmpfilename(basename)
                 data = '# Set of available languages.\n'
                 files = [ constants.subend('.po', '', file)
                           for file in os.listdir(joinpath(destdir, pobase)) ]
                 data += lines_to_multiline(files)
-                with codecs.open(tmpfile, 'wb', 'UTF-8') as file:
-                    file.write(data)
-                filename, backup, flag = self.assistant.super_update(basename, tmpfile)
+                filename, backup, flag = self.assistant.super_update_data(basename, data)
                 if flag == 1:
                     print('Updating %s (backup in %s)' % (filename, backup))
                 elif flag == 2:
                     print('Creating %s' % filename)
                     filetable['added'] += [filename]
-                if isfile(tmpfile):
-                    os.remove(tmpfile)
             else:  # if not self.config['dryrun']
                 backupname = '%s~' % basename
-                if isfile(destdir, basename):
+                if isfile(joinpath(destdir, basename)):
                     print('Update %s (backup in %s)' % (basename, backupname))
-                else:  # if not isfile(destdir, basename)
+                else:  # if not isfile(joinpath(destdir, basename))
                     print('Create %s' % basename)
 
         # Create m4/gnulib-cache.m4.
         basename = joinpath(m4base, 'gnulib-cache.m4')
-        tmpfile = self.assistant.tmpfilename(basename)
+        self.generated += [basename]
         emit = self.gnulib_cache()
-        with codecs.open(tmpfile, 'wb', 'UTF-8') as file:
-            file.write(emit)
-        filename, backup, flag = self.assistant.super_update(basename, tmpfile)
+        filename, backup, flag = self.assistant.super_update_data(basename, emit)
         if flag == 1:
             if not self.config['dryrun']:
                 print('Updating %s (backup in %s)' % (filename, backup))
@@ -1282,21 +1394,22 @@ AC_DEFUN([%s_FILE_LIST], [\n''' % macro_prefix
                 print('Creating %s' % filename)
             else:  # if self.config['dryrun']:
                 print('Create %s' % filename)
-                if emit[-2:] == '\r\n':
-                    emit = emit[:-2]
-                elif emit[-1:] == '\n':
-                    emit = emit[:-1]
-                print(emit)
-        if isfile(tmpfile):
-            os.remove(tmpfile)
+                if not self.config['dryrun_diff']:
+                    # The unified diff shows the contents otherwise.
+                    text = emit
+                    if text[-2:] == '\r\n':
+                        text = text[:-2]
+                    elif text[-1:] == '\n':
+                        text = text[:-1]
+                    print(text)
+        if flag != 0:
+            self.assistant.printDiff(filename, emit)
 
         # Create m4/gnulib-comp.m4.
         basename = joinpath(m4base, 'gnulib-comp.m4')
-        tmpfile = self.assistant.tmpfilename(basename)
+        self.generated += [basename]
         emit = self.gnulib_comp(filetable, gentests)
-        with codecs.open(tmpfile, 'wb', 'UTF-8') as file:
-            file.write(emit)
-        filename, backup, flag = self.assistant.super_update(basename, tmpfile)
+        filename, backup, flag = self.assistant.super_update_data(basename, emit)
         if flag == 1:
             if not self.config['dryrun']:
                 print('Updating %s (backup in %s)' % (filename, backup))
@@ -1307,19 +1420,22 @@ AC_DEFUN([%s_FILE_LIST], [\n''' % macro_prefix
                 print('Creating %s' % filename)
             else:  # if self.config['dryrun']:
                 print('Create %s' % filename)
-                if emit[-2:] == '\r\n':
-                    emit = emit[:-2]
-                elif emit[-1:] == '\n':
-                    emit = emit[:-1]
-                print(emit)
-        if isfile(tmpfile):
-            os.remove(tmpfile)
+                if not self.config['dryrun_diff']:
+                    # The unified diff shows the contents otherwise.
+                    text = emit
+                    if text[-2:] == '\r\n':
+                        text = text[:-2]
+                    elif text[-1:] == '\n':
+                        text = text[:-1]
+                    print(text)
+        if flag != 0:
+            self.assistant.printDiff(filename, emit)
 
         # Create library makefile.
         # Do this after creating gnulib-comp.m4, because func_emit_lib_Makefile_am
         # can run 'autoconf -t', which reads gnulib-comp.m4.
         basename = joinpath(sourcebase, source_makefile_am)
-        tmpfile = self.assistant.tmpfilename(basename)
+        self.generated += [basename]
         emit = self.emitter.lib_Makefile_am(basename,
                                             self.moduletable['main'], self.moduletable, self.makefiletable,
                                             actioncmd, for_test)
@@ -1327,9 +1443,7 @@ AC_DEFUN([%s_FILE_LIST], [\n''' % macro_prefix
             emit = sp.run([joinpath(DIRS['root'], 'build-aux/prefix-gnulib-mk'), '--from-gnulib-tool',
                            f'--lib-name={libname}', f'--prefix={sourcebase}/'],
                           input=emit, text=True, capture_output=True).stdout
-        with codecs.open(tmpfile, 'wb', 'UTF-8') as file:
-            file.write(emit)
-        filename, backup, flag = self.assistant.super_update(basename, tmpfile)
+        filename, backup, flag = self.assistant.super_update_data(basename, emit)
         if flag == 1:
             if not self.config['dryrun']:
                 print('Updating %s (backup in %s)' % (filename, backup))
@@ -1341,19 +1455,17 @@ AC_DEFUN([%s_FILE_LIST], [\n''' % macro_prefix
             else:  # if self.config['dryrun']:
                 print('Create %s' % filename)
             filetable['added'] += [filename]
-        if isfile(tmpfile):
-            os.remove(tmpfile)
+        if flag != 0:
+            self.assistant.printDiff(filename, emit)
 
         # Create tests Makefile.
         if gentests:
             basename = joinpath(testsbase, tests_makefile_am)
-            tmpfile = self.assistant.tmpfilename(basename)
+            self.generated += [basename]
             emit = self.emitter.tests_Makefile_am(basename,
                                                   self.moduletable['tests'], self.moduletable, self.makefiletable,
                                                   '%stests_WITNESS' % macro_prefix, for_test)
-            with codecs.open(tmpfile, 'wb', 'UTF-8') as file:
-                file.write(emit)
-            filename, backup, flag = self.assistant.super_update(basename, tmpfile)
+            filename, backup, flag = self.assistant.super_update_data(basename, emit)
             if flag == 1:
                 if not self.config['dryrun']:
                     print('Updating %s (backup in %s)' % (filename, backup))
@@ -1365,8 +1477,8 @@ AC_DEFUN([%s_FILE_LIST], [\n''' % macro_prefix
                 else:  # if self.config['dryrun']:
                     print('Create %s' % filename)
                 filetable['added'] += [filename]
-            if isfile(tmpfile):
-                os.remove(tmpfile)
+            if flag != 0:
+                self.assistant.printDiff(filename, emit)
 
         if vc_files != False:
             # Update the .cvsignore and .gitignore files.
@@ -1401,6 +1513,19 @@ AC_DEFUN([%s_FILE_LIST], [\n''' % macro_prefix
                     last_dir_files_removed += [filename]
             self._done_dir_(last_dir, last_dir_files_added, last_dir_files_removed)
 
+        # Record the files that this run read and wrote, so that the next
+        # --update can tell whether it has anything to do.
+        if manifest != None and not self.config['dryrun']:
+            inputs = [ module.path
+                       for module in self.moduletable['final']
+                       if not module.isPatched() ]
+            inputs += manifest.getSources()
+            outputs = [ pair[0]
+                        for pair in filetable['new'] ]
+            outputs += self.generated
+            manifest.setState(self.fingerprint(), inputs, destdir, outputs)
+            manifest.save()
+
         # Finish the work.
         print('Finished.\n')
         print('You may need to add #include directives for the following .h files.')
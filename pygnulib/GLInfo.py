@@ -152,6 +152,10 @@ Usage: gnulib-tool --list
        gnulib-tool --extract-filelist module
        gnulib-tool --extract-dependencies module
        gnulib-tool --extract-recursive-dependencies module
+       gnulib-tool --extract-reverse-dependencies module
+       gnulib-tool --extract-recursive-reverse-dependencies module
+       gnulib-tool --extract-closure-size module
+       gnulib-tool --extract-pulls-in module module1 ... moduleN
        gnulib-tool --extract-autoconf-snippet module
        gnulib-tool --extract-automake-snippet module
        gnulib-tool --extract-include-directive module
@@ -192,6 +196,17 @@ Operation modes:
       --extract-recursive-dependencies  extract the dependencies of the module
                                         and its dependencies, recursively, all
                                         together, but without the conditions
+      --extract-reverse-dependencies  extract the modules that depend on the
+                                      module
+      --extract-recursive-reverse-dependencies  extract the modules that depend
+                                                on the module, directly or
+                                                indirectly, all together,
+                                                without the conditions
+      --extract-closure-size       report the number of modules in the recursive
+                                   dependencies of the module, including itself
+      --extract-pulls-in           report which of the modules module1 ...
+                                   moduleN are among the recursive dependencies
+                                   of the first module
       --extract-autoconf-snippet   extract the snippet for configure.ac
       --extract-automake-snippet   extract the snippet for library makefile
       --extract-include-directive  extract the #include directive
@@ -215,12 +230,33 @@ General options:
                             directory.
       --local-dir=DIRECTORY  Specify a local override directory where to look
                             up files before looking in gnulib's directory.
+      --cache-modules       Enable the persistent index of module descriptions,
+                            stored in $XDG_CACHE_HOME/gnulib-tool, which
+                            defaults to ~/.cache/gnulib-tool.
+      --no-cache-modules    Disable the persistent index of module descriptions.
+      --cache-patches       Enable the persistent cache of the files that result
+                            from applying the .diff files of the --local-dir
+                            directories, stored next to the module index.
+      --no-cache-patches    Disable the persistent cache of patched files.
+      --cache-subst         Enable the persistent cache of the variables that
+                            configure.ac substitutes, used by --gnu-make and
+                            stored next to the module index.
+      --no-cache-subst      Disable the persistent cache of AC_SUBST traces.
+      --cache-manifest      Record the files that --import and --update install,
+                            so that the next --update skips the unchanged
+                            files, or does nothing if nothing changed.  The
+                            manifest is stored next to the module index.
+      --no-cache-manifest   Disable the manifest of the installed files.
+      --jobs=N              Copy up to N files in parallel.  The messages are
+                            printed in the same order as with --jobs=1.
       --verbose             Increase verbosity. May be repeated.
       --quiet               Decrease verbosity. May be repeated.
 
 Options for --import, --add/remove-import, --update:
 
       --dry-run             Only print what would have been done.
+      --dry-run=diff        Only print what would have been done, and the
+                            changes to the files as a unified diff.
 
 Options for --import, --add/remove-import:
 
@@ -322,11 +358,19 @@ Options for --import, --add/remove-import, --update,
   -h, --hardlink            Make hard links instead of copying files.
       --local-hardlink      Make hard links instead of copying files, only
                             for files from the local override directory.
+      --reflink             Make copy-on-write clones instead of copying files,
+                            where the file system supports it.
+      --local-reflink       Make copy-on-write clones instead of copying files,
+                            only for files from the local override directory.
 
 Options for --import, --add/remove-import, --update:
 
   -S, --more-symlinks       Deprecated; equivalent to --symlink.
   -H, --more-hardlinks      Deprecated; equivalent to --hardlink.
+      --explain=MODULE      Show through which chain of dependencies the given
+                            MODULE is included, with the condition of every
+                            conditional dependency on the chain.
+                            This option can be repeated.
 
 Report bugs to <bug-gnulib@gnu.org>.'''
         return result
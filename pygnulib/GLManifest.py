@@ -0,0 +1,251 @@
+# Copyright (C) 2002-2024 Free Software Foundation, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+#===============================================================================
+# Define global imports
+#===============================================================================
+import re
+import os
+import json
+import hashlib
+import tempfile
+from . import constants
+from .GLModuleIndex import GLModuleIndex
+
+
+#===============================================================================
+# Define module information
+#===============================================================================
+__author__ = constants.__author__
+__license__ = constants.__license__
+__copyright__ = constants.__copyright__
+
+
+#===============================================================================
+# Define global constants
+#===============================================================================
+ENCS = constants.ENCS
+joinpath = constants.joinpath
+
+
+#===============================================================================
+# Define GLManifest class
+#===============================================================================
+class GLManifest(object):
+    '''GLManifest records, for every file that --import installed, the file it
+    was installed from, the transformation that was applied to it, and the
+    size, modification time and SHA-256 hash of both the source and the
+    installed file. The next run uses it to skip the files whose source and
+    destination have not changed since, without reading them.
+
+    The manifest also records the fingerprint of the last successful run,
+    together with the sizes and modification times of the files that run
+    read and wrote. If none of them changed, --update has nothing to do.
+
+    The manifest is stored next to the module index, not in the package,
+    with one manifest file for every destination directory and m4base
+    directory.'''
+
+    # The version of the manifest file format. Increment it whenever the
+    # format changes, so that old manifest files are ignored.
+    version = 2
+
+    def __init__(self, path: str) -> None:
+        '''Create new GLManifest instance and load the manifest file at the
+        given path, if it exists.'''
+        if type(path) is not str:
+            raise TypeError('path must be a string, not %s'
+                            % type(path).__name__)
+        self.path = path
+        self.entries = dict()
+        self.seen = dict()
+        self.state = None
+        self.newstate = None
+        self.load()
+
+    def __repr__(self) -> str:
+        '''x.__repr__() <==> repr(x)'''
+        result = '<pygnulib.GLManifest %s>' % hex(id(self))
+        return result
+
+    @staticmethod
+    def filename(destdir: str, m4base: str) -> str:
+        '''Return the name of the manifest file for the given destination
+        directory and m4base directory.'''
+        key = '%s\n%s' % (os.path.abspath(destdir), os.path.normpath(m4base))
+        digest = hashlib.sha1(key.encode(ENCS['default'])).hexdigest()
+        return joinpath(GLModuleIndex.directory(), 'manifests', '%s.json' % digest)
+
+    @staticmethod
+    def transformKey(transformer: tuple[re.Pattern | str, str] | None) -> str:
+        '''Return a string that identifies the given transformer, i.e. the
+        arguments for re.sub() applied to a file, or the empty string if no
+        transformation is applied.'''
+        if transformer == None:
+            return ''
+        pattern = transformer[0]
+        if type(pattern) is not str:
+            pattern = pattern.pattern
+        return '%s\n%s' % (pattern, transformer[1])
+
+    @staticmethod
+    def statKey(path: str) -> list[int] | None:
+        '''Return the size and modification time of the file at path, or None
+        if it does not exist.'''
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def load(self) -> None:
+        '''Load the manifest file. A missing, unreadable or outdated manifest
+        file results in an empty manifest.'''
+        self.entries = dict()
+        self.state = None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        if type(data) is dict and data.get('version') == GLManifest.version:
+            files = data.get('files')
+            if type(files) is dict:
+                self.entries = files
+            state = data.get('state')
+            if type(state) is dict:
+                self.state = state
+
+    def save(self) -> None:
+        '''Write the manifest file with the entries of the files that were
+        handled in this run, unless they are unchanged. Failure to write the
+        manifest file is not an error; the manifest is only an optimization.'''
+        if self.seen == self.entries and self.newstate == self.state:
+            return
+        data = dict()
+        data['version'] = GLManifest.version
+        data['files'] = dict(sorted(self.seen.items()))
+        if self.newstate != None:
+            data['state'] = self.newstate
+        directory = os.path.dirname(self.path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmpfile = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                    file.write(json.dumps(data, separators=(',', ':')) + '\n')
+                os.replace(tmpfile, self.path)
+            except BaseException:
+                os.remove(tmpfile)
+                raise
+        except OSError:
+            pass
+
+    def isUnchanged(self, rewritten: str, source: str, transform: str, path: str) -> bool:
+        '''Check whether the file rewritten, installed at path, was installed
+        from source with the given transformation and neither source nor path
+        changed since, according to their sizes and modification times. An
+        unchanged file is kept in the manifest.'''
+        entry = self.entries.get(rewritten)
+        if (type(entry) is not dict
+                or entry.get('source') != source
+                or entry.get('transform') != transform):
+            return False
+        try:
+            stat = os.stat(source)
+            deststat = os.stat(path)
+        except OSError:
+            return False
+        if (entry.get('source_stat') != [stat.st_size, stat.st_mtime_ns]
+                or entry.get('dest_stat') != [deststat.st_size, deststat.st_mtime_ns]):
+            return False
+        self.seen[rewritten] = entry
+        return True
+
+    def hasContents(self, rewritten: str, path: str, data: bytes) -> bool:
+        '''Check whether the file rewritten, installed at path, has not changed
+        since the last run according to its size and modification time, and
+        had the contents data then.'''
+        entry = self.entries.get(rewritten)
+        if type(entry) is not dict:
+            return False
+        try:
+            deststat = os.stat(path)
+        except OSError:
+            return False
+        return (entry.get('dest_stat') == [deststat.st_size, deststat.st_mtime_ns]
+                and entry.get('dest_hash') == hashlib.sha256(data).hexdigest())
+
+    def record(self, rewritten: str, source: str, source_data: bytes,
+               transform: str, path: str, data: bytes) -> None:
+        '''Record that the file rewritten was installed at path from source,
+        whose contents are source_data, with the given transformation, and
+        that it has the contents data.'''
+        try:
+            stat = os.stat(source)
+            deststat = os.stat(path)
+        except OSError:
+            return
+        entry = dict()
+        entry['source'] = source
+        entry['source_stat'] = [stat.st_size, stat.st_mtime_ns]
+        entry['source_hash'] = hashlib.sha256(source_data).hexdigest()
+        entry['transform'] = transform
+        entry['dest_stat'] = [deststat.st_size, deststat.st_mtime_ns]
+        if data is source_data:
+            entry['dest_hash'] = entry['source_hash']
+        else:  # if data is not source_data
+            entry['dest_hash'] = hashlib.sha256(data).hexdigest()
+        self.seen[rewritten] = entry
+
+    def getSources(self) -> list[str]:
+        '''Return the source files of the files that were handled in this
+        run.'''
+        return sorted(set(entry['source']
+                          for entry in self.seen.values()))
+
+    def isUpToDate(self, fingerprint: str, destdir: str) -> bool:
+        '''Check whether the last successful run had the given fingerprint and
+        none of the files it read or wrote changed since, according to their
+        sizes and modification times.'''
+        state = self.state
+        if state == None or state.get('fingerprint') != fingerprint:
+            return False
+        inputs = state.get('inputs')
+        outputs = state.get('outputs')
+        if type(inputs) is not dict or type(outputs) is not dict:
+            return False
+        for path, stat in inputs.items():
+            if GLManifest.statKey(path) != stat:
+                return False
+        for path, stat in outputs.items():
+            if GLManifest.statKey(os.path.join(destdir, path)) != stat:
+                return False
+        return True
+
+    def setState(self, fingerprint: str, inputs: list[str], destdir: str,
+                 outputs: list[str]) -> None:
+        '''Record that this run, which had the given fingerprint, succeeded
+        after reading the files inputs and writing the files outputs, which
+        are relative to destdir.'''
+        state = dict()
+        state['fingerprint'] = fingerprint
+        state['inputs'] = { path: GLManifest.statKey(path)
+                            for path in sorted(set(inputs)) }
+        state['outputs'] = { path: GLManifest.statKey(os.path.join(destdir, path))
+                             for path in sorted(set(outputs)) }
+        self.newstate = state
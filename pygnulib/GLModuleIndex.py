@@ -0,0 +1,354 @@
+# Copyright (C) 2002-2024 Free Software Foundation, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+#===============================================================================
+# Define global imports
+#===============================================================================
+import os
+import json
+import atexit
+import hashlib
+import tempfile
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+from . import constants
+from .GLConfig import GLConfig
+
+
+#===============================================================================
+# Define module information
+#===============================================================================
+__author__ = constants.__author__
+__license__ = constants.__license__
+__copyright__ = constants.__copyright__
+
+
+#===============================================================================
+# Define global constants
+#===============================================================================
+DIRS = constants.DIRS
+ENCS = constants.ENCS
+joinpath = constants.joinpath
+
+# The indices that have been opened so far, by the name of the index file.
+_indices = dict()
+
+
+def get_module_index(config: GLConfig) -> GLModuleIndex:
+    '''Return the module index for the gnulib directory and the stack of local
+    directories of the given configuration. The index is opened only once per
+    process, and the entries that changed are saved to disk when the process
+    exits.
+    GLConfig: localpath.'''
+    if type(config) is not GLConfig:
+        raise TypeError('config must be a GLConfig, not %s'
+                        % type(config).__name__)
+    localpath = config['localpath']
+    key = GLModuleIndex.filename(localpath)
+    if key not in _indices:
+        index = GLModuleIndex(localpath)
+        atexit.register(index.save)
+        _indices[key] = index
+    return _indices[key]
+
+
+#===============================================================================
+# Define GLModuleIndex class
+#===============================================================================
+class GLModuleIndex(object):
+    '''GLModuleIndex is a persistent index of the module description files.
+    For every module description file it records the size and modification
+    time of the file together with its sections, so that an unchanged file
+    does not need to be read and dissected again in the next run. It also
+    records the listings of the modules/ directories and the reachability
+    matrix of the module graph.
+
+    The index is stored in $XDG_CACHE_HOME/gnulib-tool, where XDG_CACHE_HOME
+    defaults to ~/.cache. A separate index file is used for every stack of
+    local directories. The index file is a journal: a line with a JSON
+    header, followed by one JSON line per recorded entry, where later lines
+    override earlier ones. Saving appends the entries that changed, under a
+    lock that several gnulib-tool processes share, so that no process loses
+    the entries of another one. The journal is compacted when it has grown
+    to more than twice the number of entries.'''
+
+    # The version of the index file format. Increment it whenever the format
+    # changes, so that old index files are ignored.
+    version = 2
+
+    # The journal is compacted when it has more than this many lines that are
+    # overridden by later lines, and more lines than entries.
+    slack = 256
+
+    def __init__(self, localpath: list[str]) -> None:
+        '''Create new GLModuleIndex instance and load the index file for the
+        given stack of local directories, if it exists.'''
+        if type(localpath) is not list:
+            raise TypeError('localpath must be a list, not %s'
+                            % type(localpath).__name__)
+        self.localpath = [ os.path.abspath(localdir)
+                           for localdir in localpath ]
+        self.path = GLModuleIndex.filename(localpath)
+        self.reachability_path = os.path.splitext(self.path)[0] + '.reachability'
+        self.lock_path = os.path.splitext(self.path)[0] + '.lock'
+        self.entries = dict()
+        self.listings = dict()
+        self.records = 0
+        self.pending = dict()
+        self.load()
+
+    def __repr__(self) -> str:
+        '''x.__repr__() <==> repr(x)'''
+        result = '<pygnulib.GLModuleIndex %s>' % hex(id(self))
+        return result
+
+    @staticmethod
+    def directory() -> str:
+        '''Return the directory in which the index files are stored.'''
+        cachehome = os.environ.get('XDG_CACHE_HOME', '')
+        if not os.path.isabs(cachehome):
+            # The XDG Base Directory Specification says to ignore relative paths.
+            cachehome = os.path.expanduser(joinpath('~', '.cache'))
+        return joinpath(cachehome, 'gnulib-tool')
+
+    @staticmethod
+    def filename(localpath: list[str]) -> str:
+        '''Return the name of the index file for the given stack of local
+        directories.'''
+        key = '\n'.join([DIRS['root']] + [ os.path.abspath(localdir)
+                                           for localdir in localpath ])
+        digest = hashlib.sha1(key.encode(ENCS['default'])).hexdigest()
+        return joinpath(GLModuleIndex.directory(), 'modules-%s.json' % digest)
+
+    def _header(self) -> dict[str, object]:
+        '''Return the header of the index file.'''
+        header = dict()
+        header['version'] = GLModuleIndex.version
+        header['root'] = DIRS['root']
+        header['localpath'] = self.localpath
+        return header
+
+    def _read(self) -> tuple[dict[str, list], dict[str, list], int] | None:
+        '''Read the index file. Return the module entries, the listings and the
+        number of journal lines, or None if the index file is missing,
+        unreadable or outdated. An incomplete last line, left behind by a
+        process that was interrupted, is ignored.'''
+        try:
+            with open(self.path, 'rb') as file:
+                lines = file.read().split(b'\n')
+        except OSError:
+            return None
+        try:
+            header = json.loads(lines[0].decode('utf-8'))
+        except ValueError:
+            return None
+        if header != self._header():
+            return None
+        tables = dict()
+        tables['modules'] = dict()
+        tables['listings'] = dict()
+        lines = [ line
+                  for line in lines[1:]
+                  if line ]
+        try:  # Parse the journal at once
+            journal = json.loads(b'[%s]' % b','.join(lines))
+        except ValueError:
+            # There is an incomplete line; parse the lines one by one.
+            journal = list()
+            for line in lines:
+                try:
+                    journal.append(json.loads(line))
+                except ValueError:
+                    pass
+        records = 0
+        for record in journal:
+            try:
+                kind, key, value = record
+                tables[kind][key] = value
+            except (ValueError, TypeError, KeyError):
+                continue
+            records += 1
+        return tuple([tables['modules'], tables['listings'], records])
+
+    def load(self) -> None:
+        '''Load the index file. A missing, unreadable or outdated index file
+        results in an empty index.'''
+        self.entries = dict()
+        self.listings = dict()
+        self.records = 0
+        data = self._read()
+        if data != None:
+            self.entries, self.listings, self.records = data
+
+    def _record(self, kind: str, key: str, value: list) -> None:
+        '''Note that the entry with the given key of the given kind ('modules'
+        or 'listings') has to be saved.'''
+        self.pending[tuple([kind, key])] = value
+
+    def save(self) -> None:
+        '''Save the entries that changed since the index file was loaded. They
+        are appended to the index file, or the index file is rewritten with
+        the entries of all processes if it is missing, outdated or too long.
+        Failure to write the index file is not an error; the index is only an
+        optimization.'''
+        if not self.pending:
+            return
+        pending = self.pending
+        self.pending = dict()
+        lines = [ json.dumps([kind, key, value]).encode('utf-8') + b'\n'
+                  for (kind, key), value in pending.items() ]
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.lock_path, 'ab') as lock:
+                if fcntl != None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+                # Re-read the index file under the lock: other processes may
+                # have saved their entries since it was loaded.
+                data = self._read()
+                if data != None:
+                    entries, listings, records = data
+                    size = len(entries) + len(listings)
+                    if records + len(lines) <= max(2 * size, size + GLModuleIndex.slack):
+                        with open(self.path, 'ab+') as file:
+                            file.seek(-1, os.SEEK_END)
+                            if file.read(1) != b'\n':
+                                # Terminate the incomplete last line.
+                                lines.insert(0, b'\n')
+                            file.write(b''.join(lines))
+                        return
+                else:  # if data == None
+                    entries, listings = dict(), dict()
+                tables = dict()
+                tables['modules'] = entries
+                tables['listings'] = listings
+                for (kind, key), value in pending.items():
+                    tables[kind][key] = value
+                data = [json.dumps(self._header()).encode('utf-8') + b'\n']
+                data += [ json.dumps([kind, key, value]).encode('utf-8') + b'\n'
+                          for kind in ['modules', 'listings']
+                          for key, value in tables[kind].items() ]
+                self._writeFile(self.path, b''.join(data))
+        except OSError:
+            pass
+
+    def _writeFile(self, path: str, data: bytes) -> None:
+        '''Atomically replace the file at path with the given data. Failure to
+        write the file is not an error.'''
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmpfile = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as file:
+                    file.write(data)
+                os.replace(tmpfile, path)
+            except BaseException:
+                os.remove(tmpfile)
+                raise
+        except OSError:
+            pass
+
+    def getSections(self, path: str) -> dict[str, str] | None:
+        '''Return the sections of the module description file at the given
+        path, or None if the index has no up-to-date entry for it.'''
+        entry = self.entries.get(os.path.abspath(path))
+        if entry == None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if entry[0] != stat.st_size or entry[1] != stat.st_mtime_ns:
+            return None
+        return entry[2]
+
+    def setSections(self, path: str, sections: dict[str, str]) -> None:
+        '''Record the sections of the module description file at the given
+        path.'''
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        key = os.path.abspath(path)
+        self.entries[key] = [stat.st_size, stat.st_mtime_ns, sections]
+        self._record('modules', key, self.entries[key])
+
+    def getListing(self, directory: str) -> tuple[list[str], list[str]] | None:
+        '''Return the names of the regular files and of the subdirectories in
+        the given directory, or None if the index has no up-to-date entry for
+        it.'''
+        entry = self.listings.get(os.path.abspath(directory))
+        if entry == None:
+            return None
+        try:
+            stat = os.stat(directory)
+        except OSError:
+            return None
+        if entry[0] != stat.st_mtime_ns:
+            return None
+        return tuple([entry[1], entry[2]])
+
+    def setListing(self, directory: str, files: list[str], subdirs: list[str]) -> None:
+        '''Record the names of the regular files and of the subdirectories in
+        the given directory.'''
+        try:
+            stat = os.stat(directory)
+        except OSError:
+            return
+        key = os.path.abspath(directory)
+        self.listings[key] = [stat.st_mtime_ns, files, subdirs]
+        self._record('listings', key, self.listings[key])
+
+    def getReachability(self, fingerprint: str) -> tuple[list[str], list[int]] | None:
+        '''Return the module names and the rows of the reachability matrix
+        stored for the module graph with the given fingerprint, or None if
+        there is no such matrix. The reachability matrix is stored next to
+        the index file: a line with a JSON header, followed by one row of
+        ceil(N/8) bytes per module, bit j of row i being set if module i
+        pulls in module j.'''
+        try:
+            with open(self.reachability_path, 'rb') as file:
+                header = json.loads(file.readline().decode('utf-8'))
+                if (type(header) is not dict
+                        or header.get('version') != GLModuleIndex.version
+                        or header.get('fingerprint') != fingerprint):
+                    return None
+                names = header['names']
+                rowsize = (len(names) + 7) // 8
+                data = file.read()
+        except (OSError, ValueError, KeyError):
+            return None
+        if len(data) != rowsize * len(names):
+            return None
+        rows = [ int.from_bytes(data[offset:offset + rowsize], 'little')
+                 for offset in range(0, len(data), rowsize) ]
+        return tuple([names, rows])
+
+    def setReachability(self, fingerprint: str, names: list[str], rows: list[int]) -> None:
+        '''Store the reachability matrix for the module graph with the given
+        fingerprint.'''
+        header = dict()
+        header['version'] = GLModuleIndex.version
+        header['fingerprint'] = fingerprint
+        header['names'] = names
+        rowsize = (len(names) + 7) // 8
+        data = [json.dumps(header).encode('utf-8') + b'\n']
+        data += [ row.to_bytes(rowsize, 'little')
+                  for row in rows ]
+        self._writeFile(self.reachability_path, b''.join(data))
@@ -23,11 +23,12 @@ import re
 import sys
 import codecs
 import hashlib
-import subprocess as sp
+import weakref
 from . import constants
 from .GLError import GLError
 from .GLConfig import GLConfig
 from .GLFileSystem import GLFileSystem
+from .GLModuleIndex import get_module_index
 
 
 #===============================================================================
@@ -59,16 +60,35 @@ class GLModuleSystem(object):
     '''GLModuleSystem is used to operate with module system using dynamic
     searching and patching.'''
 
+    # The registries of GLModule instances and of the data derived from them,
+    # one per GLConfig instance. They are shared among all GLModuleSystem
+    # instances for the same configuration, so that each module is looked up
+    # and read only once.
+    registries = weakref.WeakKeyDictionary()
+
     def __init__(self, config: GLConfig) -> None:
         '''Create new GLModuleSystem instance. Some functions use GLFileSystem class
         to look up a file in localpath or gnulib directories, or combine it through
-        'patch' utility.'''
+        'patch' utility. If the cache_modules option is enabled, the module
+        descriptions are looked up in the persistent module index first.'''
         self.args = dict()
         if type(config) is not GLConfig:
             raise TypeError('config must be a GLConfig, not %s'
                             % type(config).__name__)
         self.config = config
         self.filesystem = GLFileSystem(self.config)
+        self.index = None
+        if self.config['cache_modules']:
+            self.index = get_module_index(self.config)
+        localpath = list(self.config['localpath'])
+        registry = GLModuleSystem.registries.get(self.config)
+        if registry == None or registry['localpath'] != localpath:
+            # The location of the modules depends on the local directories.
+            registry = dict()
+            registry['localpath'] = localpath
+            registry['modules'] = dict()
+            GLModuleSystem.registries[self.config] = registry
+        self.registry = registry
 
     def __repr__(self) -> str:
         '''x.__repr__ <==> repr(x)'''
@@ -86,23 +106,27 @@ class GLModuleSystem(object):
         badnames = ['ChangeLog', 'COPYING', 'README', 'TEMPLATE',
                     'TEMPLATE-EXTENDED', 'TEMPLATE-TESTS']
         if module not in badnames:
-            result = isfile(joinpath(DIRS['modules'], module))
+            result = self.filesystem.isFile(DIRS['root'], joinpath('modules', module))
             if not result:
                 for localdir in localpath:
-                    if (isdir(joinpath(localdir, 'modules'))
-                            and isfile(joinpath(localdir, 'modules', module))):
+                    if self.filesystem.isFile(localdir, joinpath('modules', module)):
                         result = True
                         break
         return result
 
     def find(self, module: str) -> GLModule | None:
-        '''Find the given module.'''
+        '''Find the given module. Every module is created only once per
+        configuration; subsequent calls return the same GLModule instance.'''
         if type(module) is not str:
             raise TypeError('module must be a string, not %s'
                             % type(module).__name__)
+        modules = self.registry['modules']
+        if module in modules:
+            return modules[module]
         if self.exists(module):
             path, istemp = self.filesystem.lookup(joinpath('modules', module))
-            result = GLModule(self.config, path, istemp)
+            result = GLModule(self.config, path, istemp, self)
+            modules[module] = result
             return result
         else:  # if not self.exists(module)
             if self.config['errors']:
@@ -125,45 +149,84 @@ class GLModuleSystem(object):
                     or filename.endswith('.rej')
                     or filename.endswith('~'))
 
-    def list(self) -> list[str]:
-        '''Return the available module names as tuple. We could use a combination
-        of os.walk() function and re module. However, it takes too much time to
-        complete, so this version uses subprocess to run shell commands.'''
-        result = ''
-        listing = list()
+    def list(self, include_tests: bool = False) -> list[str]:
+        '''Return the available module names as a sorted list. The *-tests
+        modules are only included if include_tests is True. The modules/
+        directories of gnulib and of the local directories are scanned in
+        process; if the module index is enabled, the directory listings are
+        taken from it as long as the directories are unchanged.'''
         localpath = self.config['localpath']
-        find_args = ['find', 'modules', '-type', 'f', '-print']
-
-        # Read modules from gnulib root directory.
-        os.chdir(constants.DIRS['root'])
-        find = sp.Popen(find_args, stdout=sp.PIPE)
-        result += find.stdout.read().decode("UTF-8")
-        os.chdir(DIRS['cwd'])
-
-        # Read modules from local directories.
-        if len(localpath) > 0:
-            for localdir in localpath:
-                os.chdir(localdir)
-                find = sp.Popen(find_args, stdout=sp.PIPE)
-                result += find.stdout.read().decode("UTF-8")
-                os.chdir(DIRS['cwd'])
-
-        listing = [ line
-                    for line in result.split('\n')
-                    if line.strip() ]
-        if len(localpath) > 0:
-            listing = [ subend('.diff', '', line)
-                        for line in listing ]
-        # Remove modules/ prefix from each file name.
-        pattern = re.compile(r'^modules/')
-        listing = [ pattern.sub(r'', line)
-                    for line in listing ]
-        # Filter out undesired file names.
-        listing = [ line
-                    for line in listing
-                    if self.file_is_module(line) and not line.endswith('-tests') ]
-        modules = sorted(set(listing))
-        return modules
+        directories = [DIRS['modules']]
+        directories += [ joinpath(localdir, 'modules')
+                         for localdir in localpath ]
+        modules = set()
+        for directory in directories:
+            for filename in self._listFiles(directory, ''):
+                if len(localpath) > 0:
+                    filename = subend('.diff', '', filename)
+                # Filter out undesired file names.
+                if self.file_is_module(filename):
+                    if include_tests or not filename.endswith('-tests'):
+                        modules.add(filename)
+        return sorted(modules)
+
+    def getFileOwners(self) -> dict[str, list[str]]:
+        '''Return a dictionary that maps every file listed in the Files section
+        of a module description to the sorted list of the names of the modules
+        that contain it. The module descriptions are looked up like in find(),
+        taking the local directories and their .diff files into account. The
+        dictionary is computed only once per configuration.
+        GLConfig: localpath.'''
+        if 'owners' not in self.registry:
+            owners = dict()
+            for name in self.list(True):
+                if self.exists(name):
+                    module = self.find(name)
+                    filenames = { line.strip()
+                                  for line in module.getFiles_Raw().split('\n')
+                                  if line.strip() }
+                    for filename in filenames:
+                        if filename not in owners:
+                            owners[filename] = list()
+                        owners[filename].append(name)
+            self.registry['owners'] = owners
+        return self.registry['owners']
+
+    def getGraph(self) -> GLModuleGraph:
+        '''Return the dependency graph of the modules. The graph is shared by
+        all GLModuleSystem instances for the same configuration.'''
+        if 'graph' not in self.registry:
+            self.registry['graph'] = GLModuleGraph(self)
+        return self.registry['graph']
+
+    def _listFiles(self, directory: str, prefix: str) -> list[str]:
+        '''Return the names of the regular files in the given directory and its
+        subdirectories, relative to the directory and prefixed with prefix.
+        Like 'find -type f', symbolic links are neither returned nor followed.'''
+        listing = None
+        if self.index != None:
+            listing = self.index.getListing(directory)
+        if listing == None:
+            files = list()
+            subdirs = list()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_file(follow_symlinks=False):
+                            files.append(entry.name)
+                        elif entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+            except OSError:
+                return []
+            if self.index != None:
+                self.index.setListing(directory, files, subdirs)
+        else:  # if listing != None
+            files, subdirs = listing
+        result = [ prefix + filename
+                   for filename in files ]
+        for subdir in subdirs:
+            result += self._listFiles(joinpath(directory, subdir), prefix + subdir + '/')
+        return result
 
 
 #===============================================================================
@@ -172,7 +235,18 @@ class GLModuleSystem(object):
 class GLModule(object):
     '''GLModule is used to create a module object from the file with the given
     path. GLModule can get all information about module, get its dependencies,
-    files, etc.'''
+    files, etc.
+
+    Since all modules are loaded at once for a megatest, GLModule is kept
+    compact: it has no instance dictionary, its strings are interned, the
+    derived lists are stored as tuples, and all modules of a configuration
+    share the GLConfig and GLModuleSystem objects.'''
+
+    __slots__ = ('config', 'path', 'patched', 'name', 'modulesystem',
+                 'content', 'offsets', 'sections',
+                 'statuses', 'applicability', 'files', 'dependencies',
+                 'dependencies_without_cond', 'dependencies_with_cond',
+                 'makefile_unconditional', 'include', 'license')
 
     section_label_pattern = \
         re.compile(r'^(Description|Comment|Status|Notice|Applicability|'
@@ -183,13 +257,29 @@ class GLModule(object):
     # List of characters allowed in shell identifiers.
     shell_id_chars = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_'
 
-    def __init__(self, config: GLConfig, path: str, patched: bool = False) -> None:
+    # Files that every module implicitly contains.
+    implicit_files = (joinpath('m4', '00gnulib.m4'),
+                      joinpath('m4', 'zzgnulib.m4'),
+                      joinpath('m4', 'gnulib-common.m4'))
+
+    def __init__(self, config: GLConfig, path: str, patched: bool = False,
+                 modulesystem: GLModuleSystem | None = None) -> None:
         '''Create new GLModule instance. Arguments are path and patched, where
         path is a string representing the path to the module and patched is a
-        bool indicating that module was created after applying patch.'''
-        self.args = dict()
-        self.cache = dict()
+        bool indicating that module was created after applying patch. The
+        optional modulesystem argument is the GLModuleSystem that creates the
+        module; it is shared by all modules of the configuration.'''
         self.content = ''
+        self.name = None
+        self.statuses = None
+        self.applicability = None
+        self.files = None
+        self.dependencies = None
+        self.dependencies_without_cond = None
+        self.dependencies_with_cond = None
+        self.makefile_unconditional = None
+        self.include = None
+        self.license = None
         if type(config) is not GLConfig:
             raise TypeError('config must be a GLConfig, not %s'
                             % type(config).__name__)
@@ -199,25 +289,42 @@ class GLModule(object):
         if type(patched) is not bool:
             raise TypeError('patched must be a bool, not %s'
                             % type(patched).__name__)
+        if modulesystem == None:
+            modulesystem = GLModuleSystem(config)
+        elif type(modulesystem) is not GLModuleSystem:
+            raise TypeError('modulesystem must be a GLModuleSystem, not %s'
+                            % type(modulesystem).__name__)
         self.path = path
         self.patched = patched
         self.config = config
-        self.filesystem = GLFileSystem(self.config)
-        self.modulesystem = GLModuleSystem(self.config)
-        # Read the module description file into memory.
-        with codecs.open(path, 'rb', 'UTF-8') as file:
-            self.content = file.read().replace('\r\n', '\n')
-        # Dissect it into sections.
-        self.sections = dict()
-        last_section_label = None
-        last_section_start = 0
-        for match in GLModule.section_label_pattern.finditer(self.content):
+        self.modulesystem = modulesystem
+        # The module index does not record patched modules, since they live
+        # in a temporary directory.
+        index = self.modulesystem.index
+        if patched:
+            index = None
+        self.sections = None
+        self.offsets = dict()
+        if index != None:
+            self.sections = index.getSections(path)
+        if self.sections == None:
+            # Read the module description file into memory.
+            with codecs.open(path, 'rb', 'UTF-8') as file:
+                self.content = file.read().replace('\r\n', '\n')
+            # Dissect it into sections. Only the boundaries of the sections are
+            # recorded here; the sections are extracted on first access.
+            self.sections = dict()
+            last_section_label = None
+            last_section_start = 0
+            for match in GLModule.section_label_pattern.finditer(self.content):
+                if last_section_label != None:
+                    self.offsets[last_section_label] = tuple([last_section_start, match.start()])
+                last_section_label = sys.intern(match.group(1))
+                last_section_start = match.end() + 1
             if last_section_label != None:
-                self.sections[last_section_label] = self.content[last_section_start : match.start()]
-            last_section_label = match.group(1)
-            last_section_start = match.end() + 1
-        if last_section_label != None:
-            self.sections[last_section_label] = self.content[last_section_start:]
+                self.offsets[last_section_label] = tuple([last_section_start, len(self.content)])
+            if index != None:
+                index.setSections(path, self._getSections())
 
     def __eq__(self, module: object) -> bool:
         '''x.__eq__(y) <==> x==y'''
@@ -282,11 +389,35 @@ class GLModule(object):
         result = '<pygnulib.GLModule %s %s>' % (repr(self.getName()), hex(id(self)))
         return result
 
+    def _getSection(self, label: str) -> str:
+        '''Return the section with the given label of the module description
+        file, or an empty string if the file has no such section. The section
+        is extracted from the contents of the file on first access. Once all
+        sections have been extracted, the contents of the file are dropped.'''
+        section = self.sections.get(label)
+        if section == None:
+            offsets = self.offsets.pop(label, None)
+            if offsets == None:
+                return ''
+            section = sys.intern(self.content[offsets[0]:offsets[1]])
+            self.sections[label] = section
+            if not self.offsets:
+                self.content = ''
+        return section
+
+    def _getSections(self) -> dict[str, str]:
+        '''Return all sections of the module description file, as a dictionary
+        from section label to section.'''
+        for label in list(self.offsets):
+            self._getSection(label)
+        return self.sections
+
     def getName(self) -> str:
         '''Return the name of the module.'''
-        pattern = re.compile(joinpath('modules', '(.*)$'))
-        result = pattern.findall(self.path)[0]
-        return result
+        if self.name == None:
+            pattern = re.compile(joinpath('modules', '(.*)$'))
+            self.name = sys.intern(pattern.findall(self.path)[0])
+        return self.name
 
     def isPatched(self) -> bool:
         '''Check whether module was created after applying patch.'''
@@ -446,34 +577,33 @@ class GLModule(object):
 
     def getDescription(self) -> str:
         '''Return description of the module.'''
-        return self.sections.get('Description', '')
+        return self._getSection('Description')
 
     def getComment(self) -> str:
         '''Return comment to module.'''
-        return self.sections.get('Comment', '')
+        return self._getSection('Comment')
 
     def getStatus(self) -> str:
         '''Return module status.'''
-        return self.sections.get('Status', '')
+        return self._getSection('Status')
 
     def getStatuses(self) -> list[str]:
         '''Return module status.'''
-        if 'statuses' not in self.cache:
+        if self.statuses == None:
             snippet = self.getStatus()
-            result = [ line.strip()
-                       for line in snippet.split('\n')
-                       if line.strip() ]
-            self.cache['statuses'] = result
-        return self.cache['statuses']
+            self.statuses = tuple([ sys.intern(line.strip())
+                                    for line in snippet.split('\n')
+                                    if line.strip() ])
+        return list(self.statuses)
 
     def getNotice(self) -> str:
         '''Return notice to module.'''
-        return self.sections.get('Notice', '')
+        return self._getSection('Notice')
 
     def getApplicability(self) -> str:
         '''Return applicability of module.'''
-        if 'applicability' not in self.cache:
-            result = self.sections.get('Applicability', '')
+        if self.applicability == None:
+            result = self._getSection('Applicability')
             result = result.strip()
             if not result:
                 # The default is 'main' or 'tests', depending on the module's name.
@@ -481,31 +611,28 @@ class GLModule(object):
                     result = 'tests'
                 else:
                     result = 'main'
-            self.cache['applicability'] = result
-        return self.cache['applicability']
+            self.applicability = sys.intern(result)
+        return self.applicability
 
     def getFiles_Raw(self) -> str:
         '''Return the unmodified list of files as a string.'''
-        return self.sections.get('Files', '')
+        return self._getSection('Files')
 
     def getFiles(self) -> list[str]:
         '''Return list of files.
         GLConfig: ac_version.'''
-        if 'files' not in self.cache:
+        if self.files == None:
             snippet = self.getFiles_Raw()
-            result = [ line.strip()
+            result = [ sys.intern(line.strip())
                        for line in snippet.split('\n')
                        if line.strip() ]
-            result.append(joinpath('m4', '00gnulib.m4'))
-            result.append(joinpath('m4', 'zzgnulib.m4'))
-            result.append(joinpath('m4', 'gnulib-common.m4'))
-            self.cache['files'] = result
-        return self.cache['files']
+            self.files = tuple(result) + GLModule.implicit_files
+        return list(self.files)
 
     def getDependencies(self) -> str:
         '''Return list of dependencies, as a snippet.
         GLConfig: localpath.'''
-        if 'dependencies' not in self.cache:
+        if self.dependencies == None:
             result = ''
             # ${module}-tests implicitly depends on ${module}, if that module exists.
             if self.getName().endswith('-tests'):
@@ -513,17 +640,17 @@ class GLModule(object):
                 if self.modulesystem.exists(main_module):
                     result += '%s\n' % main_module
             # Then the explicit dependencies listed in the module description.
-            snippet = self.sections.get('Depends-on', '')
+            snippet = self._getSection('Depends-on')
             # Remove comment lines.
             snippet = re.compile(r'^#.*$[\n]', re.M).sub(r'', snippet)
             result += snippet
-            self.cache['dependencies'] = result
-        return self.cache['dependencies']
+            self.dependencies = sys.intern(result)
+        return self.dependencies
 
     def getDependenciesWithoutConditions(self) -> list[GLModule | None]:
         '''Return list of dependencies, as a list of GLModule objects.
         GLConfig: localpath.'''
-        if 'dependenciesWithoutCond' not in self.cache:
+        if self.dependencies_without_cond == None:
             snippet = self.getDependencies()
             lines = [ line.strip()
                       for line in snippet.split('\n')
@@ -531,18 +658,17 @@ class GLModule(object):
             pattern = re.compile(r' *\[.*$')
             lines = [ pattern.sub(r'', line)
                       for line in lines ]
-            result = [ self.modulesystem.find(module)
-                       for module in lines
-                       if module != '' ]
-            self.cache['dependenciesWithoutCond'] = result
-        return self.cache['dependenciesWithoutCond']
+            self.dependencies_without_cond = tuple([ self.modulesystem.find(module)
+                                                     for module in lines
+                                                     if module != '' ])
+        return list(self.dependencies_without_cond)
 
     def getDependenciesWithConditions(self) -> list[tuple[GLModule, str | None]]:
         '''Return list of dependencies, as a list of pairs (GLModule object, condition).
         The "true" condition is denoted by None.
         GLConfig: localpath.'''
 
-        if 'dependenciesWithCond' not in self.cache:
+        if self.dependencies_with_cond == None:
             snippet = self.getDependencies()
             lines = [ line.strip()
                       for line in snippet.split('\n')
@@ -561,17 +687,19 @@ class GLModule(object):
                 if module != '':
                     if condition == 'true':
                         condition = None
+                    elif condition != None:
+                        condition = sys.intern(condition)
                     result.append(tuple([self.modulesystem.find(module), condition]))
-            self.cache['dependenciesWithCond'] = result
-        return self.cache['dependenciesWithCond']
+            self.dependencies_with_cond = tuple(result)
+        return list(self.dependencies_with_cond)
 
     def getAutoconfEarlySnippet(self) -> str:
         '''Return autoconf-early snippet.'''
-        return self.sections.get('configure.ac-early', '')
+        return self._getSection('configure.ac-early')
 
     def getAutoconfSnippet(self) -> str:
         '''Return autoconf snippet.'''
-        return self.sections.get('configure.ac', '')
+        return self._getSection('configure.ac')
 
     def getAutomakeSnippet(self) -> str:
         '''Get automake snippet.
@@ -587,7 +715,7 @@ class GLModule(object):
 
     def getAutomakeSnippet_Conditional(self) -> str:
         '''Return conditional automake snippet.'''
-        return self.sections.get('Makefile.am', '')
+        return self._getSection('Makefile.am')
 
     def getAutomakeSnippet_Unconditional(self) -> str:
         '''Return unconditional automake snippet.
@@ -595,7 +723,7 @@ class GLModule(object):
         auxdir = self.config['auxdir']
         ac_version = self.config['ac_version']
         result = ''
-        if 'makefile-unconditional' not in self.cache:
+        if self.makefile_unconditional == None:
             if self.getName().endswith('-tests'):
                 # *-tests module live in tests/, not lib/.
                 # Synthesize an EXTRA_DIST augmentation.
@@ -654,29 +782,28 @@ class GLModule(object):
                     result += 'EXTRA_DIST += %s' % ' '.join(buildaux_files)
                     result += '\n\n'
             result = constants.nlconvert(result)
-            self.cache['makefile-unconditional'] = result
-        return self.cache['makefile-unconditional']
+            self.makefile_unconditional = result
+        return self.makefile_unconditional
 
     def getInclude(self) -> str:
         '''Return include directive.'''
-        if 'include' not in self.cache:
-            snippet = self.sections.get('Include', '')
+        if self.include == None:
+            snippet = self._getSection('Include')
             pattern = re.compile(r'^(["<])', re.M)
-            result = pattern.sub(r'#include \1', snippet)
-            self.cache['include'] = result
-        return self.cache['include']
+            self.include = sys.intern(pattern.sub(r'#include \1', snippet))
+        return self.include
 
     def getLink(self) -> str:
         '''Return link directive.'''
-        return self.sections.get('Link', '')
+        return self._getSection('Link')
 
     def getLicense_Raw(self) -> str:
         '''Return module license.'''
-        return self.sections.get('License', '')
+        return self._getSection('License')
 
     def getLicense(self) -> str:
         '''Get license and warn user if module lacks a license.'''
-        if 'license' not in self.cache:
+        if self.license == None:
             license = self.getLicense_Raw().strip()
             # Warn if the License field is missing.
             if not self.getName().endswith('-tests'):
@@ -695,12 +822,266 @@ class GLModule(object):
                 # The default is GPL.
                 if not result:
                     result = 'GPL'
-            self.cache['license'] = result
-        return self.cache['license']
+            self.license = sys.intern(result)
+        return self.license
 
     def getMaintainer(self) -> str:
         '''Return maintainer directive.'''
-        return self.sections.get('Maintainer', '')
+        return self._getSection('Maintainer')
+
+
+#===============================================================================
+# Define GLModuleGraph class
+#===============================================================================
+class GLModuleGraph(object):
+    '''GLModuleGraph represents the dependency graph of the modules. Every
+    module is identified by an integer index, and the dependencies of every
+    module are stored as a list of (index, condition) pairs, so that graph
+    algorithms can work with sets of integers instead of GLModule objects.
+    Modules are added to the graph when they are first encountered, and the
+    dependencies of a module are determined when they are first requested.'''
+
+    def __init__(self, modulesystem: GLModuleSystem) -> None:
+        '''Create new GLModuleGraph instance.'''
+        if type(modulesystem) is not GLModuleSystem:
+            raise TypeError('modulesystem must be a GLModuleSystem, not %s'
+                            % type(modulesystem).__name__)
+        self.modulesystem = modulesystem
+        self.modules = list()  # GLModule of each index
+        self.indices = dict()  # Index of each GLModule
+        self.dependencies = list()  # Dependencies of each index, or None
+        self.duplicates = list()  # Duplicated dependencies of each index
+        self.tests = list()  # Index of the tests module of each index, or None
+        self.reverse = None  # Indices of the modules depending on each index
+        self.positions = None  # Row of each module name in the reachability matrix
+        self.rows = None  # Rows of the reachability matrix
+
+    def __repr__(self) -> str:
+        '''x.__repr__() <==> repr(x)'''
+        result = '<pygnulib.GLModuleGraph %s>' % hex(id(self))
+        return result
+
+    def __len__(self) -> int:
+        '''x.__len__() <==> len(x)'''
+        return len(self.modules)
+
+    def getIndex(self, module: GLModule) -> int:
+        '''Return the index of the given module, adding it to the graph if
+        necessary.'''
+        index = self.indices.get(module)
+        if index == None:
+            if type(module) is not GLModule:
+                raise TypeError('module must be a GLModule, not %s'
+                                % type(module).__name__)
+            index = len(self.modules)
+            self.indices[module] = index
+            self.modules.append(module)
+            self.dependencies.append(None)
+            self.duplicates.append(None)
+            self.tests.append(None)
+        return index
+
+    def getModule(self, index: int) -> GLModule:
+        '''Return the module with the given index.'''
+        return self.modules[index]
+
+    def getDependencies(self, index: int) -> list[tuple[int, str | None]]:
+        '''Return the dependencies of the module with the given index, as a
+        list of pairs (index, condition) without duplicates. The "true"
+        condition is denoted by None. If a dependency is listed more than
+        once, the condition of its first occurrence is used.'''
+        if self.dependencies[index] == None:
+            module = self.modules[index]
+            dependencies = list()
+            conditions = dict()
+            duplicates = list()
+            for depmodule, condition in module.getDependenciesWithConditions():
+                if depmodule == None:
+                    # The module does not exist; find() already warned about it.
+                    continue
+                depindex = self.getIndex(depmodule)
+                if depindex in conditions:
+                    if depmodule not in duplicates:
+                        duplicates.append(depmodule)
+                else:  # if depindex not in conditions
+                    conditions[depindex] = condition
+                    dependencies.append(tuple([depindex, condition]))
+            self.dependencies[index] = dependencies
+            self.duplicates[index] = duplicates
+        return self.dependencies[index]
+
+    def getDuplicates(self, index: int) -> list[GLModule]:
+        '''Return the dependencies that are listed more than once in the
+        description of the module with the given index.'''
+        self.getDependencies(index)
+        return self.duplicates[index]
+
+    def getTestsIndex(self, index: int) -> int:
+        '''Return the index of the tests module of the module with the given
+        index, or -1 if there is no such module.'''
+        if self.tests[index] == None:
+            testsname = self.modules[index].getTestsName()
+            result = -1
+            if self.modulesystem.exists(testsname):
+                testsmodule = self.modulesystem.find(testsname)
+                result = self.getIndex(testsmodule)
+            self.tests[index] = result
+        return self.tests[index]
+
+    def load(self) -> None:
+        '''Add all available modules, including the tests modules, and their
+        dependencies to the graph.'''
+        for name in self.modulesystem.list(True):
+            if self.modulesystem.exists(name):
+                index = self.getIndex(self.modulesystem.find(name))
+                self.getDependencies(index)
+
+    def getReverseDependencies(self, index: int) -> list[int]:
+        '''Return the indices of the modules that depend directly on the module
+        with the given index, regardless of conditions. The reverse adjacency
+        lists are built from the whole graph on first use.'''
+        if self.reverse == None:
+            self.load()
+            reverse = [ list()
+                        for module in self.modules ]
+            for depender in range(len(self.modules)):
+                for depindex, condition in self.getDependencies(depender):
+                    reverse[depindex].append(depender)
+            self.reverse = reverse
+        return self.reverse[index]
+
+    def getReverseDependenciesRecursively(self, index: int) -> set[int]:
+        '''Return the indices of the modules that depend on the module with the
+        given index, directly or indirectly, regardless of conditions. Like
+        GLModule.getDependenciesRecursively(), the result includes the module
+        itself.'''
+        handledmodules = { index }
+        inmodules = [index]
+        while inmodules:
+            inmodules_this_round = inmodules
+            inmodules = list()  # Accumulator, queue for next round
+            for module in inmodules_this_round:
+                for depender in self.getReverseDependencies(module):
+                    if depender not in handledmodules:
+                        handledmodules.add(depender)
+                        inmodules.append(depender)
+        return handledmodules
+
+    def computeReachability(self) -> None:
+        '''Compute the reachability matrix of the whole graph: for every module,
+        the set of modules that it pulls in through its dependencies, ignoring
+        conditions, statuses and tests modules, like
+        GLModule.getDependenciesRecursively(). Every module pulls in itself.
+        If the module index is enabled, the matrix is stored next to it and
+        reused as long as the dependencies of all modules are unchanged.'''
+        if self.rows != None:
+            return
+        self.load()
+        indices = sorted(range(len(self.modules)),
+                         key=lambda index: str(self.modules[index]))
+        names = [ str(self.modules[index])
+                  for index in indices ]
+        positions = dict()
+        for position, index in enumerate(indices):
+            positions[index] = position
+        adjacency = [ [ positions[depindex]
+                        for depindex, condition in self.getDependencies(index) ]
+                      for index in indices ]
+        # The fingerprint covers the names and the dependencies of all modules.
+        lines = [ '%s: %s\n' % (name, ' '.join([ names[depposition]
+                                                 for depposition in depmodules ]))
+                  for name, depmodules in zip(names, adjacency) ]
+        fingerprint = hashlib.sha1(''.join(lines).encode('utf-8')).hexdigest()
+        index = self.modulesystem.index
+        matrix = None
+        if index != None:
+            matrix = index.getReachability(fingerprint)
+        if matrix == None:
+            rows = GLModuleGraph._reachabilityRows(adjacency)
+            if index != None:
+                index.setReachability(fingerprint, names, rows)
+        else:  # if matrix != None
+            names, rows = matrix
+        self.positions = dict()
+        for position, name in enumerate(names):
+            self.positions[name] = position
+        self.rows = rows
+
+    @staticmethod
+    def _reachabilityRows(adjacency: list[list[int]]) -> list[int]:
+        '''Return the rows of the reachability matrix of the graph with the
+        given adjacency lists, as integers used as bit sets. This uses Tarjan's
+        algorithm, which finds the strongly connected components in reverse
+        topological order, so that the rows of all successors of a component
+        are complete when the component is found.'''
+        count = len(adjacency)
+        rows = [0] * count
+        numbers = [-1] * count
+        lowlinks = [0] * count
+        onstack = [False] * count
+        stack = []
+        counter = 0
+        for root in range(count):
+            if numbers[root] >= 0:
+                continue
+            work = [tuple([root, 0])]
+            while work:
+                node, position = work.pop()
+                if position == 0:
+                    numbers[node] = counter
+                    lowlinks[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    onstack[node] = True
+                successors = adjacency[node]
+                descended = False
+                while position < len(successors):
+                    successor = successors[position]
+                    position += 1
+                    if numbers[successor] < 0:
+                        work.append(tuple([node, position]))
+                        work.append(tuple([successor, 0]))
+                        descended = True
+                        break
+                    elif onstack[successor]:
+                        lowlinks[node] = min(lowlinks[node], numbers[successor])
+                if descended:
+                    continue
+                if lowlinks[node] == numbers[node]:
+                    # node is the root of a strongly connected component.
+                    component = list()
+                    while True:
+                        member = stack.pop()
+                        onstack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    bits = 0
+                    for member in component:
+                        bits |= 1 << member
+                    for member in component:
+                        for successor in adjacency[member]:
+                            bits |= rows[successor]
+                    for member in component:
+                        rows[member] = bits
+                if work:
+                    parent = work[-1][0]
+                    lowlinks[parent] = min(lowlinks[parent], lowlinks[node])
+        return rows
+
+    def pullsIn(self, module: GLModule, depmodule: GLModule) -> bool:
+        '''Check whether module pulls in depmodule through its dependencies,
+        using the reachability matrix.'''
+        self.computeReachability()
+        row = self.rows[self.positions[str(module)]]
+        return bool(row >> self.positions[str(depmodule)] & 1)
+
+    def getClosureSize(self, module: GLModule) -> int:
+        '''Return the number of modules that module pulls in through its
+        dependencies, including itself, using the reachability matrix.'''
+        self.computeReachability()
+        row = self.rows[self.positions[str(module)]]
+        return bin(row).count('1')
 
 
 #===============================================================================
@@ -735,6 +1116,11 @@ class GLModuleTable(object):
         - getCondition(A, B)
           returns the condition when B should be enabled as a dependency of A,
           once the m4 code for A has been executed.
+
+        Method for explaining the transitive closure:
+        - getDependencyChain(B)
+          returns the shortest chain of dependencies from a requested module
+          to B.
         '''
         self.dependers = dict()  # Dependencies
         self.conditionals = dict()  # Conditional modules
@@ -743,6 +1129,7 @@ class GLModuleTable(object):
         self.main_modules = list()  # Main modules
         self.tests_modules = list()  # Tests modules
         self.final_modules = list()  # Final modules
+        self.parents = dict()  # Parent and condition of each included module
         if type(config) is not GLConfig:
             raise TypeError('config must be a GLConfig, not %s'
                             % type(config).__name__)
@@ -839,90 +1226,71 @@ class GLModuleTable(object):
         then do not add dependencies which are in these categories. If conddeps are enabled,
         then store condition for each dependency if it has a condition. This method
         is used to update final list of modules. Method returns list of modules.
+        The traversal works on the module indices of the shared GLModuleGraph.
         GLConfig: incl_test_categories, excl_test_categories.'''
         for module in modules:
             if type(module) is not GLModule:
                 raise TypeError('each module must be a GLModule instance')
+        graph = self.modulesystem.getGraph()
+        conddeps = self.config['conddeps']
+        inctests = self.config.checkInclTestCategory(TESTS['tests'])
+        avoids = { graph.getIndex(module)
+                   for module in self.avoids }
         # In order to process every module only once (for speed), process an
         # "input list" of modules, producing an "output list" of modules. During
         # each round, more modules can be queued in the input list. Once a
         # module on the input list has been processed, it is added to the
-        # "handled list", so we can avoid to process it again.
+        # "handled set", so we can avoid to process it again.
         inc_all_tests = self.inc_all_direct_tests
-        handledmodules = list()
-        inmodules = modules
-        outmodules = list()
-        if self.config['conddeps']:
+        included = dict()  # Whether to include a dependency, by index
+        handledmodules = set()
+        inmodules = [ graph.getIndex(module)
+                      for module in modules ]
+        outmodules = set()
+        # Breadth-first search reaches every module first through one of the
+        # shortest chains. Record the parent of each module on that chain.
+        self.parents = dict()
+        reachedmodules = set(inmodules)
+        if conddeps:
             for module in modules:
                 if module not in self.avoids:
                     self.addUnconditional(module)
         while inmodules:
             inmodules_this_round = inmodules
-            inmodules = list()               # Accumulator, queue for next round
-            for module in inmodules_this_round:
-                if module not in self.avoids:
-                    outmodules += [module]
-                    if self.config['conddeps']:
+            nextmodules = set()  # Accumulator, queue for next round
+            for index in inmodules_this_round:
+                if index not in avoids:
+                    outmodules.add(index)
+                    module = graph.getModule(index)
+                    if conddeps:
                         conditional = self.isConditional(module)
-                    dependencies = module.getDependenciesWithConditions()
-                    depmodules = [ pair[0]
-                                   for pair in dependencies ]
-                    conditions = [ pair[1]
-                                   for pair in dependencies ]
+                    dependencies = graph.getDependencies(index)
                     # Duplicate dependencies are harmless, but Jim wants a warning.
-                    duplicate_depmodules = [ depmodule
-                                             for depmodule in set(depmodules)
-                                             if depmodules.count(depmodule) > 1 ]
+                    duplicate_depmodules = graph.getDuplicates(index)
                     if duplicate_depmodules:
                         duplicate_depmodule_names = [ str(depmodule)
                                                       for depmodule in duplicate_depmodules ]
                         message = ('gnulib-tool: warning: module %s has duplicated dependencies: %s\n'
                                    % (module, duplicate_depmodule_names))
                         sys.stderr.write(message)
-                    if self.config.checkInclTestCategory(TESTS['tests']):
-                        testsname = module.getTestsName()
-                        if self.modulesystem.exists(testsname):
-                            testsmodule = self.modulesystem.find(testsname)
-                            depmodules += [testsmodule]
-                            conditions += [None]
-                    for depmodule in depmodules:
+                    if inctests:
+                        testsindex = graph.getTestsIndex(index)
+                        if testsindex >= 0:
+                            if not any(depindex == testsindex
+                                       for depindex, condition in dependencies):
+                                dependencies = dependencies + [tuple([testsindex, None])]
+                    for depindex, condition in dependencies:
                         # Determine whether to include the dependency or tests module.
-                        include = True
-                        statuses = depmodule.getStatuses()
-                        for word in statuses:
-                            if word == 'obsolete':
-                                if not self.config.checkInclTestCategory(TESTS['obsolete']):
-                                    include = False
-                            elif word == 'c++-test':
-                                if self.config.checkExclTestCategory(TESTS['c++-test']):
-                                    include = False
-                                if not (inc_all_tests or self.config.checkInclTestCategory(TESTS['c++-test'])):
-                                    include = False
-                            elif word == 'longrunning-test':
-                                if self.config.checkExclTestCategory(TESTS['longrunning-test']):
-                                    include = False
-                                if not (inc_all_tests or self.config.checkInclTestCategory(TESTS['longrunning-test'])):
-                                    include = False
-                            elif word == 'privileged-test':
-                                if self.config.checkExclTestCategory(TESTS['privileged-test']):
-                                    include = False
-                                if not (inc_all_tests or self.config.checkInclTestCategory(TESTS['privileged-test'])):
-                                    include = False
-                            elif word == 'unportable-test':
-                                if self.config.checkExclTestCategory(TESTS['unportable-test']):
-                                    include = False
-                                if not (inc_all_tests or self.config.checkInclTestCategory(TESTS['unportable-test'])):
-                                    include = False
-                            elif word.endswith('-test'):
-                                if not inc_all_tests:
-                                    include = False
-                        if include and depmodule not in self.avoids:
-                            inmodules += [depmodule]
-                            if self.config['conddeps']:
-                                index = depmodules.index(depmodule)
-                                condition = conditions[index]
-                                if condition == True:
-                                    condition = None
+                        if depindex not in included:
+                            depmodule = graph.getModule(depindex)
+                            included[depindex] = self._includeDependency(depmodule, inc_all_tests)
+                        if included[depindex] and depindex not in avoids:
+                            nextmodules.add(depindex)
+                            if depindex not in reachedmodules:
+                                reachedmodules.add(depindex)
+                                self.parents[graph.getModule(depindex)] = tuple([module, condition])
+                            if conddeps:
+                                depmodule = graph.getModule(depindex)
                                 if condition:
                                     self.addConditional(module, depmodule, condition)
                                 else:  # if condition
@@ -930,17 +1298,75 @@ class GLModuleTable(object):
                                         self.addConditional(module, depmodule, True)
                                     else:  # if not conditional
                                         self.addUnconditional(depmodule)
-            handledmodules = sorted(set(handledmodules + inmodules_this_round))
+            handledmodules.update(inmodules_this_round)
             # Remove handledmodules from inmodules.
-            inmodules = [module
-                         for module in inmodules
-                         if module not in handledmodules]
-            inmodules = sorted(set(inmodules))
-            inc_all_tests = self.inc_all_indirect_tests
-        modules = sorted(set(outmodules))
+            inmodules = sorted(nextmodules.difference(handledmodules),
+                               key=lambda index: graph.getModule(index))
+            if inc_all_tests != self.inc_all_indirect_tests:
+                inc_all_tests = self.inc_all_indirect_tests
+                included = dict()
+        modules = sorted(graph.getModule(index)
+                         for index in outmodules)
         self.modules = modules
         return list(modules)
 
+    def getDependencyChain(self, module: GLModule) -> list[tuple[GLModule, str | None]]:
+        '''Return the shortest chain of dependencies through which the last
+        transitive_closure() included the given module, as a list of pairs
+        (GLModule, condition). The chain starts with one of the requested
+        modules and ends with the given module. The condition of each pair is
+        the condition of the dependency that leads to that module; it is None
+        for the first module and for unconditional dependencies. If the module
+        was not included, the result is an empty list.'''
+        if type(module) is not GLModule:
+            raise TypeError('module must be a GLModule, not %s'
+                            % type(module).__name__)
+        if module not in self.modules:
+            return []
+        chain = list()
+        condition = None
+        while module in self.parents:
+            parent, condition = self.parents[module]
+            chain.insert(0, tuple([module, condition]))
+            module = parent
+        chain.insert(0, tuple([module, None]))
+        return chain
+
+    def _includeDependency(self, module: GLModule, inc_all_tests: bool) -> bool:
+        '''Determine whether to include the given dependency or tests module in
+        the transitive closure, depending on its status.
+        GLConfig: incl_test_categories, excl_test_categories.'''
+        include = True
+        statuses = module.getStatuses()
+        for word in statuses:
+            if word == 'obsolete':
+                if not self.config.checkInclTestCategory(TESTS['obsolete']):
+                    include = False
+            elif word == 'c++-test':
+                if self.config.checkExclTestCategory(TESTS['c++-test']):
+                    include = False
+                if not (inc_all_tests or self.config.checkInclTestCategory(TESTS['c++-test'])):
+                    include = False
+            elif word == 'longrunning-test':
+                if self.config.checkExclTestCategory(TESTS['longrunning-test']):
+                    include = False
+                if not (inc_all_tests or self.config.checkInclTestCategory(TESTS['longrunning-test'])):
+                    include = False
+            elif word == 'privileged-test':
+                if self.config.checkExclTestCategory(TESTS['privileged-test']):
+                    include = False
+                if not (inc_all_tests or self.config.checkInclTestCategory(TESTS['privileged-test'])):
+                    include = False
+            elif word == 'unportable-test':
+                if self.config.checkExclTestCategory(TESTS['unportable-test']):
+                    include = False
+                if not (inc_all_tests or self.config.checkInclTestCategory(TESTS['unportable-test'])):
+                    include = False
+            elif word.endswith('-test'):
+                if not inc_all_tests:
+                    include = False
+        return include
+
     def transitive_closure_separately(self, basemodules: list[GLModule],
                                       finalmodules: list[GLModule]) -> tuple[list[GLModule], list[GLModule]]:
         '''Determine main module list and tests-related module list separately.
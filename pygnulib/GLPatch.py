@@ -0,0 +1,167 @@
+# Copyright (C) 2002-2024 Free Software Foundation, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+#===============================================================================
+# Define global imports
+#===============================================================================
+import re
+from . import constants
+
+
+#===============================================================================
+# Define module information
+#===============================================================================
+__author__ = constants.__author__
+__license__ = constants.__license__
+__copyright__ = constants.__copyright__
+
+
+#===============================================================================
+# Define global functions
+#===============================================================================
+def split_lines(data: bytes) -> list[bytes]:
+    '''Split data into lines, keeping the newline characters. Unlike
+    bytes.splitlines, only '\\n' terminates a line.'''
+    lines = [ line + b'\n'
+              for line in data.split(b'\n') ]
+    # The last element is either empty or lacks the newline.
+    lines[-1] = lines[-1][:-1]
+    if not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def apply_unified_diff(data: bytes, diff: bytes) -> bytes | None:
+    '''Apply the unified diff to the contents data of a file, like
+    'patch -s file < diff' does, and return the resulting contents.
+    Return None if diff is not a unified diff of a single file, or if one of
+    its hunks does not apply without fuzz; in that case the caller should let
+    the 'patch' program handle it.'''
+    hunk_header = re.compile(rb'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+    def strip_no_newline(kind: bytes, oldlines: list[bytes], newlines: list[bytes]) -> None:
+        # '\ No newline at end of file' applies to the preceding line.
+        if kind in [b' ', b'-']:
+            oldlines[-1] = oldlines[-1][:-1]
+        if kind in [b' ', b'+']:
+            newlines[-1] = newlines[-1][:-1]
+
+    difflines = split_lines(diff)
+    # Collect the hunks as tuples (old start, old lines, new lines, number of
+    # context lines at the start, number of context lines at the end).
+    hunks = list()
+    headers = 0
+    context = 0  # Largest number of context lines before or after a change
+    pos = 0
+    while pos < len(difflines):
+        line = difflines[pos]
+        pos += 1
+        if line.startswith(b'--- ') and pos < len(difflines) and difflines[pos].startswith(b'+++ '):
+            headers += 1
+            pos += 1
+            continue
+        match = hunk_header.match(line)
+        if not match:
+            if hunks:
+                # Trailing text is ignored, unless more of the diff follows.
+                if any(line.startswith((b'--- ', b'@@ '))
+                       for line in difflines[pos:]):
+                    return None
+                break
+            continue  # Skip the leading text.
+        oldcount = int(match.group(2) or b'1')
+        newcount = int(match.group(4) or b'1')
+        oldstart = int(match.group(1))
+        oldlines = list()
+        newlines = list()
+        kinds = list()
+        last = None
+        while len(oldlines) < oldcount or len(newlines) < newcount:
+            if pos == len(difflines):
+                return None
+            line = difflines[pos]
+            pos += 1
+            if line == b'\n':
+                # A context line whose trailing space was removed.
+                line = b' \n'
+            kind = line[:1]
+            if kind == b' ':
+                oldlines.append(line[1:])
+                newlines.append(line[1:])
+            elif kind == b'-':
+                oldlines.append(line[1:])
+            elif kind == b'+':
+                newlines.append(line[1:])
+            elif kind == b'\\' and last != None:
+                strip_no_newline(last, oldlines, newlines)
+                continue
+            else:
+                return None
+            kinds.append(kind)
+            last = kind
+        if pos < len(difflines) and difflines[pos].startswith(b'\\'):
+            pos += 1
+            strip_no_newline(last, oldlines, newlines)
+        if len(oldlines) != oldcount or len(newlines) != newcount:
+            return None
+        # Count the context lines at the start and at the end of the hunk.
+        prefix = 0
+        while prefix < len(kinds) and kinds[prefix] == b' ':
+            prefix += 1
+        suffix = 0
+        while suffix < len(kinds) - prefix and kinds[-1 - suffix] == b' ':
+            suffix += 1
+        context = max(context, prefix, suffix)
+        if oldcount == 0:
+            # The lines are inserted after line oldstart.
+            oldstart += 1
+        hunks.append(tuple([oldstart - 1, oldlines, newlines, prefix, suffix]))
+    if headers != 1 or not hunks:
+        return None
+    # Apply the hunks. Like 'patch', look for each hunk at the line given in
+    # the diff, shifted by the offset at which the previous hunk applied, and
+    # then at increasing distances, trying later lines first. A hunk with
+    # less context at its start (end) than the others can only apply at the
+    # start (end) of the file.
+    lines = split_lines(data)
+    result = list()
+    done = 0  # Number of lines of data that have been processed
+    offset = 0
+    for start, oldlines, newlines, prefix, suffix in hunks:
+        guess = start + offset
+        if prefix < context and start == 0:
+            candidates = [0]
+        elif suffix < context:
+            candidates = [len(lines) - len(oldlines)]
+        else:  # if the hunk has full context
+            candidates = ( candidate
+                           for distance in range(0, len(lines) + 1)
+                           for candidate in [guess + distance, guess - distance] )
+        found = -1
+        for candidate in candidates:
+            if (done <= candidate <= len(lines) - len(oldlines)
+                    and lines[candidate:candidate + len(oldlines)] == oldlines):
+                found = candidate
+                break
+        if found < 0:
+            return None
+        offset = found - start
+        result += lines[done:found]
+        result += newlines
+        done = found + len(oldlines)
+    result += lines[done:]
+    return b''.join(result)
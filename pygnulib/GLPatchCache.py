@@ -0,0 +1,157 @@
+# Copyright (C) 2002-2024 Free Software Foundation, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+#===============================================================================
+# Define global imports
+#===============================================================================
+import os
+import time
+import shutil
+import hashlib
+import tempfile
+from . import constants
+from .GLModuleIndex import GLModuleIndex
+
+
+#===============================================================================
+# Define module information
+#===============================================================================
+__author__ = constants.__author__
+__license__ = constants.__license__
+__copyright__ = constants.__copyright__
+
+
+#===============================================================================
+# Define global constants
+#===============================================================================
+joinpath = constants.joinpath
+
+# The patch caches that have been opened so far, by directory.
+_caches = dict()
+
+
+def get_patch_cache() -> GLPatchCache:
+    '''Return the patch cache of this process. The cache is pruned at most
+    once per process, after the first file has been added to it.'''
+    directory = joinpath(GLModuleIndex.directory(), 'patched')
+    if directory not in _caches:
+        _caches[directory] = GLPatchCache(directory)
+    return _caches[directory]
+
+
+#===============================================================================
+# Define GLPatchCache class
+#===============================================================================
+class GLPatchCache(object):
+    '''GLPatchCache is a persistent, content-addressed cache of the files that
+    result from applying the .diff files of the --local-dir directories to a
+    file. An entry is keyed by the hash of the original file and the hashes
+    of the .diff files in the order in which they are applied, so an entry
+    never becomes stale; entries are only removed when they are older than
+    max_age seconds or when the cache grows beyond max_size bytes.'''
+
+    # Entries that have not been used for this many seconds are removed.
+    max_age = 30 * 24 * 60 * 60
+
+    # When the cache grows beyond this many bytes, the least recently used
+    # entries are removed.
+    max_size = 64 * 1024 * 1024
+
+    def __init__(self, directory: str) -> None:
+        '''Create new GLPatchCache instance, whose entries are stored in the
+        given directory.'''
+        if type(directory) is not str:
+            raise TypeError('directory must be a string, not %s'
+                            % type(directory).__name__)
+        self.directory = directory
+        self.pruned = False
+
+    def __repr__(self) -> str:
+        '''x.__repr__() <==> repr(x)'''
+        result = '<pygnulib.GLPatchCache %s>' % hex(id(self))
+        return result
+
+    @staticmethod
+    def _hashFile(path: str) -> str:
+        '''Return the SHA-256 hash of the contents of the given file.'''
+        with open(path, 'rb') as file:
+            return hashlib.sha256(file.read()).hexdigest()
+
+    def key(self, original: str, patches: list[str]) -> str:
+        '''Return the key of the file that results from applying the given
+        .diff files, in the given order, to the original file.'''
+        digest = hashlib.sha256()
+        for path in [original] + patches:
+            digest.update(GLPatchCache._hashFile(path).encode('ascii'))
+            digest.update(b'\n')
+        return digest.hexdigest()
+
+    def get(self, key: str) -> str | None:
+        '''Return the path of the cached file with the given key, or None if
+        there is no such file. A hit marks the entry as recently used.'''
+        path = joinpath(self.directory, key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def put(self, key: str, path: str) -> None:
+        '''Store a copy of the file at path under the given key. Failure to
+        store the file is not an error; the cache is only an optimization.'''
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmpfile = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as file:
+                    with open(path, 'rb') as source:
+                        shutil.copyfileobj(source, file)
+                shutil.copymode(path, tmpfile)
+                os.replace(tmpfile, joinpath(self.directory, key))
+            except BaseException:
+                os.remove(tmpfile)
+                raise
+        except OSError:
+            return
+        if not self.pruned:
+            self.prune()
+
+    def prune(self) -> None:
+        '''Remove the entries that are older than max_age seconds, and then
+        the least recently used entries until the cache is at most max_size
+        bytes large.'''
+        self.pruned = True
+        now = time.time()
+        entries = list()
+        try:
+            with os.scandir(self.directory) as iterator:
+                for entry in iterator:
+                    if entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        entries.append(tuple([stat.st_mtime, stat.st_size, entry.path]))
+        except OSError:
+            return
+        entries.sort()
+        size = sum(entry[1] for entry in entries)
+        for mtime, entrysize, path in entries:
+            if now - mtime <= GLPatchCache.max_age and size <= GLPatchCache.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            size -= entrysize
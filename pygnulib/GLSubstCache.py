@@ -0,0 +1,165 @@
+# Copyright (C) 2002-2024 Free Software Foundation, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+#===============================================================================
+# Define global imports
+#===============================================================================
+import os
+import shutil
+import hashlib
+import tempfile
+import subprocess as sp
+from . import constants
+from .GLModuleIndex import GLModuleIndex
+from .GLPatchCache import GLPatchCache
+
+
+#===============================================================================
+# Define module information
+#===============================================================================
+__author__ = constants.__author__
+__license__ = constants.__license__
+__copyright__ = constants.__copyright__
+
+
+#===============================================================================
+# Define global constants
+#===============================================================================
+UTILS = constants.UTILS
+joinpath = constants.joinpath
+
+# The traces that have been computed or loaded so far in this process, by key.
+_traces = dict()
+
+
+#===============================================================================
+# Define GLSubstCache class
+#===============================================================================
+class GLSubstCache(GLPatchCache):
+    '''GLSubstCache is a persistent cache of the variables that configure.ac
+    substitutes, as reported by "autoconf -t 'AC_SUBST:$1 = @$1@'". An entry
+    is keyed by the hashes of configure.ac, of aclocal.m4 and acinclude.m4,
+    and of the *.m4 files in the m4base directory, which are the files that
+    autoconf reads. Entries are removed in the same way as in GLPatchCache.'''
+
+    def __init__(self, directory: str | None = None) -> None:
+        '''Create new GLSubstCache instance. By default, the entries are stored
+        next to the module index.'''
+        if directory == None:
+            directory = joinpath(GLModuleIndex.directory(), 'subst')
+        super().__init__(directory)
+
+    def __repr__(self) -> str:
+        '''x.__repr__() <==> repr(x)'''
+        result = '<pygnulib.GLSubstCache %s>' % hex(id(self))
+        return result
+
+    @staticmethod
+    def inputs(configure_ac: str, m4base: str) -> list[str]:
+        '''Return the files that "autoconf -t" reads for the given configure.ac,
+        apart from the files of the autoconf installation.'''
+        destdir = os.path.dirname(configure_ac)
+        result = [configure_ac]
+        for name in ['aclocal.m4', 'acinclude.m4']:
+            if os.path.isfile(joinpath(destdir, name)):
+                result.append(joinpath(destdir, name))
+        try:
+            with os.scandir(joinpath(destdir, m4base)) as iterator:
+                result += sorted(entry.path for entry in iterator
+                                 if entry.name.endswith('.m4') and entry.is_file())
+        except OSError:
+            pass
+        return result
+
+    def traceKey(self, configure_ac: str, m4base: str) -> str:
+        '''Return the key of the trace of the given configure.ac. The key also
+        covers the autoconf program that is used.'''
+        digest = hashlib.sha256()
+        autoconf = shutil.which(UTILS['autoconf']) or UTILS['autoconf']
+        try:
+            stat = os.stat(autoconf)
+            digest.update(('%s %d %d\n' % (autoconf, stat.st_size, stat.st_mtime_ns)).encode('utf-8'))
+        except OSError:
+            digest.update(('%s\n' % autoconf).encode('utf-8'))
+        for path in GLSubstCache.inputs(configure_ac, m4base):
+            digest.update(('%s\n' % os.path.relpath(path, os.path.dirname(configure_ac))).encode('utf-8'))
+            digest.update(GLPatchCache._hashFile(path).encode('ascii'))
+            digest.update(b'\n')
+        return digest.hexdigest()
+
+    def getLines(self, key: str) -> list[str] | None:
+        '''Return the trace with the given key, or None if there is no such
+        trace.'''
+        path = self.get(key)
+        if path == None:
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                return file.read().splitlines()
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def putLines(self, key: str, lines: list[str]) -> None:
+        '''Store the given trace under the given key. Failure to store the trace
+        is not an error; the cache is only an optimization.'''
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmpfile = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                    file.write(''.join('%s\n' % line for line in lines))
+                os.replace(tmpfile, joinpath(self.directory, key))
+            except BaseException:
+                os.remove(tmpfile)
+                raise
+        except OSError:
+            return
+        if not self.pruned:
+            self.prune()
+
+
+def trace_substitutions(configure_ac: str, m4base: str, persistent: bool) -> tuple[list[str] | None, str]:
+    '''Return the sorted, unique lines 'VAR = @VAR@' for the variables that the
+    given configure.ac substitutes, and an empty string; or None and the error
+    output of autoconf if it failed. The trace is computed once per process
+    for the same inputs; if persistent is True, it is also looked up in and
+    stored into the persistent cache.'''
+    cache = GLSubstCache()
+    try:
+        key = cache.traceKey(configure_ac, m4base)
+    except OSError:
+        # Let autoconf report the missing or unreadable file.
+        key = None
+        persistent = False
+    if key in _traces:
+        return tuple([_traces[key], ''])
+    lines = None
+    if persistent:
+        lines = cache.getLines(key)
+    if lines == None:
+        result = sp.run([UTILS['autoconf'], '-t', 'AC_SUBST:$1 = @$1@', configure_ac],
+                        capture_output=True)
+        if result.returncode != 0:
+            return tuple([None, result.stderr.decode(encoding='utf-8')])
+        # sort -u
+        lines = sorted(set(x.strip()
+                           for x in result.stdout.decode(encoding='utf-8').splitlines()))
+        if persistent:
+            cache.putLines(key, lines)
+    if key != None:
+        _traces[key] = lines
+    return tuple([lines, ''])
@@ -54,6 +54,7 @@ TESTS = constants.TESTS
 joinpath = constants.joinpath
 relinverse = constants.relinverse
 copyfile = constants.copyfile
+map_in_order = constants.map_in_order
 ensure_writable = constants.ensure_writable
 movefile = constants.movefile
 lines_to_multiline = constants.lines_to_multiline
@@ -167,6 +168,41 @@ class GLTestDir(object):
         result = sorted(set(result))
         return list(result)
 
+    def lookup_file(self, row: tuple[str, str]) -> tuple[str, bool]:
+        '''Look up the file row[1] in gnulib and the local directories, as
+        GLFileSystem.lookup does.'''
+        src = row[1]
+        if src.startswith('tests=lib/'):
+            src = constants.substart('tests=lib/', 'lib/', src)
+        return self.filesystem.lookup(src)
+
+    def copy_file(self, row: tuple[str, str], lookedup: str, flag: bool) -> None:
+        '''Copy the file row[1] from gnulib to row[0] in the testdir, or make a
+        symbolic link or hard link to it. lookedup and flag are the result of
+        lookup_file for row. The directory of row[0] is known to exist.
+        GLConfig: copymode, lcopymode.'''
+        src = row[1]
+        dest = row[0]
+        destpath = joinpath(self.testdir, dest)
+        if src.startswith('tests=lib/'):
+            src = constants.substart('tests=lib/', 'lib/', src)
+        if isfile(destpath):
+            os.remove(destpath)
+        if flag:
+            copyfile(lookedup, destpath)
+            ensure_writable(destpath)
+        else:  # if not flag
+            if self.filesystem.shouldLink(src, lookedup) == CopyAction.Symlink:
+                constants.link_relative(lookedup, destpath)
+            elif self.filesystem.shouldLink(src, lookedup) == CopyAction.Hardlink:
+                constants.hardlink(lookedup, destpath)
+            elif self.filesystem.shouldLink(src, lookedup) == CopyAction.Reflink:
+                constants.reflink(lookedup, destpath)
+                ensure_writable(destpath)
+            else:
+                copyfile(lookedup, destpath)
+                ensure_writable(destpath)
+
     def execute(self) -> None:
         '''Create a scratch package with the given modules.'''
         auxdir = self.config['auxdir']
@@ -365,29 +401,18 @@ class GLTestDir(object):
         for src in filelist:
             dest = self.rewrite_files([src])[-1]
             filetable += [tuple([dest, src])]
-        for row in filetable:
-            src = row[1]
-            dest = row[0]
-            destpath = joinpath(self.testdir, dest)
-            dirname = os.path.dirname(destpath)
-            if not isdir(dirname):
-                os.makedirs(dirname)
-            if src.startswith('tests=lib/'):
-                src = constants.substart('tests=lib/', 'lib/', src)
-            lookedup, flag = self.filesystem.lookup(src)
-            if isfile(destpath):
-                os.remove(destpath)
-            if flag:
-                copyfile(lookedup, destpath)
-                ensure_writable(destpath)
-            else:  # if not flag
-                if self.filesystem.shouldLink(src, lookedup) == CopyAction.Symlink:
-                    constants.link_relative(lookedup, destpath)
-                elif self.filesystem.shouldLink(src, lookedup) == CopyAction.Hardlink:
-                    constants.hardlink(lookedup, destpath)
-                else:
-                    copyfile(lookedup, destpath)
-                    ensure_writable(destpath)
+        constants.make_directories([ os.path.dirname(joinpath(self.testdir, row[0]))
+                                     for row in filetable ])
+        # The files are looked up in a pool of threads, since combining a file
+        # from .diff files takes time; they are copied in the order of
+        # filetable, and the first file that cannot be looked up stops the loop.
+        lookups = map_in_order(self.lookup_file, filetable, self.config['jobs'])
+        try:
+            for row in filetable:
+                lookedup, flag = next(lookups)
+                self.copy_file(row, lookedup, flag)
+        finally:
+            lookups.close()
 
         # Create $sourcebase/Makefile.am.
         for_test = True
@@ -33,11 +33,16 @@ try:
     from .GLFileSystem import CopyAction
     from .GLFileSystem import GLFileSystem
     from .GLFileSystem import GLFileAssistant
+    from .GLFileSystem import GLEmitTarget
 
     # Module system
     from .GLModuleSystem import GLModule
     from .GLModuleSystem import GLModuleSystem
     from .GLModuleSystem import GLModuleTable
+    from .GLModuleIndex import GLModuleIndex
+    from .GLManifest import GLManifest
+    from .GLPatchCache import GLPatchCache
+    from .GLSubstCache import GLSubstCache
 
     # Different modes
     from .GLImport import GLImport
@@ -60,11 +65,16 @@ except ValueError as error:
     from GLFileSystem import CopyAction
     from GLFileSystem import GLFileSystem
     from GLFileSystem import GLFileAssistant
+    from GLFileSystem import GLEmitTarget
 
     # Module system
     from GLModuleSystem import GLModule
     from GLModuleSystem import GLModuleSystem
     from GLModuleSystem import GLModuleTable
+    from GLModuleIndex import GLModuleIndex
+    from GLManifest import GLManifest
+    from GLPatchCache import GLPatchCache
+    from GLSubstCache import GLSubstCache
 
     # Different modes
     from GLImport import GLImport
@@ -77,8 +87,9 @@ except ValueError as error:
 
 # Append modules to namespace.
 __all__ += ['GLConfig', 'GLError', 'GLInfo']
-__all__ += ['CopyAction', 'GLFileSystem', 'GLFileAssistant']
-__all__ += ['GLModule', 'GLModuleSystem', 'GLModuleTable']
+__all__ += ['CopyAction', 'GLFileSystem', 'GLFileAssistant', 'GLEmitTarget']
+__all__ += ['GLModule', 'GLModuleSystem', 'GLModuleTable', 'GLModuleIndex']
+__all__ += ['GLManifest', 'GLPatchCache', 'GLSubstCache']
 __all__ += ['GLImport', 'GLEmiter', 'GLTestDir']
 __all__ += ['GLMakefileTable']
 
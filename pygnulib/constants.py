@@ -29,7 +29,16 @@ import platform
 import shutil
 import tempfile
 import codecs
+import difflib
+import itertools
+import collections
 import subprocess as sp
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 import __main__ as interpreter
 
 #===============================================================================
@@ -452,6 +461,135 @@ def hardlink(src: str, dest: str) -> None:
         ensure_writable(dest)
 
 
+# The Linux ioctl that makes a file a copy-on-write clone of another file.
+FICLONE = 0x40049409
+
+
+def clone_file(src: str, dest: str) -> bool:
+    '''Make file dest a copy-on-write clone of file src, through the FICLONE
+    ioctl or else through os.copy_file_range, which lets the file system share
+    the data blocks. Return False if neither is supported for these files.'''
+    try:
+        with open(src, 'rb') as srcfile, open(dest, 'wb') as destfile:
+            if fcntl != None and sys.platform.startswith('linux'):
+                try:
+                    fcntl.ioctl(destfile.fileno(), FICLONE, srcfile.fileno())
+                    return True
+                except OSError:
+                    pass
+            if hasattr(os, 'copy_file_range'):
+                size = os.fstat(srcfile.fileno()).st_size
+                copied = 0
+                while copied < size:
+                    count = os.copy_file_range(srcfile.fileno(), destfile.fileno(),
+                                               size - copied)
+                    if count == 0:
+                        break
+                    copied += count
+                return copied == size
+    except OSError:
+        pass
+    return False
+
+
+def reflink(src: str, dest: str) -> None:
+    '''Like cp --reflink=auto: make file dest a copy-on-write clone of file
+    src if the file system supports it, and a regular copy otherwise. Like
+    copyfile, ignore errors when copying the mode.'''
+    if not clone_file(src, dest):
+        shutil.copyfile(src, dest)
+    try:
+        shutil.copymode(src, dest)
+    except PermissionError:
+        pass
+
+
+def map_in_order(function: Callable[[object], object], items: list[object], jobs: int,
+                 discard: Callable[[object], None] | None = None) -> Iterator[object]:
+    '''Apply function to each element of items, in a pool of up to jobs threads,
+    and yield the results in the order of items. At most 2 * jobs calls are
+    started ahead of the result that is yielded next, so which calls have
+    been started at any point does not depend on the timing of the threads.
+    If a call raises an exception, it is raised after the results of the
+    preceding items have been yielded, and no further calls are started. The
+    results that have been computed but not yielded, because of an exception
+    or because the generator was closed, are passed to discard.'''
+    if jobs <= 1:
+        for item in items:
+            yield function(item)
+        return
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        iterator = iter(items)
+        pending = collections.deque([ executor.submit(function, item)
+                                      for item in itertools.islice(iterator, 2 * jobs) ])
+        try:
+            while pending:
+                result = pending[0].result()
+                pending.popleft()
+                for item in itertools.islice(iterator, 1):
+                    pending.append(executor.submit(function, item))
+                yield result
+        finally:
+            for future in pending:
+                if not future.cancel():
+                    try:  # Wait for the call that has started
+                        result = future.result()
+                    except Exception:
+                        continue
+                    if discard != None:
+                        discard(result)
+
+
+def unified_diff(filename: str, old: bytes | None, new: bytes | None) -> str:
+    '''Return a unified diff that changes the contents old of the file filename
+    into new, where None stands for a missing file, or the empty string if
+    there is no change. The file names are prefixed with a/ and b/, as in the
+    output of 'git diff'.'''
+    if old == new:
+        return ''
+    fromfile = '/dev/null' if old == None else 'a/%s' % filename
+    tofile = '/dev/null' if new == None else 'b/%s' % filename
+    try:
+        old_text = (old or b'').decode('utf-8')
+        new_text = (new or b'').decode('utf-8')
+    except UnicodeDecodeError:
+        return 'Binary files %s and %s differ\n' % (fromfile, tofile)
+    # Split at newlines only, not at the form feeds that some sources contain.
+    old_lines = re.findall(r'[^\n]*\n|[^\n]+$', old_text)
+    new_lines = re.findall(r'[^\n]*\n|[^\n]+$', new_text)
+    result = list()
+    for line in difflib.unified_diff(old_lines, new_lines, fromfile, tofile):
+        if not line.endswith('\n'):
+            line += '\n\\ No newline at end of file\n'
+        result.append(line)
+    return ''.join(result)
+
+
+def plan_directories(directories: list[str]) -> list[str]:
+    '''Return the minimal list of directories whose creation with os.makedirs
+    creates all of the given directories, i.e. the given directories that are
+    not a parent of another one, without duplicates.'''
+    directories = sorted(set(os.path.normpath(directory)
+                             for directory in directories
+                             if directory),
+                         key=lambda directory: directory.split(os.path.sep))
+    # In this order, the subdirectories of a directory immediately follow it.
+    result = list()
+    for index, directory in enumerate(directories):
+        if (index + 1 == len(directories)
+                or not directories[index + 1].startswith(directory + os.path.sep)):
+            result.append(directory)
+    return result
+
+
+def make_directories(directories: list[str]) -> None:
+    '''Create the given directories and their parent directories, those that
+    do not exist yet. Each directory is created or checked only once, so that
+    the code that writes files into them can assume that they exist.'''
+    for directory in plan_directories(directories):
+        os.makedirs(directory, exist_ok=True)
+
+
 def filter_filelist(separator: str, filelist: str, prefix: str, suffix: str,
                     removed_prefix: str, removed_suffix: str,
                     added_prefix: str = '', added_suffix: str = '') -> str:
@@ -568,4 +706,77 @@ def combine_lines_matching(pattern: re.Pattern, text: str) -> str:
     return text
 
 
+def compile_substitutions(rules: list[tuple[re.Pattern | str, str]]) -> Callable[[str], str]:
+    '''Return a function that applies the given substitutions, which are the
+    arguments given to re.sub in the order in which they are applied, to a
+    string in a single pass. The patterns are combined into one alternation;
+    the replacement of a match is itself subject to the rules that follow the
+    matching rule. This gives the same result as the sequential re.sub calls
+    as long as the matches of different rules do not overlap. The patterns
+    must not contain backreferences.
+
+    The rule tables that have been checked to satisfy this condition are
+    GLEmiter._CONVERT_TO_GNU_MAKE, on the Makefile.am snippets of all
+    modules, and the rules of GLEmiter._substitute_autoconf_snippet, for
+    all combinations of its flags, on the autoconf snippets of all modules.
+    pygnulib/tests/test_substitutions.py repeats the check. A new rule table
+    needs the same check.'''
+    if not rules:
+        return lambda text: text
+    patterns = [ re.compile(rule[0]) if type(rule[0]) is str else rule[0]
+                 for rule in rules ]
+    alternatives = list()
+    replacements = list()
+    for index, pattern in enumerate(patterns):
+        flags = ''.join(letter
+                        for letter, flag in [('i', re.I), ('m', re.M), ('s', re.S), ('x', re.X)]
+                        if pattern.flags & flag)
+        alternatives.append('(?%s:%s)' % (flags, pattern.pattern))
+        pieces = _parse_replacement(rules[index][1])
+        later = compile_substitutions(rules[index + 1:])
+        if all(type(piece) is str for piece in pieces):
+            # The replacement does not depend on the match.
+            replacements.append(later(''.join(pieces)))
+        else:
+            replacements.append(tuple([pieces, later]))
+    # Without a group around each alternative, the search is faster.
+    combined = re.compile('|'.join(alternatives))
+
+    def replace(match: re.Match) -> str:
+        # The alternation matched with the first pattern that matches here.
+        for index, pattern in enumerate(patterns):
+            own_match = pattern.match(match.string, match.start())
+            if own_match:
+                break
+        replacement = replacements[index]
+        if type(replacement) is str:
+            return replacement
+        pieces, later = replacement
+        return later(''.join([ piece if type(piece) is str else own_match.group(piece) or ''
+                               for piece in pieces ]))
+    return lambda text: combined.sub(replace, text)
+
+
+# A backslash escape in the replacement given to re.sub. The numbers of the
+# group references are captured; octal escapes and other escapes are not.
+_REPLACEMENT_ESCAPE = re.compile(r'\\(?:0[0-7]{0,2}|[0-7]{3}|([1-9][0-9]?)|g<([0-9]+)>|.)', re.S)
+
+
+def _parse_replacement(replacement: str) -> list[str | int]:
+    '''Split the replacement given to re.sub into literal strings, with the
+    escapes processed, and group numbers.'''
+    pieces = list()
+    position = 0
+    for match in _REPLACEMENT_ESCAPE.finditer(replacement):
+        pieces.append(replacement[position:match.start()])
+        number = match.group(1) or match.group(2)
+        if number != None:
+            pieces.append(int(number))
+        else:  # if the escape is not a group reference
+            pieces.append(re.sub('^', match.group(0), '', count=1))
+        position = match.end()
+    pieces.append(replacement[position:])
+    return pieces
+
+
 __all__ += ['APP', 'DIRS', 'MODES', 'UTILS']
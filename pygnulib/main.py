@@ -79,7 +79,6 @@ import codecs
 import random
 import argparse
 import subprocess as sp
-import shlex
 from tempfile import mktemp
 from pygnulib import constants
 from pygnulib import classes
@@ -198,6 +197,22 @@ def main() -> None:
                         dest='mode_xrecursive_dependencies',
                         default=None,
                         action='store_true')
+    parser.add_argument('--extract-reverse-dependencies',
+                        dest='mode_xreverse_dependencies',
+                        default=None,
+                        action='store_true')
+    parser.add_argument('--extract-recursive-reverse-dependencies',
+                        dest='mode_xrecursive_reverse_dependencies',
+                        default=None,
+                        action='store_true')
+    parser.add_argument('--extract-closure-size',
+                        dest='mode_xclosure_size',
+                        default=None,
+                        action='store_true')
+    parser.add_argument('--extract-pulls-in',
+                        dest='mode_xpulls_in',
+                        default=None,
+                        action='store_true')
     parser.add_argument('--extract-autoconf-snippet',
                         dest='mode_xautoconf',
                         default=None,
@@ -261,7 +276,7 @@ def main() -> None:
                         dest='localpath',
                         default=None,
                         nargs=1)
-    # cache-modules: a no-op for backward compatibility
+    # cache-modules: use the persistent module index
     parser.add_argument('--cache-modules',
                         dest='cache_modules',
                         default=None,
@@ -270,6 +285,38 @@ def main() -> None:
                         dest='cache_modules',
                         default=None,
                         action='store_false')
+    # cache-patches: use the persistent cache of patched files
+    parser.add_argument('--cache-patches',
+                        dest='cache_patches',
+                        default=None,
+                        action='store_true')
+    parser.add_argument('--no-cache-patches',
+                        dest='cache_patches',
+                        default=None,
+                        action='store_false')
+    # cache-subst: use the persistent cache of AC_SUBST traces
+    parser.add_argument('--cache-subst',
+                        dest='cache_subst',
+                        default=None,
+                        action='store_true')
+    parser.add_argument('--no-cache-subst',
+                        dest='cache_subst',
+                        default=None,
+                        action='store_false')
+    # cache-manifest: use the manifest of the installed files
+    parser.add_argument('--cache-manifest',
+                        dest='cache_manifest',
+                        default=None,
+                        action='store_true')
+    parser.add_argument('--no-cache-manifest',
+                        dest='cache_manifest',
+                        default=None,
+                        action='store_false')
+    # jobs: the number of files that are installed in parallel
+    parser.add_argument('--jobs',
+                        dest='jobs',
+                        default=None,
+                        nargs=1)
     # verbose
     parser.add_argument('--verbose',
                         default=0,
@@ -344,6 +391,12 @@ def main() -> None:
                         default=None,
                         action='append',
                         nargs=1)
+    # explain
+    parser.add_argument('--explain',
+                        dest='explain',
+                        default=None,
+                        action='append',
+                        nargs=1)
     # conditional-dependencies
     parser.add_argument('--conditional-dependencies',
                         dest='cond_dependencies',
@@ -478,6 +531,16 @@ def main() -> None:
                         dest='lcopymode',
                         default=None,
                         action='store_const', const=classes.CopyAction.Hardlink)
+    # reflink
+    parser.add_argument('--reflink',
+                        dest='copymode',
+                        default=None,
+                        action='store_const', const=classes.CopyAction.Reflink)
+    # local-reflink
+    parser.add_argument('--local-reflink',
+                        dest='lcopymode',
+                        default=None,
+                        action='store_const', const=classes.CopyAction.Reflink)
     # Undocumented option. Only used for the gnulib-tool test suite.
     parser.add_argument('--gnulib-dir',
                         dest='gnulib_dir',
@@ -487,9 +550,21 @@ def main() -> None:
     parser.add_argument("non_option_arguments",
                         nargs='*')
 
+    # --dry-run=diff is the only form of --dry-run that takes an argument. It
+    # is recognized here, so that --dry-run never consumes the argument that
+    # follows it.
+    arguments = list(sys.argv[1:])
+    dryrun_diff = None
+    for index, arg in enumerate(arguments):
+        if arg == '--':
+            break
+        if arg == '--dry-run=diff':
+            arguments[index] = '--dry-run'
+            dryrun_diff = True
+
     # Parse the given arguments. Don't signal an error if non-option arguments
     # occur between or after options.
-    cmdargs, unhandled = parser.parse_known_args()
+    cmdargs, unhandled = parser.parse_known_args(arguments)
 
     # Handle --gnulib-dir and finalize DIRS.
     gnulib_dir = cmdargs.gnulib_dir
@@ -542,6 +617,10 @@ def main() -> None:
         cmdargs.mode_xapplicability,
         cmdargs.mode_xfilelist,
         cmdargs.mode_xdependencies,
+        cmdargs.mode_xreverse_dependencies,
+        cmdargs.mode_xrecursive_reverse_dependencies,
+        cmdargs.mode_xclosure_size,
+        cmdargs.mode_xpulls_in,
         cmdargs.mode_xautoconf,
         cmdargs.mode_xautomake,
         cmdargs.mode_xinclude,
@@ -629,6 +708,25 @@ def main() -> None:
     if cmdargs.mode_xrecursive_dependencies != None:
         mode = 'extract-recursive-dependencies'
         modules = list(cmdargs.non_option_arguments)
+    if cmdargs.mode_xreverse_dependencies != None:
+        mode = 'extract-reverse-dependencies'
+        modules = list(cmdargs.non_option_arguments)
+    if cmdargs.mode_xrecursive_reverse_dependencies != None:
+        mode = 'extract-recursive-reverse-dependencies'
+        modules = list(cmdargs.non_option_arguments)
+    if cmdargs.mode_xclosure_size != None:
+        mode = 'extract-closure-size'
+        modules = list(cmdargs.non_option_arguments)
+    if cmdargs.mode_xpulls_in != None:
+        mode = 'extract-pulls-in'
+        if len(cmdargs.non_option_arguments) < 1:
+            message = '%s: *** ' % constants.APP['name']
+            message += 'invalid number of arguments for --%s\n' % mode
+            message += 'Try \'gnulib-tool --help\' for more information.\n'
+            message += '%s: *** Stop.\n' % constants.APP['name']
+            sys.stderr.write(message)
+            sys.exit(1)
+        modules = list(cmdargs.non_option_arguments)
     if cmdargs.mode_xinclude != None:
         mode = 'extract-include-directive'
         modules = list(cmdargs.non_option_arguments)
@@ -700,6 +798,13 @@ def main() -> None:
     if cmdargs.pobase == None and cmdargs.podomain != None:
         message = '%s: warning: --po-domain has no effect without a --po-base option\n' % constants.APP['name']
         sys.stderr.write(message)
+    if cmdargs.jobs != None and not (cmdargs.jobs[0].isdigit() and int(cmdargs.jobs[0]) >= 1):
+        message = '%s: *** ' % constants.APP['name']
+        message += 'invalid argument for --jobs: %s\n' % cmdargs.jobs[0]
+        message += 'Try \'gnulib-tool --help\' for more information.\n'
+        message += '%s: *** Stop.\n' % constants.APP['name']
+        sys.stderr.write(message)
+        sys.exit(1)
     if mode != None and 'test' in mode and cmdargs.gnu_make:
         message = '%s: --gnu-make not supported when including tests\n' % constants.APP['name']
         sys.stderr.write(message)
@@ -799,6 +904,18 @@ def main() -> None:
     copymode = cmdargs.copymode
     lcopymode = cmdargs.lcopymode
     single_configure = cmdargs.single_configure
+    cache_modules = cmdargs.cache_modules
+    cache_patches = cmdargs.cache_patches
+    cache_subst = cmdargs.cache_subst
+    cache_manifest = cmdargs.cache_manifest
+    explain = cmdargs.explain
+    if explain != None:
+        explain = [ module
+                    for list1 in explain
+                    for module in list1 ]
+    jobs = cmdargs.jobs
+    if jobs != None:
+        jobs = int(cmdargs.jobs[0])
     docbase = None
 
     # Create pygnulib configuration.
@@ -833,6 +950,13 @@ def main() -> None:
         single_configure=single_configure,
         verbose=verbose,
         dryrun=dryrun,
+        dryrun_diff=dryrun_diff,
+        cache_modules=cache_modules,
+        cache_patches=cache_patches,
+        cache_subst=cache_subst,
+        cache_manifest=cache_manifest,
+        explain=explain,
+        jobs=jobs,
     )
 
     # Work in the given mode.
@@ -845,47 +969,14 @@ def main() -> None:
 
     elif mode == 'find':
         modulesystem = classes.GLModuleSystem(config)
+        owners = modulesystem.getFileOwners()
         for filename in files:
             if (isfile(joinpath(DIRS['root'], filename))
                     or (localpath != None
                         and any([ isfile(joinpath(localdir, filename))
                                   for localdir in localpath ]))):
-                # Convert the file name to a POSIX basic regex.
-                # Needs to handle . [ \ * ^ $.
-                filename_regex = filename.replace('\\', '\\\\').replace('[', '\\[').replace('^', '\\^')
-                filename_regex = re.compile(r'([.*$])').sub(r'[\1]', filename_regex)
-                filename_line_regex = '^' + filename_regex + '$'
-                # Read module candidates from gnulib root directory.
-                command = "find modules -type f -print | xargs -n 100 grep -l %s /dev/null | sed -e 's,^modules/,,'" % shlex.quote(filename_line_regex)
-                os.chdir(constants.DIRS['root'])
-                with sp.Popen(command, shell=True, stdout=sp.PIPE) as proc:
-                    result = proc.stdout.read().decode("UTF-8")
-                os.chdir(DIRS['cwd'])
-                # Read module candidates from local directories.
-                if localpath != None and len(localpath) > 0:
-                    command = "find modules -type f -print | xargs -n 100 grep -l %s /dev/null | sed -e 's,^modules/,,' -e 's,\\.diff$,,'" % shlex.quote(filename_line_regex)
-                    for localdir in localpath:
-                        os.chdir(localdir)
-                        with sp.Popen(command, shell=True, stdout=sp.PIPE) as proc:
-                            result += proc.stdout.read().decode("UTF-8")
-                        os.chdir(DIRS['cwd'])
-                listing = [ line
-                            for line in result.split('\n')
-                            if line.strip() ]
-                # Remove modules/ prefix from each file name.
-                pattern = re.compile(r'^modules/')
-                listing = [ pattern.sub('', line)
-                            for line in listing ]
-                # Filter out undesired file names.
-                listing = [ line
-                            for line in listing
-                            if modulesystem.file_is_module(line) ]
-                candidates = sorted(set(listing))
-                for name in candidates:
-                    module = modulesystem.find(name)
-                    if module:  # Ignore module candidates that don't actually exist.
-                        if module.getFiles():
-                            print(name)
+                for name in owners.get(filename, []):
+                    print(name)
             else:
                 message = '%s: warning: file %s does not exist\n' % (constants.APP['name'], filename)
                 sys.stderr.write(message)
@@ -938,8 +1029,9 @@ def main() -> None:
 
             # Perform GLImport actions.
             importer = classes.GLImport(config, mode)
-            filetable, transformers = importer.prepare()
-            importer.execute(filetable, transformers)
+            if not importer.check_up_to_date():
+                filetable, transformers = importer.prepare()
+                importer.execute(filetable, transformers)
 
         else:  # if mode != MODE['--import']
             if m4base:
@@ -962,8 +1054,9 @@ def main() -> None:
                     config.setMacroPrefix(macro_prefix)
                 # Perform GLImport actions.
                 importer = classes.GLImport(config, mode)
-                filetable, transformers = importer.prepare()
-                importer.execute(filetable, transformers)
+                if not importer.check_up_to_date():
+                    filetable, transformers = importer.prepare()
+                    importer.execute(filetable, transformers)
             else:  # if not m4base
                 # Apply func_import to all gnulib directories.
                 # To get this list of directories, look at Makefile.am. (Not at
@@ -1028,8 +1121,9 @@ def main() -> None:
                     config.setMacroPrefix(macro_prefix)
                     # Perform GLImport actions.
                     importer = classes.GLImport(config, mode)
-                    filetable, transformers = importer.prepare()
-                    importer.execute(filetable, transformers)
+                    if not importer.check_up_to_date():
+                        filetable, transformers = importer.prepare()
+                        importer.execute(filetable, transformers)
                 elif len(m4dirs) == 1:
                     # There's only one use of gnulib here. Assume the user means it.
                     # Any number of additional modules can be given.
@@ -1037,16 +1131,18 @@ def main() -> None:
                     config.setM4Base(m4base)
                     # Perform GLImport actions.
                     importer = classes.GLImport(config, mode)
-                    filetable, transformers = importer.prepare()
-                    importer.execute(filetable, transformers)
+                    if not importer.check_up_to_date():
+                        filetable, transformers = importer.prepare()
+                        importer.execute(filetable, transformers)
                 else:  # if len(m4dirs) > 1
                     # No further arguments. Guess the user wants to update all of them.
                     for m4base in m4dirs:
                         config.setM4Base(m4base)
                         # Perform GLImport actions.
                         importer = classes.GLImport(config, mode)
-                        filetable, transformers = importer.prepare()
-                        importer.execute(filetable, transformers)
+                        if not importer.check_up_to_date():
+                            filetable, transformers = importer.prepare()
+                            importer.execute(filetable, transformers)
 
     elif mode == 'create-testdir':
         if not destdir:
@@ -1209,6 +1305,47 @@ def main() -> None:
             if module:
                 sys.stdout.write(module.getDependenciesRecursively())
 
+    elif mode == 'extract-reverse-dependencies':
+        modulesystem = classes.GLModuleSystem(config)
+        graph = modulesystem.getGraph()
+        for name in modules:
+            module = modulesystem.find(name)
+            if module:
+                dependers = graph.getReverseDependencies(graph.getIndex(module))
+                names = sorted({ str(graph.getModule(depender))
+                                 for depender in dependers })
+                sys.stdout.write(lines_to_multiline(names))
+
+    elif mode == 'extract-recursive-reverse-dependencies':
+        modulesystem = classes.GLModuleSystem(config)
+        graph = modulesystem.getGraph()
+        for name in modules:
+            module = modulesystem.find(name)
+            if module:
+                dependers = graph.getReverseDependenciesRecursively(graph.getIndex(module))
+                names = sorted({ str(graph.getModule(depender))
+                                 for depender in dependers })
+                sys.stdout.write(lines_to_multiline(names))
+
+    elif mode == 'extract-closure-size':
+        modulesystem = classes.GLModuleSystem(config)
+        graph = modulesystem.getGraph()
+        for name in modules:
+            module = modulesystem.find(name)
+            if module:
+                print(graph.getClosureSize(module))
+
+    elif mode == 'extract-pulls-in':
+        modulesystem = classes.GLModuleSystem(config)
+        graph = modulesystem.getGraph()
+        module = modulesystem.find(modules[0])
+        if module:
+            for name in modules[1:]:
+                depmodule = modulesystem.find(name)
+                if depmodule:
+                    if graph.pullsIn(module, depmodule):
+                        print(name)
+
     elif mode == 'extract-autoconf-snippet':
         modulesystem = classes.GLModuleSystem(config)
         for name in modules:
@@ -1326,11 +1463,11 @@ def main() -> None:
                     pass
         # Copy the file.
         assistant = classes.GLFileAssistant(config)
+        assistant.config.setDestDir(destdir)
         tmpfile = assistant.tmpfilename(destpath)
         copyfile(lookedup, tmpfile)
         ensure_writable(tmpfile)
         assistant.setOriginal(srcpath)
-        assistant.config.setDestDir(destdir)
         assistant.setRewritten(destpath)
         if isfile(joinpath(destdir, destpath)):
             # The file already exists.
@@ -0,0 +1,123 @@
+# Copyright (C) 2002-2024 Free Software Foundation, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Measure the emitters of the generated files in an import of all modules:
+the time that GLEmiter.lib_Makefile_am, GLEmiter.tests_Makefile_am and
+GLImport.gnulib_comp take, and the SHA-1 of what they return, so that the
+output of two versions can be compared.
+
+Usage: python3 pygnulib/tests/bench_emitters.py [GNULIB-DIR] [OPTION...]
+
+GNULIB-DIR is the gnulib checkout whose pygnulib is measured, by default the
+one that contains this script. The OPTIONs are passed to gnulib-tool --import,
+by default --conditional-dependencies --libtool --with-tests. The import is
+done in a temporary directory. To compare with an older version, check it out
+in a separate directory, for example
+  git worktree add /tmp/before COMMIT
+and run the script alternately with /tmp/before and without argument.'''
+
+from __future__ import annotations
+
+#===============================================================================
+# Define global imports
+#===============================================================================
+import os
+import sys
+import time
+import shutil
+import hashlib
+import tempfile
+import importlib
+import contextlib
+
+
+#===============================================================================
+# Define global constants
+#===============================================================================
+# The options given to gnulib-tool --import if none are given.
+DEFAULT_OPTIONS = ['--conditional-dependencies', '--libtool', '--with-tests']
+
+# A minimal configure.ac for the import.
+CONFIGURE_AC = '''AC_INIT([bench], [1])
+AC_CONFIG_MACRO_DIRS([m4])
+AC_PROG_CC
+gl_EARLY
+gl_INIT
+AC_OUTPUT
+'''
+
+
+#===============================================================================
+# Define global functions
+#===============================================================================
+def measure(cls: type, name: str, results: dict[str, tuple[float, str]]) -> None:
+    '''Replace the method name of cls with one that records the time it takes
+    and the SHA-1 of its result in results.'''
+    method = getattr(cls, name)
+
+    def wrapper(*args, **kwargs) -> str:
+        start = time.perf_counter()
+        result = method(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        results[name] = (elapsed, hashlib.sha1(result.encode('utf-8')).hexdigest())
+        return result
+    setattr(cls, name, wrapper)
+
+
+def main() -> None:
+    arguments = sys.argv[1:]
+    if arguments and not arguments[0].startswith('-'):
+        root = os.path.abspath(arguments.pop(0))
+    else:  # if no directory is given
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    options = arguments or DEFAULT_OPTIONS
+    sys.path.insert(0, root)
+    classes = importlib.import_module('pygnulib.classes')
+    constants = importlib.import_module('pygnulib.constants')
+    gnulib_tool = importlib.import_module('pygnulib.main')
+    constants.init_DIRS(root)
+    modules = classes.GLModuleSystem(classes.GLConfig()).list()
+
+    results = dict()
+    measure(classes.GLEmiter, 'lib_Makefile_am', results)
+    measure(classes.GLEmiter, 'tests_Makefile_am', results)
+    measure(classes.GLImport, 'gnulib_comp', results)
+
+    directory = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    try:
+        with open(os.path.join(directory, 'configure.ac'), 'w') as file:
+            file.write(CONFIGURE_AC)
+        os.chdir(directory)
+        sys.argv = [os.path.join(root, 'pygnulib', 'main.py'), '--gnulib-dir=%s' % root,
+                    '--import', '--dir=.', '--lib=libgnu', '--source-base=lib',
+                    '--m4-base=m4', '--aux-dir=build-aux', '--tests-base=tests']
+        sys.argv += options + modules
+        with open(os.devnull, 'w') as devnull:
+            with contextlib.redirect_stdout(devnull):
+                gnulib_tool.main()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(directory)
+
+    print('%d modules, options: %s' % (len(modules), ' '.join(options)))
+    for name in ['lib_Makefile_am', 'tests_Makefile_am', 'gnulib_comp']:
+        if name in results:
+            elapsed, digest = results[name]
+            print('%-18s %.3fs  %s' % (name, elapsed, digest))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# Copyright (C) 2002-2024 Free Software Foundation, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Measure the memory that the GLModule instances of all modules occupy, as
+seen by tracemalloc: after loading them through GLModuleSystem.find(), and
+after calling the getters that the module table and the emitters use.
+
+Usage: python3 pygnulib/tests/bench_module_memory.py [GNULIB-DIR]
+
+GNULIB-DIR is the gnulib checkout whose pygnulib is measured, by default the
+one that contains this script. To compare with an older version, check it out
+in a separate directory, for example
+  git worktree add /tmp/before COMMIT
+and run the script once with /tmp/before and once without argument.'''
+
+from __future__ import annotations
+
+#===============================================================================
+# Define global imports
+#===============================================================================
+import gc
+import os
+import sys
+import importlib
+import tracemalloc
+
+
+#===============================================================================
+# Define global functions
+#===============================================================================
+def retained() -> float:
+    '''Return the memory traced by tracemalloc, in MiB.'''
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] / 1024 / 1024
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        root = os.path.abspath(sys.argv[1])
+    else:  # if no directory is given
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sys.path.insert(0, root)
+    classes = importlib.import_module('pygnulib.classes')
+    constants = importlib.import_module('pygnulib.constants')
+    constants.init_DIRS(root)
+
+    config = classes.GLConfig()
+    modulesystem = classes.GLModuleSystem(config)
+    directory = constants.DIRS['modules']
+    names = list()
+    for dirpath, dirnames, filenames in os.walk(directory):
+        for filename in filenames:
+            name = os.path.relpath(os.path.join(dirpath, filename), directory)
+            if modulesystem.file_is_module(name):
+                names.append(name)
+    names.sort()
+
+    gc.collect()
+    tracemalloc.start()
+    modules = [ modulesystem.find(name)
+                for name in names ]
+    print('%d modules' % len(modules))
+    print('after loading:  %.2f MiB' % retained())
+    for module in modules:
+        module.getDependenciesWithConditions()
+        module.getFiles()
+        module.getStatuses()
+        module.getApplicability()
+        module.getLicense()
+    print('after getters:  %.2f MiB' % retained())
+    tracemalloc.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+# Copyright (C) 2002-2024 Free Software Foundation, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Measure the construction of GLModule instances from the module description
+files: the time it takes to construct all modules, with and without calling
+getDependencies() and getFiles() on each, and the memory that the non-test
+modules retain.
+
+Usage: python3 pygnulib/tests/bench_module_sections.py [GNULIB-DIR]
+
+GNULIB-DIR is the gnulib checkout whose pygnulib is measured, by default the
+one that contains this script. To compare with an older version, check it out
+in a separate directory, for example
+  git worktree add /tmp/before COMMIT
+and run the script once with /tmp/before and once without argument.'''
+
+from __future__ import annotations
+
+#===============================================================================
+# Define global imports
+#===============================================================================
+import gc
+import os
+import sys
+import time
+import importlib
+import tracemalloc
+
+
+#===============================================================================
+# Define global constants
+#===============================================================================
+# The number of runs; the best one is reported.
+RUNS = 7
+
+
+#===============================================================================
+# Define global functions
+#===============================================================================
+def best_time(function) -> float:
+    '''Return the shortest time that function takes, in RUNS runs.'''
+    times = list()
+    for run in range(RUNS):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        root = os.path.abspath(sys.argv[1])
+    else:  # if no directory is given
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sys.path.insert(0, root)
+    classes = importlib.import_module('pygnulib.classes')
+    constants = importlib.import_module('pygnulib.constants')
+    constants.init_DIRS(root)
+
+    config = classes.GLConfig()
+    modulesystem = classes.GLModuleSystem(config)
+    directory = constants.DIRS['modules']
+    paths = list()
+    for dirpath, dirnames, filenames in os.walk(directory):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if modulesystem.file_is_module(os.path.relpath(path, directory)):
+                paths.append(path)
+    paths.sort()
+
+    def construct() -> list:
+        return [ classes.GLModule(config, path)
+                 for path in paths ]
+
+    def construct_and_get() -> None:
+        for module in construct():
+            module.getDependencies()
+            module.getFiles()
+
+    print('%d module files' % len(paths))
+    print('construct:            %.3fs' % best_time(construct))
+    print('construct + getters:  %.3fs' % best_time(construct_and_get))
+
+    names = modulesystem.list()
+    gc.collect()
+    tracemalloc.start()
+    modules = [ classes.GLModule(config, os.path.join(directory, name))
+                for name in names ]
+    for module in modules:
+        module.getDependencies()
+        module.getFiles()
+    gc.collect()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print('retained by the %d non-test modules: %.1f MiB' % (len(modules), current / 1024 / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# Copyright (C) 2002-2024 Free Software Foundation, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Measure the transitive closure of all modules together with their tests:
+the number of files opened and the time it takes.
+
+Usage: python3 pygnulib/tests/bench_transitive_closure.py [GNULIB-DIR]
+
+GNULIB-DIR is the gnulib checkout whose pygnulib is measured, by default the
+one that contains this script. To compare with an older version, check it out
+in a separate directory, for example
+  git worktree add /tmp/before COMMIT
+and run the script once with /tmp/before and once without argument.'''
+
+from __future__ import annotations
+
+#===============================================================================
+# Define global imports
+#===============================================================================
+import os
+import sys
+import time
+import importlib
+
+
+#===============================================================================
+# Define global functions
+#===============================================================================
+def main() -> None:
+    if len(sys.argv) > 1:
+        root = os.path.abspath(sys.argv[1])
+    else:  # if no directory is given
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sys.path.insert(0, root)
+    classes = importlib.import_module('pygnulib.classes')
+    constants = importlib.import_module('pygnulib.constants')
+    constants.init_DIRS(root)
+
+    config = classes.GLConfig()
+    config.enableInclTestCategory(constants.TESTS['tests'])
+    modulesystem = classes.GLModuleSystem(config)
+    names = modulesystem.list()
+
+    # Count the files that are opened in the gnulib checkout.
+    opened = [0]
+
+    def audit(event: str, args: tuple) -> None:
+        if event == 'open' and type(args[0]) is str and args[0].startswith(root + os.sep):
+            opened[0] += 1
+    sys.addaudithook(audit)
+
+    start = time.perf_counter()
+    modules = [ modulesystem.find(name)
+                for name in names ]
+    moduletable = classes.GLModuleTable(config, True, True)
+    result = moduletable.transitive_closure(modules)
+    elapsed = time.perf_counter() - start
+    print('%d modules, %d in the transitive closure' % (len(names), len(result)))
+    print('%d files opened, %.2fs' % (opened[0], elapsed))
+
+
+if __name__ == '__main__':
+    main()
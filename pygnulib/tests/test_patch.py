@@ -0,0 +1,159 @@
+# Copyright (C) 2002-2024 Free Software Foundation, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Check that GLPatch.apply_unified_diff gives the same results as the
+'patch' program, which GLFileSystem used before, on diffs made by 'diff -u':
+hunks that apply at an offset, hunks without context at the start or at the
+end of the file, and lines without a newline at the end of the file.
+
+Run it from the top of the gnulib checkout with
+  python3 -m unittest discover -s pygnulib/tests
+or
+  python3 -m pytest pygnulib/tests'''
+
+from __future__ import annotations
+
+#===============================================================================
+# Define global imports
+#===============================================================================
+import os
+import shutil
+import tempfile
+import unittest
+import subprocess as sp
+from pygnulib.GLPatch import apply_unified_diff
+
+
+#===============================================================================
+# Define global constants
+#===============================================================================
+# The contents of the original file.
+LINES = [ b'line %d\n' % number
+          for number in range(1, 31) ]
+ORIGINAL = b''.join(LINES)
+EXTRA = b'extra 1\nextra 2\nextra 3\nextra 4\nextra 5\n'
+
+# The test cases: name, the old and new file given to 'diff -u', and the
+# file to which the diff is applied.
+CASES = [
+    ('in the middle', ORIGINAL,
+     ORIGINAL.replace(b'line 15\n', b'line fifteen\n'),
+     ORIGINAL),
+    ('positive offset', ORIGINAL,
+     ORIGINAL.replace(b'line 15\n', b'line fifteen\n'),
+     EXTRA + ORIGINAL),
+    ('negative offset', ORIGINAL,
+     ORIGINAL.replace(b'line 15\n', b'line fifteen\n'),
+     b''.join(LINES[3:])),
+    ('offset of the second hunk', ORIGINAL,
+     ORIGINAL.replace(b'line 5\n', b'line five\n').replace(b'line 25\n', b''),
+     b''.join(LINES[:15]) + EXTRA + b''.join(LINES[15:])),
+    ('no context at the start', ORIGINAL,
+     ORIGINAL.replace(b'line 1\n', b'line one\n'),
+     ORIGINAL + EXTRA),
+    ('insertion at the start', ORIGINAL,
+     EXTRA + ORIGINAL,
+     ORIGINAL + EXTRA),
+    ('no context at the end', ORIGINAL,
+     ORIGINAL.replace(b'line 30\n', b'line thirty\n'),
+     EXTRA + ORIGINAL),
+    ('insertion at the end', ORIGINAL,
+     ORIGINAL + EXTRA,
+     EXTRA + ORIGINAL),
+    ('insertion into an empty file', b'',
+     EXTRA,
+     b''),
+    ('newline added at the end', ORIGINAL[:-1],
+     ORIGINAL,
+     EXTRA + ORIGINAL[:-1]),
+    ('newline removed at the end', ORIGINAL,
+     ORIGINAL[:-1],
+     EXTRA + ORIGINAL),
+    ('last line without newline changed', ORIGINAL[:-1],
+     ORIGINAL.replace(b'line 30\n', b'line thirty'),
+     ORIGINAL[:-1]),
+    ('context without newline', ORIGINAL[:-1],
+     ORIGINAL[:-1].replace(b'line 29\n', b'line twenty-nine\n'),
+     EXTRA + ORIGINAL[:-1]),
+]
+
+
+#===============================================================================
+# Define test cases
+#===============================================================================
+@unittest.skipUnless(shutil.which('diff') and shutil.which('patch'),
+                     "'diff' and 'patch' are needed")
+class TestApplyUnifiedDiff(unittest.TestCase):
+    '''Compare apply_unified_diff with the 'patch' program.'''
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as file:
+            file.write(data)
+        return path
+
+    def diff(self, old: bytes, new: bytes) -> bytes:
+        '''Return the output of 'diff -u' for the contents old and new.'''
+        process = sp.run(['diff', '-u', self.write('old', old), self.write('new', new)],
+                         stdout=sp.PIPE)
+        self.assertEqual(process.returncode, 1)
+        return process.stdout
+
+    def patch(self, data: bytes, diff: bytes) -> bytes:
+        '''Apply diff to the contents data with 'patch -s', as GLFileSystem
+        does when apply_unified_diff fails.'''
+        path = self.write('file', data)
+        sp.run(['patch', '-s', path], input=diff, stdout=sp.PIPE, check=True)
+        with open(path, 'rb') as file:
+            return file.read()
+
+    def test_like_patch(self) -> None:
+        for name, old, new, target in CASES:
+            with self.subTest(case=name):
+                diff = self.diff(old, new)
+                self.assertEqual(apply_unified_diff(target, diff),
+                                 self.patch(target, diff))
+
+    def test_fuzz(self) -> None:
+        # A hunk whose context does not match is left to 'patch'.
+        diff = self.diff(ORIGINAL, ORIGINAL.replace(b'line 15\n', b'line fifteen\n'))
+        target = ORIGINAL.replace(b'line 13\n', b'line thirteen\n')
+        self.assertIsNone(apply_unified_diff(target, diff))
+
+    def test_anchored(self) -> None:
+        # A hunk without context at the start (end) only applies at the start
+        # (end) of the file; 'patch' rejects it elsewhere.
+        for old, target in [(LINES[0], EXTRA + ORIGINAL),
+                            (LINES[-1], ORIGINAL + EXTRA)]:
+            with self.subTest(line=old):
+                diff = self.diff(ORIGINAL, ORIGINAL.replace(old, old.upper()))
+                self.assertIsNone(apply_unified_diff(target, diff))
+                path = self.write('file', target)
+                process = sp.run(['patch', '-s', '-r', '-', path], input=diff,
+                                 stdout=sp.PIPE, stderr=sp.PIPE)
+                self.assertNotEqual(process.returncode, 0)
+
+    def test_not_a_diff(self) -> None:
+        self.assertIsNone(apply_unified_diff(ORIGINAL, b'This is not a diff.\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
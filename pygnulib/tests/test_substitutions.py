@@ -0,0 +1,137 @@
+# Copyright (C) 2002-2024 Free Software Foundation, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+'''Check that the substitutions that GLEmiter applies in a single pass, with
+constants.compile_substitutions, give the same results as the sequential
+re.sub and str.replace passes that they replaced, on the Makefile.am and
+autoconf snippets of all modules.
+
+Run it from the top of the gnulib checkout with
+  python3 -m unittest discover -s pygnulib/tests
+or
+  python3 -m pytest pygnulib/tests'''
+
+from __future__ import annotations
+
+#===============================================================================
+# Define global imports
+#===============================================================================
+import os
+import re
+import itertools
+import unittest
+from pygnulib import classes
+from pygnulib import constants
+from pygnulib import GLEmiter
+from pygnulib.GLModuleSystem import GLModuleSystem
+
+
+#===============================================================================
+# Define global constants
+#===============================================================================
+lines_to_multiline = constants.lines_to_multiline
+
+# The gnulib checkout that contains this file.
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The include guard prefixes and auxiliary directories to check with. The
+# backslash checks that the prefix is inserted literally.
+CONFIGURATIONS = [
+    ('GL', 'build-aux'),
+    ('GL_M4\\1', 'config/aux-dir'),
+]
+
+
+def convert_to_gnu_make(snippet: str) -> str:
+    '''Convert a Automake snippet to GNU Make syntax, with one re.sub call per
+    rule, as GLEmiter._convert_to_gnu_make did before.'''
+    for regexp in GLEmiter._CONVERT_TO_GNU_MAKE:
+        snippet = re.sub(regexp[0], regexp[1], snippet)
+    return snippet
+
+
+def substitute_autoconf_snippet(snippet: str, include_guard_prefix: str, auxdir: str,
+                                indentation: str, disable_libtool: bool,
+                                disable_gettext: bool, replace_auxdir: bool) -> str:
+    '''Edit an autoconf snippet with the sequential passes that
+    GLEmiter.autoconfSnippet used before.'''
+    snippet = snippet.replace('${gl_include_guard_prefix}',
+                              include_guard_prefix)
+    lines = [ f'{indentation}{line}'
+              for line in snippet.split('\n')
+              if line.strip() ]
+    snippet = lines_to_multiline(lines)
+    if disable_libtool:
+        snippet = snippet.replace('$gl_cond_libtool', 'false')
+        snippet = snippet.replace('gl_libdeps', 'gltests_libdeps')
+        snippet = snippet.replace('gl_ltlibdeps', 'gltests_ltlibdeps')
+    if disable_gettext:
+        snippet = snippet.replace('AM_GNU_GETTEXT([external])',
+                                  'dnl you must add AM_GNU_GETTEXT([external]) or similar to configure.ac.')
+    else:
+        snippet = re.compile(r'^ *AM_GNU_GETTEXT_VERSION', re.M).sub(r'AM_GNU_GETTEXT_VERSION', snippet)
+    if replace_auxdir:
+        regex = r'AC_CONFIG_FILES\(\[(.*)\:build-aux/(.*)\]\)'
+        repl = r'AC_CONFIG_FILES([\1:%s/\2])' % auxdir
+        pattern = re.compile(regex, re.M)
+        snippet = pattern.sub(repl, snippet)
+    return snippet
+
+
+#===============================================================================
+# Define test cases
+#===============================================================================
+class TestSubstitutions(unittest.TestCase):
+    '''Compare the single-pass substitutions with the sequential ones.'''
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        constants.init_DIRS(ROOT)
+        config = classes.GLConfig()
+        modulesystem = GLModuleSystem(config)
+        cls.modules = [ modulesystem.find(name)
+                        for name in modulesystem.list(True) ]
+
+    def test_convert_to_gnu_make(self) -> None:
+        for module in self.modules:
+            for snippet in [module.getAutomakeSnippet_Conditional(),
+                            module.getAutomakeSnippet_Unconditional()]:
+                with self.subTest(module=str(module)):
+                    self.assertEqual(GLEmiter._convert_to_gnu_make(snippet),
+                                     convert_to_gnu_make(snippet))
+
+    def test_autoconf_snippet(self) -> None:
+        for include_guard_prefix, auxdir in CONFIGURATIONS:
+            for flags in itertools.product([False, True], repeat=3):
+                disable_libtool, disable_gettext, replace_auxdir = flags
+                substitute = GLEmiter._substitute_autoconf_snippet(include_guard_prefix, auxdir,
+                                                                   disable_libtool, disable_gettext,
+                                                                   replace_auxdir)
+                for indentation in ['', '  ']:
+                    for module in self.modules:
+                        snippet = module.getAutoconfSnippet()
+                        lines = [ f'{indentation}{line}'
+                                  for line in snippet.split('\n')
+                                  if line.strip() ]
+                        with self.subTest(module=str(module), flags=flags, indentation=indentation,
+                                          include_guard_prefix=include_guard_prefix):
+                            self.assertEqual(substitute(lines_to_multiline(lines)),
+                                             substitute_autoconf_snippet(snippet, include_guard_prefix, auxdir,
+                                                                         indentation, disable_libtool,
+                                                                         disable_gettext, replace_auxdir))
+
+
+if __name__ == '__main__':
+    unittest.main()